@@ -12,6 +12,7 @@ except ImportError:
 testing_extras = [
     # Required for running the tests
     'mock>=1.0.0',
+    'msgpack>=0.6.1',
 
     # For coverage and PEP8 linting
     'coverage>=3.7.0',
@@ -59,6 +60,10 @@ setup(
     ],
     extras_require={
         'testing': testing_extras,
+        'xlsx': ['XlsxWriter>=1.0'],
+        'parquet': ['pyarrow>=0.15'],
+        'orjson': ['orjson>=3.0'],
+        'msgpack': ['msgpack>=0.6.1'],
     },
     zip_safe=False,
 )
@@ -6,5 +6,10 @@ from wagtailsurveys import views
 urlpatterns = [
     url(r'^$', views.index, name='index'),
     url(r'^submissions/(\d+)/$', views.list_submissions, name='list_submissions'),
-    url(r'^submissions/(\d+)/(\d+)/delete/$', views.delete_submission, name='delete_submission')
+    url(r'^submissions/(\d+)/bulk/$', views.bulk_create_submissions, name='bulk_create_submissions'),
+    url(r'^submissions/(\d+)/delete/$', views.delete_submissions, name='delete_submissions'),
+    url(r'^submissions/(\d+)/(\d+)/delete/$', views.delete_submission, name='delete_submission'),
+    url(r'^submissions/(\d+)/exports/$', views.list_export_jobs, name='list_export_jobs'),
+    url(r'^submissions/(\d+)/exports/add/$', views.create_export_job, name='create_export_job'),
+    url(r'^submissions/(\d+)/exports/(\d+)/download/$', views.download_export_job, name='download_export_job'),
 ]
@@ -1,7 +1,18 @@
 from django.apps import AppConfig
 
 
-class WagtailMediaAppConfig(AppConfig):
+class WagtailSurveysAppConfig(AppConfig):
     name = 'wagtailsurveys'
     label = 'wagtailsurveys'
     verbose_name = "Wagtail surveys"
+
+    def ready(self):
+        from wagtailsurveys.models import survey_types
+        survey_types.populate()
+
+        from wagtailsurveys.signal_handlers import register_signal_handlers
+        register_signal_handlers()
+
+
+# Kept for projects which refer to the app config by its old name
+WagtailMediaAppConfig = WagtailSurveysAppConfig
@@ -0,0 +1,246 @@
+"""
+Archival of old survey submissions into gzipped NDJSON files in the storage
+given by `WAGTAILSURVEYS_ARCHIVE_STORAGE` setting.
+
+Each file holds a chunk of a page's submissions, ordered by (created_at, id), and is listed
+in `SubmissionArchive` rows. Archived submissions are removed from the submissions table,
+but still count in results and statistics, and are included in exports.
+"""
+from __future__ import absolute_import, unicode_literals
+
+import datetime
+import gzip
+import hashlib
+import io
+from collections import Counter
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from wagtailsurveys import codec
+from wagtailsurveys.models import FormSchema, SubmissionAnswer, SubmissionArchive, SurveyStats, load_submissions
+from wagtailsurveys.storage import get_archive_storage, make_file_token
+
+
+def get_archive_name(page, chunk):
+    # Ids of pages and submissions are left out, so names of files can't be guessed
+    return 'wagtailsurveys/archives/%s.ndjson.gz' % make_file_token()
+
+
+def write_archive(page, chunk):
+    """
+    Writes a chunk of submissions into a new file and returns its unsaved `SubmissionArchive`.
+    """
+
+    lines = []
+    current_schema_id = None
+    for submission in chunk:
+        data = submission.get_data()
+        data.pop('created_at', None)
+
+        schema_id = submission.schema_id
+        if submission.resolves_renames:
+            # Its data is read under current field names, so fields renamed later are renamed
+            # like ones of submissions saved with the current schema
+            if current_schema_id is None:
+                current_schema_id = FormSchema.objects.get_for_page(page).pk
+            schema_id = current_schema_id
+
+        lines.append(codec.dumps({
+            'id': submission.id,
+            # Microseconds are kept, unlike in dates of submission data
+            'created_at': submission.created_at.isoformat(),
+            'schema': schema_id,
+            'data': data,
+        }))
+
+    buffer = io.BytesIO()
+    # mtime is fixed, so the same submissions always give the same file
+    with gzip.GzipFile(fileobj=buffer, mode='wb', mtime=0) as output:
+        output.write('\n'.join(lines).encode('utf-8') + b'\n')
+    content = buffer.getvalue()
+
+    return SubmissionArchive(
+        page=page,
+        file=get_archive_storage().save(get_archive_name(page, chunk), ContentFile(content)),
+        size=len(content),
+        checksum=hashlib.sha1(content).hexdigest(),
+        submission_count=len(chunk),
+        first_created_at=chunk[0].created_at,
+        first_submission_id=chunk[0].id,
+        last_created_at=chunk[-1].created_at,
+        last_submission_id=chunk[-1].id,
+    )
+
+
+def archive_submissions(page, cutoff, chunk_size=None):
+    """
+    Moves submissions of a survey page created before `cutoff` into archive files,
+    a file per chunk of `WAGTAILSURVEYS_ARCHIVE_CHUNK_SIZE` submissions. Returns the number of archived submissions.
+
+    Each file is listed, and its submissions are deleted, in one short transaction.
+    Results and statistics are left as they are, since they include archived submissions.
+    """
+
+    if chunk_size is None:
+        chunk_size = getattr(settings, 'WAGTAILSURVEYS_ARCHIVE_CHUNK_SIZE', 10000)
+
+    submission_class = page.get_submission_class()
+    submissions = submission_class.objects.filter(page=page, created_at__lt=cutoff).order_by('created_at', 'id')
+    archived = 0
+
+    while True:
+        # Archived submissions are deleted, so each chunk starts from the beginning
+        chunk = load_submissions(submissions[:chunk_size])
+        if not chunk:
+            break
+
+        archive = write_archive(page, chunk)
+
+        with transaction.atomic():
+            rows = submission_class.objects.filter(pk__in=[submission.pk for submission in chunk])
+            # Rows are locked, so none of them can be deleted between the check and the delete
+            if len(rows.select_for_update().values_list('pk', flat=True)) == len(chunk):
+                rows.delete()
+                archive.save()
+
+        if archive.pk is None:
+            # Some of the submissions were deleted while the file was written, the chunk is read again
+            get_archive_storage().delete(archive.file)
+            continue
+
+        archived += len(chunk)
+
+    return archived
+
+
+def to_datetime(value):
+    if isinstance(value, datetime.datetime):
+        return value
+
+    value = datetime.datetime.combine(value, datetime.time())
+    if settings.USE_TZ:
+        value = timezone.make_aware(value)
+    return value
+
+
+class ArchivedSubmissions(object):
+    """
+    Archived submissions of a survey page created between `date_from` and `date_to`,
+    with the same meaning of dates as `filter_submissions`, and before the `before` time if it's given.
+    """
+
+    def __init__(self, page, date_from=None, date_to=None, before=None):
+        self.page = page
+        self.date_from = to_datetime(date_from) if date_from else None
+        self.date_to = to_datetime(date_to) + datetime.timedelta(days=1) if date_to else None
+        self.before = before
+
+    def get_archives(self, after=None):
+        archives = SubmissionArchive.objects.filter(page=self.page)
+        if self.date_from:
+            archives = archives.filter(last_created_at__gte=self.date_from)
+        if self.date_to:
+            archives = archives.filter(first_created_at__lte=self.date_to)
+        if self.before:
+            archives = archives.filter(first_created_at__lt=self.before)
+        if after is not None:
+            archives = archives.filter(
+                Q(last_created_at__gt=after[0]) | Q(last_created_at=after[0], last_submission_id__gt=after[1])
+            )
+        return archives
+
+    def includes_time(self, created_at):
+        if self.date_from and created_at < self.date_from:
+            return False
+        if self.date_to and created_at > self.date_to:
+            return False
+        return not self.before or created_at < self.before
+
+    def includes(self, submission, after=None):
+        if not self.includes_time(submission.created_at):
+            return False
+        return after is None or (submission.created_at, submission.id) > tuple(after)
+
+    def includes_archive(self, archive):
+        return self.includes_time(archive.first_created_at) and self.includes_time(archive.last_created_at)
+
+    def iter_chunks(self, after=None):
+        """
+        Yields lists of `ArchivedSubmission` ordered by `created_at`, a list per archive file,
+        starting after the (`created_at`, `id`) pair given as `after`.
+        """
+
+        for archive in self.get_archives(after).iterator():
+            chunk = [submission for submission in archive.read_submissions() if self.includes(submission, after)]
+            if chunk:
+                yield chunk
+
+    def count(self):
+        """
+        Returns the number of archived submissions, reading only files which are partly in the dates.
+        """
+
+        count = 0
+        for archive in self.get_archives().iterator():
+            if self.includes_archive(archive):
+                count += archive.submission_count
+            else:
+                count += sum(1 for submission in archive.read_submissions() if self.includes(submission))
+        return count
+
+    def delete(self):
+        """
+        Deletes the archived submissions and removes their answers from results, stored answers
+        and statistics, like `AbstractSurvey.delete_submissions`. Returns the number of deleted submissions.
+
+        Files with only these submissions are deleted, and files which hold other submissions too
+        are replaced with new files holding the rest of them. Each file is handled in one short transaction.
+        """
+
+        page = self.page
+        fields = page.get_results_fields()
+        deleted = 0
+
+        for archive in list(self.get_archives()):
+            submissions = archive.read_submissions()
+            removed = [submission for submission in submissions if self.includes(submission)]
+            if not removed:
+                continue
+            kept = [submission for submission in submissions if not self.includes(submission)]
+
+            counts = Counter()
+            for submission in removed:
+                counts.update(page.get_submission_answers(submission.get_data(), fields))
+
+            new_archive = write_archive(page, kept) if kept else None
+            saved = False
+
+            try:
+                with transaction.atomic():
+                    # The archive is locked, so a concurrent deletion doesn't remove its answers twice
+                    if SubmissionArchive.objects.select_for_update().filter(pk=archive.pk).values_list('pk', flat=True):
+                        SubmissionAnswer.objects.filter(
+                            page=page, submission_id__in=[submission.id for submission in removed]
+                        ).delete()
+                        # The old file is deleted with its row, once the transaction is committed
+                        archive.delete()
+                        if new_archive is not None:
+                            new_archive.save()
+                        page.increment_results(counts, delta=-1)
+
+                        if page.track_submission_stats:
+                            SurveyStats.objects.remove_submissions(page, len(removed))
+
+                        saved = True
+            finally:
+                if new_archive is not None and not saved:
+                    get_archive_storage().delete(new_archive.file)
+
+            if saved:
+                deleted += len(removed)
+
+        return deleted
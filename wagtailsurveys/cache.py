@@ -0,0 +1,143 @@
+from __future__ import absolute_import, unicode_literals
+
+import threading
+import uuid
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+class LRUCache(object):
+    """
+    A small thread-safe in-process cache with least-recently-used eviction.
+
+    Keys are expected to be tuples whose first item is a page id,
+    so all entries of a page can be dropped at once.
+    """
+
+    def __init__(self, max_size_setting, default_max_size):
+        self.max_size_setting = max_size_setting
+        self.default_max_size = default_max_size
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def max_size(self):
+        return getattr(settings, self.max_size_setting, self.default_max_size)
+
+    def get(self, key):
+        with self._lock:
+            try:
+                value = self._data.pop(key)
+            except KeyError:
+                return None
+
+            # Move the key to the end, so it becomes the most recently used one
+            self._data[key] = value
+            return value
+
+    def set(self, key, value):
+        max_size = self.max_size
+        if not max_size:
+            return
+
+        with self._lock:
+            self._data.pop(key, None)
+            self._data[key] = value
+            while len(self._data) > max_size:
+                self._data.popitem(last=False)
+
+    def invalidate_page(self, page_id):
+        with self._lock:
+            for key in [key for key in self._data if key[0] == page_id]:
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+# Form classes built by `AbstractSurvey.get_form_class`,
+# keyed by `AbstractSurvey.get_form_class_cache_key()`
+form_class_cache = LRUCache('WAGTAILSURVEYS_FORM_CLASS_CACHE_SIZE', 128)
+
+
+# Form schemas of survey pages, keyed by `AbstractSurvey.get_form_class_cache_key()`
+form_schema_cache = LRUCache('WAGTAILSURVEYS_FORM_CLASS_CACHE_SIZE', 128)
+
+# Short keys of data fields used by compact submission encoding, keyed by (page_id,)
+field_keys_cache = LRUCache('WAGTAILSURVEYS_FIELD_KEYS_CACHE_SIZE', 128)
+
+
+def get_form_fields_cache():
+    """
+    Returns Django cache backend used to share survey form fields between processes,
+    or None if `WAGTAILSURVEYS_FORM_FIELDS_CACHE` is not set.
+    """
+
+    alias = getattr(settings, 'WAGTAILSURVEYS_FORM_FIELDS_CACHE', None)
+    if alias is None:
+        return None
+
+    return caches[alias]
+
+
+def get_form_fields_cache_key(page_id):
+    return 'wagtailsurveys:form-fields:%d' % page_id
+
+
+def invalidate_form_cache(page_id):
+    """
+    Drops cached form class, form schema and form fields for a survey page.
+    """
+
+    form_class_cache.invalidate_page(page_id)
+    form_schema_cache.invalidate_page(page_id)
+
+    form_fields_cache = get_form_fields_cache()
+    if form_fields_cache is not None:
+        form_fields_cache.delete(get_form_fields_cache_key(page_id))
+
+
+def get_results_cache_key(page_id):
+    return 'wagtailsurveys:results:%d' % page_id
+
+
+def get_permissions_cache():
+    """
+    Returns Django cache backend used to keep ids of surveys available to each user,
+    or None if `WAGTAILSURVEYS_PERMISSIONS_CACHE` is not set.
+    """
+
+    alias = getattr(settings, 'WAGTAILSURVEYS_PERMISSIONS_CACHE', None)
+    if alias is None:
+        return None
+
+    return caches[alias]
+
+
+# Changed whenever page permissions or survey pages change,
+# so all users' cached survey ids become stale at once
+PERMISSIONS_GENERATION_CACHE_KEY = 'wagtailsurveys:permissions-generation'
+
+
+def get_permissions_cache_key(user):
+    # Permissions of inactive users and superusers don't depend on groups,
+    # so changes to these flags must not reuse cached ids
+    return 'wagtailsurveys:surveys-for-user:%d:%d:%d' % (user.pk, user.is_active, user.is_superuser)
+
+
+def invalidate_permissions_cache():
+    """
+    Marks survey ids cached for all users as stale and returns the new generation.
+    """
+
+    permissions_cache = get_permissions_cache()
+    if permissions_cache is None:
+        return None
+
+    # A new random value can't collide with a generation already stored next to cached ids
+    generation = uuid.uuid4().hex
+    permissions_cache.set(PERMISSIONS_GENERATION_CACHE_KEY, generation, None)
+    return generation
@@ -0,0 +1,137 @@
+"""
+JSON codecs used to encode and decode `form_data` of submissions.
+
+The codec is selected by `WAGTAILSURVEYS_JSON_CODEC` setting. All codecs encode values
+which aren't supported by JSON the same way as `DjangoJSONEncoder`, so submissions
+stored with one codec can be read with any other one.
+"""
+from __future__ import absolute_import, unicode_literals
+
+import json
+import logging
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.module_loading import import_string
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import simplejson
+except ImportError:
+    simplejson = None
+
+
+logger = logging.getLogger('wagtailsurveys')
+
+
+class JSONCodec(object):
+    """
+    Codec based on `json` module of the standard library.
+    """
+
+    name = 'json'
+
+    @classmethod
+    def is_available(cls):
+        return True
+
+    def dumps(self, data):
+        return json.dumps(data, cls=DjangoJSONEncoder)
+
+    def loads(self, data):
+        return json.loads(data)
+
+
+class SimpleJSONCodec(JSONCodec):
+    name = 'simplejson'
+
+    @classmethod
+    def is_available(cls):
+        return simplejson is not None
+
+    def __init__(self):
+        self.default = DjangoJSONEncoder().default
+
+    def dumps(self, data):
+        # simplejson writes decimals as numbers by default, DjangoJSONEncoder writes them as strings
+        return simplejson.dumps(data, default=self.default, use_decimal=False)
+
+    def loads(self, data):
+        return simplejson.loads(data)
+
+
+class ORJSONCodec(JSONCodec):
+    """
+    Codec based on `orjson`. Its output is compact, without spaces after separators.
+    """
+
+    name = 'orjson'
+
+    @classmethod
+    def is_available(cls):
+        return orjson is not None
+
+    def __init__(self):
+        # orjson formats dates itself, differently from DjangoJSONEncoder,
+        # so they are passed to the default function instead
+        self.option = orjson.OPT_PASSTHROUGH_DATETIME
+        self.default = DjangoJSONEncoder().default
+
+    def dumps(self, data):
+        return orjson.dumps(data, default=self.default, option=self.option).decode('utf-8')
+
+    def loads(self, data):
+        return orjson.loads(data)
+
+
+# Ordered by speed, simplejson is usually slower than json of Python 3
+CODECS = [ORJSONCodec, JSONCodec, SimpleJSONCodec]
+
+_codecs = {}
+
+
+def get_codec_class(name):
+    if name == 'auto':
+        # The fastest of installed codecs
+        for codec_class in CODECS:
+            if codec_class.is_available():
+                return codec_class
+
+    for codec_class in CODECS:
+        if codec_class.name == name:
+            break
+    else:
+        codec_class = import_string(name)
+
+    if not codec_class.is_available():
+        logger.warning("JSON codec '%s' is not available, falling back to 'json'", name)
+        return JSONCodec
+
+    return codec_class
+
+
+def get_json_codec():
+    """
+    Returns an instance of the codec configured by `WAGTAILSURVEYS_JSON_CODEC` setting:
+    'json' (default), 'simplejson', 'orjson', 'auto' for the fastest installed one
+    or a dotted path to a codec class.
+    """
+
+    name = getattr(settings, 'WAGTAILSURVEYS_JSON_CODEC', 'json')
+    try:
+        return _codecs[name]
+    except KeyError:
+        codec = _codecs[name] = get_codec_class(name)()
+        return codec
+
+
+def dumps(data):
+    return get_json_codec().dumps(data)
+
+
+def loads(data):
+    return get_json_codec().loads(data)
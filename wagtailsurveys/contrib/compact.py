@@ -0,0 +1,72 @@
+"""
+Survey submissions stored in a compact binary form: MessagePack maps keyed
+by short integer keys of data fields instead of their names.
+
+Keys are kept in `SubmissionFieldKey` rows linked to form fields, so answers
+stored before a field was renamed are read under its new name.
+
+Requires msgpack.
+"""
+from __future__ import absolute_import, unicode_literals
+
+import msgpack
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.utils.six import text_type
+
+from wagtailsurveys import codec
+from wagtailsurveys.models import AbstractFormSubmission, SubmissionFieldKey
+
+
+# Values which MessagePack doesn't support are stored like in JSON
+_encoder = DjangoJSONEncoder()
+
+
+def encode_form_data(page, data):
+    """
+    Encodes a dict of form data of a survey page into bytes.
+    """
+
+    keys = SubmissionFieldKey.objects.get_keys(page, list(data))
+    return msgpack.packb(
+        {keys[name]: value for name, value in data.items()},
+        default=_encoder.default, use_bin_type=True
+    )
+
+
+def decode_form_data(page_id, value):
+    """
+    Decodes bytes encoded by `encode_form_data` into a dict of form data.
+    """
+
+    data = msgpack.unpackb(bytes(value), raw=False, strict_map_key=False)
+
+    names = SubmissionFieldKey.objects.get_names(page_id)
+    if any(key not in names for key in data):
+        # The key was added by another process
+        names = SubmissionFieldKey.objects.get_names(page_id, refresh=True)
+
+    return {names.get(key, text_type(key)): answer for key, answer in data.items()}
+
+
+class AbstractCompactFormSubmission(AbstractFormSubmission):
+    """
+    Data for a survey submission, stored as MessagePack with short keys.
+    """
+
+    form_data = models.BinaryField()
+
+    resolves_renames = True
+
+    def set_form_data(self, data):
+        self.form_data = encode_form_data(self.page, data)
+
+    @classmethod
+    def decode_form_data(cls, form_data, page_id):
+        return decode_form_data(page_id, form_data)
+
+    def __str__(self):
+        return codec.dumps(self.get_form_data())
+
+    class Meta(AbstractFormSubmission.Meta):
+        abstract = True
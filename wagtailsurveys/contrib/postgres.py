@@ -0,0 +1,89 @@
+"""
+Survey submissions stored in a PostgreSQL `jsonb` column.
+
+Requires Django 1.11+ and psycopg2.
+"""
+from __future__ import absolute_import, unicode_literals
+
+import json
+
+from django.contrib.postgres.fields import JSONField
+from django.contrib.postgres.fields.jsonb import KeyTextTransform
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models, transaction
+from django.db.models import Count, Max
+
+from wagtailsurveys.models import AbstractFormSubmission
+
+
+class JSONFormSubmissionQuerySet(models.QuerySet):
+    def count_answers(self, field_name):
+        """
+        Returns a queryset of dicts with an `answer` to the given question
+        and `count` of submissions which gave it, grouped in the database.
+        """
+
+        return self.annotate(
+            answer=KeyTextTransform(field_name, 'form_data')
+        ).order_by().values('answer').annotate(count=Count('id'))
+
+
+class AbstractJSONFormSubmission(AbstractFormSubmission):
+    """
+    Data for a survey submission, stored in a `jsonb` column.
+
+    Answers can be filtered in the database, for example
+    `SubmissionClass.objects.filter(page=page, **{'form_data__your-choice': 'Yes'})`.
+    """
+
+    form_data = JSONField(encoder=DjangoJSONEncoder)
+
+    objects = JSONFormSubmissionQuerySet.as_manager()
+
+    def set_form_data(self, data):
+        self.form_data = data
+
+    @classmethod
+    def decode_form_data(cls, form_data, page_id):
+        return form_data
+
+    def __str__(self):
+        return json.dumps(self.form_data, cls=DjangoJSONEncoder)
+
+    class Meta(AbstractFormSubmission.Meta):
+        abstract = True
+
+
+def copy_form_data_to_json(app_label, model_name, source='form_data', target='form_data_json', batch_size=10000,
+                           only_missing=False):
+    """
+    Returns a function for `migrations.RunPython`, which copies JSON text
+    of the `source` column into the `target` jsonb column.
+
+    Rows are converted by the database in batches of `batch_size` primary keys.
+    Run it in a migration with `atomic = False`, so each batch is committed on its own
+    and a large table isn't locked by one long transaction.
+    With `only_missing`, only rows whose `target` is still NULL are converted.
+    """
+
+    def copy(apps, schema_editor):
+        model = apps.get_model(app_label, model_name)
+        quote_name = schema_editor.quote_name
+
+        sql = 'UPDATE {table} SET {target} = {source}::jsonb WHERE {pk} >= %s AND {pk} < %s'.format(
+            table=quote_name(model._meta.db_table),
+            target=quote_name(model._meta.get_field(target).column),
+            source=quote_name(model._meta.get_field(source).column),
+            pk=quote_name(model._meta.pk.column),
+        )
+        if only_missing:
+            sql += ' AND {target} IS NULL'.format(target=quote_name(model._meta.get_field(target).column))
+
+        max_pk = model.objects.aggregate(max_pk=Max('pk'))['max_pk'] or 0
+        for start in range(0, max_pk + 1, batch_size):
+            # Outside of an atomic migration each batch is committed separately
+            with transaction.atomic(using=schema_editor.connection.alias):
+                with schema_editor.connection.cursor() as cursor:
+                    cursor.execute(sql, [start, start + batch_size])
+
+    return copy
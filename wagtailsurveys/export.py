@@ -0,0 +1,238 @@
+from __future__ import absolute_import, unicode_literals
+
+import csv
+import datetime
+import logging
+import traceback
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.utils import timezone
+from django.utils.encoding import force_bytes, smart_str
+
+from wagtailsurveys.archive import ArchivedSubmissions
+from wagtailsurveys.models import load_submissions
+from wagtailsurveys.pagination import filter_after
+from wagtailsurveys.storage import get_export_storage
+
+
+logger = logging.getLogger('wagtailsurveys')
+
+
+class Echo(object):
+    """
+    An object that implements just the write method of the file-like interface,
+    so `csv.writer` returns written rows instead of buffering them.
+    """
+
+    def write(self, value):
+        return value
+
+
+def filter_submissions(submissions, date_from=None, date_to=None):
+    """
+    Filters submissions created between `date_from` and `date_to` dates, both inclusive.
+    """
+
+    # careful: date_to should be increased by 1 day since the created_at
+    # is a time so it will always be greater
+    if date_to:
+        date_to += datetime.timedelta(days=1)
+    if date_from and date_to:
+        submissions = submissions.filter(created_at__range=[date_from, date_to])
+    elif date_from and not date_to:
+        submissions = submissions.filter(created_at__gte=date_from)
+    elif not date_from and date_to:
+        submissions = submissions.filter(created_at__lte=date_to)
+
+    return submissions
+
+
+def iter_submission_chunks(submissions, chunk_size=None, after=None, archived=None):
+    """
+    Iterates over lists of submissions ordered by `created_at` without loading all of them into memory.
+
+    Submissions are fetched in chunks of `WAGTAILSURVEYS_EXPORT_CHUNK_SIZE` rows,
+    each chunk continues from the last (`created_at`, `id`) pair of the previous one.
+    Iteration starts after the (`created_at`, `id`) pair given as `after`.
+
+    `ArchivedSubmissions` given as `archived` are yielded first, as they are older than stored ones.
+    """
+
+    if chunk_size is None:
+        chunk_size = getattr(settings, 'WAGTAILSURVEYS_EXPORT_CHUNK_SIZE', 1000)
+
+    if archived is not None:
+        for chunk in archived.iter_chunks(after):
+            yield chunk
+
+    submissions = submissions.order_by('created_at', 'id')
+
+    while True:
+        chunk = submissions
+        if after is not None:
+            chunk = filter_after(chunk, *after)
+
+        chunk = load_submissions(chunk[:chunk_size])
+        if chunk:
+            yield chunk
+
+        if len(chunk) < chunk_size:
+            break
+
+        after = (chunk[-1].created_at, chunk[-1].id)
+
+
+def iter_submissions(submissions, chunk_size=None, archived=None):
+    """
+    Iterates over submissions ordered by `created_at`, fetching them in chunks.
+    """
+
+    for chunk in iter_submission_chunks(submissions, chunk_size, archived=archived):
+        for submission in chunk:
+            yield submission
+
+
+def get_source_names(names, schema_renames=None):
+    """
+    Returns names under which values of data fields `names` are stored
+    in submissions of a form version with `schema_renames`, None for values which aren't stored.
+    """
+
+    if not schema_renames:
+        return names
+
+    sources = {name: old_name for old_name, name in schema_renames.items() if name is not None}
+    return [
+        # Values stored under a name renamed since belong to another field
+        sources.get(name, None if name in schema_renames else name)
+        for name in names
+    ]
+
+
+def iter_rows(submissions, names, renames=None):
+    """
+    Yields a tuple of values of data fields `names` for each submission,
+    reading submissions of older form versions by current field names.
+
+    `renames` is a dict returned by `AbstractSurvey.get_versioned_data_fields`.
+    """
+
+    source_names = {}
+    for submission in submissions:
+        # Data of submissions which resolve renames is already read under current names,
+        # and renaming it again would lose it
+        schema_id = None if submission.resolves_renames else submission.schema_id
+        if schema_id not in source_names:
+            source_names[schema_id] = get_source_names(names, renames.get(schema_id) if renames else None)
+
+        yield submission.get_row(source_names[schema_id])
+
+
+def get_csv_headings(data_fields):
+    # Prevents UnicodeEncodeError for questions with non-ansi symbols
+    return [smart_str(label) for name, label in data_fields]
+
+
+def get_csv_rows(data_fields, submissions, renames=None):
+    names = [name for name, label in data_fields]
+    return [[smart_str(value) for value in row] for row in iter_rows(submissions, names, renames)]
+
+
+def iter_csv(data_fields, submissions, renames=None, archived=None):
+    """
+    Yields lines of the CSV export one by one, starting with headings.
+    """
+
+    writer = csv.writer(Echo())
+
+    yield writer.writerow(get_csv_headings(data_fields))
+
+    for chunk in iter_submission_chunks(submissions, archived=archived):
+        for row in get_csv_rows(data_fields, chunk, renames):
+            yield writer.writerow(row)
+
+
+def save_export_part(job, index, rows):
+    writer = csv.writer(Echo())
+    content = b''.join(force_bytes(writer.writerow(row)) for row in rows)
+
+    # A part left by an interrupted run is replaced, so its name stays predictable
+    storage = get_export_storage()
+    name = job.get_part_name(index)
+    if storage.exists(name):
+        storage.delete(name)
+    storage.save(name, ContentFile(content))
+
+
+def run_export_job(job, chunk_size=None):
+    """
+    Writes submissions of a claimed export job to the export storage, a part per chunk of submissions.
+
+    Progress is saved after each part, so the job can be run again
+    after an interruption and continues from the last saved part.
+    """
+
+    if chunk_size is None:
+        chunk_size = getattr(settings, 'WAGTAILSURVEYS_EXPORT_JOB_CHUNK_SIZE', 10000)
+
+    try:
+        survey_page = job.page.specific
+        data_fields, renames = survey_page.get_versioned_data_fields()
+        submissions = filter_submissions(
+            survey_page.get_submission_class().objects.filter(page=survey_page),
+            date_from=job.date_from,
+            date_to=job.date_to,
+        )
+
+        archived = ArchivedSubmissions(survey_page, date_from=job.date_from, date_to=job.date_to)
+
+        after = None
+        if job.last_submission_id is not None:
+            after = (job.last_created_at, job.last_submission_id)
+
+        for chunk in iter_submission_chunks(submissions, chunk_size, after=after, archived=archived):
+            rows = get_csv_rows(data_fields, chunk, renames)
+            if job.part_count == 0:
+                rows.insert(0, get_csv_headings(data_fields))
+
+            save_export_part(job, job.part_count, rows)
+
+            job.part_count += 1
+            job.exported_count += len(chunk)
+            job.last_created_at = chunk[-1].created_at
+            job.last_submission_id = chunk[-1].id
+            job.save(update_fields=[
+                'part_count', 'exported_count', 'last_created_at', 'last_submission_id', 'updated_at'
+            ])
+
+        if job.part_count == 0:
+            # There are no submissions to export
+            save_export_part(job, 0, [get_csv_headings(data_fields)])
+            job.part_count = 1
+
+        job.status = job.STATUS_COMPLETE
+        job.finished_at = timezone.now()
+        job.save(update_fields=['status', 'finished_at', 'part_count', 'updated_at'])
+    except Exception:
+        logger.exception("Export job %d of survey page %d failed", job.pk, job.page_id)
+
+        job.status = job.STATUS_FAILED
+        job.error = traceback.format_exc()
+        job.finished_at = timezone.now()
+        job.save(update_fields=['status', 'error', 'finished_at', 'updated_at'])
+
+
+def iter_export_job_file(job, block_size=64 * 1024):
+    """
+    Yields contents of a complete export job, reading its parts one after another.
+    """
+
+    storage = get_export_storage()
+    for name in job.get_part_names():
+        with storage.open(name, 'rb') as part:
+            while True:
+                data = part.read(block_size)
+                if not data:
+                    break
+                yield data
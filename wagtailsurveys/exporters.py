@@ -0,0 +1,418 @@
+"""
+Exporters of survey submissions into files of different formats.
+
+XLSX export requires XlsxWriter, Parquet export requires pyarrow.
+Exporters which dependencies are not installed are not offered.
+"""
+from __future__ import absolute_import, unicode_literals
+
+import datetime
+import tempfile
+import zlib
+from collections import OrderedDict
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from django.utils.encoding import force_bytes, force_text
+from django.utils.module_loading import import_string
+from django.utils.six import text_type
+from django.utils.six.moves import cPickle as pickle
+from django.utils.translation import ugettext_lazy as _
+
+from wagtailsurveys import codec
+from wagtailsurveys.export import iter_csv, iter_rows, iter_submission_chunks
+
+try:
+    import xlsxwriter
+except ImportError:
+    xlsxwriter = None
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+
+def convert_value(field_type, value):
+    """
+    Converts a value of submitted form data, as it is stored in JSON, into a Python value
+    of the form field type: `Decimal` for numbers, `date` and `datetime` for dates,
+    `bool` for checkboxes and a list of strings for multiple checkboxes.
+    """
+
+    if value is None:
+        return None
+
+    if field_type == 'checkbox':
+        return bool(value)
+
+    if field_type == 'checkboxes':
+        if isinstance(value, (list, tuple)):
+            return [text_type(item) for item in value]
+        return [text_type(value)]
+
+    if isinstance(value, (list, tuple)):
+        return ', '.join(text_type(item) for item in value)
+
+    if field_type == 'number':
+        try:
+            return Decimal(text_type(value))
+        except InvalidOperation:
+            return None
+
+    if field_type == 'date':
+        if isinstance(value, datetime.date):
+            return value
+        return parse_date(value) if value else None
+
+    if field_type == 'datetime':
+        if isinstance(value, datetime.datetime):
+            return value
+        return parse_datetime(value) if value else None
+
+    return text_type(value)
+
+
+def iter_gzip(chunks, level=None):
+    """
+    Compresses chunks of an exported file into gzip format while they are streamed.
+
+    Compressed data is yielded as soon as zlib emits it, so no more than its internal
+    buffer is kept in memory. The level defaults to `WAGTAILSURVEYS_EXPORT_COMPRESSION_LEVEL` setting.
+    """
+
+    if level is None:
+        level = getattr(settings, 'WAGTAILSURVEYS_EXPORT_COMPRESSION_LEVEL', 6)
+
+    # wbits 16 + 15 selects gzip header and trailer
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    for chunk in chunks:
+        data = compressor.compress(force_bytes(chunk))
+        if data:
+            yield data
+
+    yield compressor.flush()
+
+
+class BaseExporter(object):
+    """
+    Base class of exporters. Subclasses set the format details and implement `iter_content`.
+    """
+
+    name = None
+    label = None
+    content_type = None
+    extension = None
+
+    # Templates list exporter classes
+    do_not_call_in_templates = True
+
+    def __init__(self, survey_page, archived=None):
+        self.survey_page = survey_page
+        # `ArchivedSubmissions` exported before submissions of the queryset
+        self.archived = archived
+        self.data_fields, self.renames = survey_page.get_versioned_data_fields()
+        self.field_types = survey_page.get_data_field_types()
+
+    @classmethod
+    def is_available(cls):
+        return True
+
+    def get_filename(self, compress=False):
+        if compress:
+            return 'export.%s.gz' % self.extension
+        return 'export.%s' % self.extension
+
+    def iter_row_chunks(self, submissions):
+        """
+        Yields lists of rows, each one a list of typed values ordered like `data_fields`.
+        """
+
+        names = [name for name, label in self.data_fields]
+        field_types = [self.field_types.get(name) for name in names]
+
+        for chunk in iter_submission_chunks(submissions, archived=self.archived):
+            yield [
+                [convert_value(field_type, value) for field_type, value in zip(field_types, row)]
+                for row in iter_rows(chunk, names, self.renames)
+            ]
+
+    def iter_rows(self, submissions):
+        for rows in self.iter_row_chunks(submissions):
+            for row in rows:
+                yield row
+
+    def iter_content(self, submissions):
+        raise NotImplementedError
+
+    def get_response(self, submissions, compress=False):
+        """
+        Returns a streaming response with the exported file, compressed with gzip when `compress` is True.
+        """
+
+        if compress:
+            response = StreamingHttpResponse(iter_gzip(self.iter_content(submissions)), content_type='application/gzip')
+        else:
+            response = StreamingHttpResponse(self.iter_content(submissions), content_type=self.content_type)
+        response['Content-Disposition'] = 'attachment;filename=%s' % self.get_filename(compress)
+        return response
+
+
+class CSVExporter(BaseExporter):
+    name = 'csv'
+    label = _('CSV')
+    content_type = 'text/csv; charset=utf-8'
+    extension = 'csv'
+
+    def iter_content(self, submissions):
+        return iter_csv(self.data_fields, submissions, self.renames, archived=self.archived)
+
+
+class NDJSONExporter(BaseExporter):
+    """
+    Streams a JSON object keyed by field names per line. Answers to multiple checkboxes stay lists.
+    """
+
+    name = 'ndjson'
+    label = _('NDJSON')
+    content_type = 'application/x-ndjson; charset=utf-8'
+    extension = 'ndjson'
+
+    def iter_content(self, submissions):
+        names = [name for name, label in self.data_fields]
+        for row in self.iter_rows(submissions):
+            yield codec.dumps(OrderedDict(zip(names, row))) + '\n'
+
+
+class FileExporter(BaseExporter):
+    """
+    Base class of exporters of formats which can't be read until the whole file is written.
+    The file is written to a temporary file, which is streamed to the client afterwards.
+    """
+
+    block_size = 64 * 1024
+
+    def write(self, output, submissions):
+        raise NotImplementedError
+
+    def iter_content(self, submissions):
+        with tempfile.TemporaryFile() as output:
+            self.write(output, submissions)
+
+            output.seek(0)
+            while True:
+                data = output.read(self.block_size)
+                if not data:
+                    break
+                yield data
+
+
+class XLSXExporter(FileExporter):
+    """
+    Writes an Excel workbook. Submissions which don't fit into a worksheet are continued
+    on the next one, each starting with the header row.
+    """
+
+    name = 'xlsx'
+    label = _('Excel')
+    content_type = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    extension = 'xlsx'
+
+    # The largest number of rows of an Excel worksheet, including the header
+    max_rows = 1048576
+
+    @classmethod
+    def is_available(cls):
+        return xlsxwriter is not None
+
+    def add_worksheet(self, workbook):
+        worksheet = workbook.add_worksheet()
+        for col, (name, label) in enumerate(self.data_fields):
+            worksheet.write_string(0, col, force_text(label))
+        return worksheet
+
+    def write(self, output, submissions):
+        # In constant memory mode each row is flushed to disk once the next one is started
+        workbook = xlsxwriter.Workbook(output, {'constant_memory': True})
+        worksheet = self.add_worksheet(workbook)
+        formats = {
+            'date': workbook.add_format({'num_format': 'yyyy-mm-dd'}),
+            'datetime': workbook.add_format({'num_format': 'yyyy-mm-dd hh:mm:ss'}),
+        }
+
+        row_index = 0
+        for row in self.iter_rows(submissions):
+            row_index += 1
+            if row_index == self.max_rows:
+                # XlsxWriter ignores rows past the limit
+                worksheet = self.add_worksheet(workbook)
+                row_index = 1
+
+            for col, value in enumerate(row):
+                self.write_cell(worksheet, formats, row_index, col, value)
+
+        workbook.close()
+
+    def write_cell(self, worksheet, formats, row, col, value):
+        if value is None:
+            return
+
+        if isinstance(value, bool):
+            worksheet.write_boolean(row, col, value)
+        elif isinstance(value, Decimal):
+            worksheet.write_number(row, col, float(value))
+        elif isinstance(value, datetime.datetime):
+            # Excel doesn't support time zones
+            if timezone.is_aware(value):
+                value = timezone.make_naive(value)
+            worksheet.write_datetime(row, col, value, formats['datetime'])
+        elif isinstance(value, datetime.date):
+            worksheet.write_datetime(row, col, value, formats['date'])
+        elif isinstance(value, list):
+            worksheet.write_string(row, col, ', '.join(value))
+        else:
+            worksheet.write_string(row, col, value)
+
+
+class ParquetExporter(FileExporter):
+    """
+    Writes a Parquet file with columns typed by `field_type` of form fields, a row group per chunk of submissions.
+
+    Numbers are stored as decimals, so no digits are lost. Form fields don't limit the number
+    of decimal places, so the scale and precision of each number column are found before writing:
+    submissions are read once and their rows are spooled to a temporary file, which is written
+    to the Parquet file afterwards. Submissions saved in the meantime aren't exported.
+    """
+
+    name = 'parquet'
+    label = _('Parquet')
+    content_type = 'application/octet-stream'
+    extension = 'parquet'
+
+    # The largest precision of 128-bit decimals
+    max_precision = 38
+
+    @classmethod
+    def is_available(cls):
+        return pyarrow is not None
+
+    def get_column_type(self, field_type):
+        if field_type == 'date':
+            return pyarrow.date32()
+        if field_type == 'datetime':
+            return pyarrow.timestamp('us', tz='UTC' if settings.USE_TZ else None)
+        if field_type == 'checkbox':
+            return pyarrow.bool_()
+        if field_type == 'checkboxes':
+            return pyarrow.list_(pyarrow.string())
+        return pyarrow.string()
+
+    def spool_row_chunks(self, submissions, spool):
+        """
+        Pickles chunks of rows of submissions into a spool file and returns decimal types of number columns
+        by their index, wide enough for all values of the column.
+
+        Columns which hold infinity or NaN, or need more than `max_precision` digits,
+        are typed as strings instead.
+        """
+
+        indexes = [
+            index for index, (name, label) in enumerate(self.data_fields) if self.field_types.get(name) == 'number'
+        ]
+        scales = dict.fromkeys(indexes, 0)
+        integer_digits = dict.fromkeys(indexes, 1)
+        string_indexes = set()
+
+        for rows in self.iter_row_chunks(submissions):
+            pickle.dump(rows, spool, pickle.HIGHEST_PROTOCOL)
+
+            for row in rows:
+                for index in indexes:
+                    value = row[index]
+                    if value is None:
+                        continue
+                    if not value.is_finite():
+                        string_indexes.add(index)
+                        continue
+
+                    sign, digits, exponent = value.as_tuple()
+                    scales[index] = max(scales[index], -exponent)
+                    integer_digits[index] = max(integer_digits[index], len(digits) + exponent)
+
+        number_types = {}
+        for index in indexes:
+            precision = integer_digits[index] + scales[index]
+            if index in string_indexes or precision > self.max_precision:
+                number_types[index] = pyarrow.string()
+            else:
+                number_types[index] = pyarrow.decimal128(precision, scales[index])
+
+        return number_types
+
+    def iter_spooled_row_chunks(self, spool):
+        spool.seek(0)
+        while True:
+            try:
+                yield pickle.load(spool)
+            except EOFError:
+                return
+
+    def get_schema(self, number_types):
+        return pyarrow.schema([
+            pyarrow.field(name, number_types.get(index) or self.get_column_type(self.field_types.get(name)))
+            for index, (name, label) in enumerate(self.data_fields)
+        ])
+
+    def write(self, output, submissions):
+        with tempfile.TemporaryFile() as spool:
+            schema = self.get_schema(self.spool_row_chunks(submissions, spool))
+            self.write_row_chunks(output, schema, self.iter_spooled_row_chunks(spool))
+
+    def write_row_chunks(self, output, schema, row_chunks):
+        writer = pyarrow.parquet.ParquetWriter(output, schema)
+
+        try:
+            for rows in row_chunks:
+                columns = [list(column) for column in zip(*rows)]
+                arrays = [
+                    pyarrow.array(
+                        [
+                            text_type(value) if isinstance(value, Decimal) and field.type == pyarrow.string()
+                            else value
+                            for value in column
+                        ],
+                        type=field.type
+                    )
+                    for column, field in zip(columns, schema)
+                ]
+                writer.write_table(pyarrow.Table.from_arrays(arrays, schema=schema))
+        finally:
+            writer.close()
+
+
+DEFAULT_EXPORTERS = [
+    'wagtailsurveys.exporters.CSVExporter',
+    'wagtailsurveys.exporters.NDJSONExporter',
+    'wagtailsurveys.exporters.XLSXExporter',
+    'wagtailsurveys.exporters.ParquetExporter',
+]
+
+
+def get_exporters():
+    """
+    Returns an ordered dict of available exporter classes by name,
+    configured by `WAGTAILSURVEYS_EXPORTERS` setting.
+    """
+
+    exporters = OrderedDict()
+    for path in getattr(settings, 'WAGTAILSURVEYS_EXPORTERS', DEFAULT_EXPORTERS):
+        exporter_class = import_string(path)
+        if exporter_class.is_available():
+            exporters[exporter_class.name] = exporter_class
+
+    return exporters
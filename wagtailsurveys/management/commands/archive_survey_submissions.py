@@ -0,0 +1,60 @@
+from __future__ import absolute_import, unicode_literals
+
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+try:
+    from wagtail.core.models import Page
+except ImportError:  # fallback for Wagtail <2.0
+    from wagtail.wagtailcore.models import Page
+
+from wagtailsurveys.archive import archive_submissions
+from wagtailsurveys.models import get_survey_types
+
+
+class Command(BaseCommand):
+    help = "Moves survey submissions older than a number of days into archive files."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'page_ids', metavar='page_id', nargs='*', type=int,
+            help="IDs of survey pages to archive submissions of. All survey pages are archived by default."
+        )
+        parser.add_argument(
+            '--older-than', type=int, metavar='DAYS',
+            help="Archive submissions created more than this number of days ago."
+        )
+        parser.add_argument('--chunk-size', type=int, help="Number of submissions in each archive file.")
+        parser.add_argument(
+            '--dry-run', action='store_true', default=False,
+            help="Only print numbers of submissions which would be archived."
+        )
+
+    def handle(self, *args, **options):
+        if options['older_than'] is None:
+            raise CommandError("--older-than is required")
+        if options['older_than'] < 0:
+            raise CommandError("--older-than must not be negative")
+
+        cutoff = timezone.now() - datetime.timedelta(days=options['older_than'])
+
+        survey_pages = Page.objects.filter(content_type__in=get_survey_types())
+        if options['page_ids']:
+            survey_pages = survey_pages.filter(id__in=options['page_ids'])
+
+        for survey_page in survey_pages.specific():
+            submissions = survey_page.get_submission_class().objects.filter(
+                page=survey_page, created_at__lt=cutoff
+            )
+
+            if options['dry_run']:
+                count = submissions.count()
+            else:
+                count = archive_submissions(survey_page, cutoff, chunk_size=options['chunk_size'])
+
+            if options['verbosity'] >= 1:
+                self.stdout.write("%s %d submissions of '%s'" % (
+                    "Would archive" if options['dry_run'] else "Archived", count, survey_page.title
+                ))
@@ -0,0 +1,77 @@
+from __future__ import absolute_import, unicode_literals
+
+import datetime
+import timeit
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+try:
+    from wagtail.core.models import Page
+except ImportError:  # fallback for Wagtail <2.0
+    from wagtail.wagtailcore.models import Page
+
+from wagtailsurveys.codec import CODECS, JSONCodec
+
+
+def get_sample_data(index):
+    return {
+        'your-name': 'Respondent %d' % index,
+        'your-biography': 'Lorem ipsum dolor sit amet, consectetur adipiscing elit. ' * 3,
+        'your-choices': ['foo', 'bar', 'baz'][:index % 3 + 1],
+        'your-age': Decimal(index % 90),
+        'your-birthday': datetime.date(1990, 1, 1) + datetime.timedelta(days=index),
+        'your-appointment': timezone.now(),
+        'your-consent': bool(index % 2),
+    }
+
+
+class Command(BaseCommand):
+    help = "Compares speed of installed JSON codecs on encoding and decoding of submission data."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--page', type=int,
+            help="ID of a survey page whose stored submissions are used as data. Generated data is used by default."
+        )
+        parser.add_argument('--count', type=int, default=10000, help="Number of submissions (default: 10000).")
+        parser.add_argument('--repeat', type=int, default=3, help="Number of timing runs, the best one is shown.")
+
+    def get_data(self, options):
+        if options['page'] is None:
+            return [get_sample_data(index) for index in range(options['count'])]
+
+        try:
+            survey_page = Page.objects.get(id=options['page']).specific
+        except Page.DoesNotExist:
+            raise CommandError("Page %d does not exist" % options['page'])
+
+        submissions = survey_page.get_submission_class().objects.filter(page=survey_page)[:options['count']]
+        return [submission.get_form_data() for submission in submissions]
+
+    def handle(self, *args, **options):
+        data = self.get_data(options)
+        expected = [JSONCodec().loads(JSONCodec().dumps(item)) for item in data]
+
+        self.stdout.write("%d submissions, best of %d runs" % (len(data), options['repeat']))
+        self.stdout.write("%-12s %10s %10s" % ("codec", "dumps, s", "loads, s"))
+
+        for codec_class in CODECS:
+            if not codec_class.is_available():
+                self.stdout.write("%-12s %21s" % (codec_class.name, "not installed"))
+                continue
+
+            codec = codec_class()
+            encoded = [codec.dumps(item) for item in data]
+            if [codec.loads(item) for item in encoded] != expected:
+                raise CommandError("Codec '%s' doesn't round-trip data like 'json' does" % codec.name)
+
+            dumps_time = min(timeit.repeat(
+                lambda: [codec.dumps(item) for item in data], number=1, repeat=options['repeat']
+            ))
+            loads_time = min(timeit.repeat(
+                lambda: [codec.loads(item) for item in encoded], number=1, repeat=options['repeat']
+            ))
+
+            self.stdout.write("%-12s %10.3f %10.3f" % (codec.name, dumps_time, loads_time))
@@ -0,0 +1,66 @@
+from __future__ import absolute_import, unicode_literals
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+try:
+    from wagtail.core.models import Page
+except ImportError:  # fallback for Wagtail <2.0
+    from wagtail.wagtailcore.models import Page
+
+from wagtailsurveys.export import run_export_job
+from wagtailsurveys.models import ExportJob, get_survey_types
+
+
+def date(value):
+    parsed = parse_date(value)
+    if parsed is None:
+        raise ValueError(value)
+    return parsed
+
+
+class Command(BaseCommand):
+    help = (
+        "Exports survey submissions to CSV files in the default storage. "
+        "Without page IDs, runs export jobs queued from the admin and resumes interrupted ones."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'page_ids', metavar='page_id', nargs='*', type=int,
+            help="IDs of survey pages to export submissions of."
+        )
+        parser.add_argument('--date-from', type=date, help="Export submissions created on this date or later.")
+        parser.add_argument('--date-to', type=date, help="Export submissions created on this date or earlier.")
+        parser.add_argument('--chunk-size', type=int, help="Number of submissions in each part of the file.")
+
+    def handle(self, *args, **options):
+        if options['page_ids']:
+            survey_pages = Page.objects.filter(content_type__in=get_survey_types(), id__in=options['page_ids'])
+            missing_ids = set(options['page_ids']) - set(survey_pages.values_list('id', flat=True))
+            if missing_ids:
+                raise CommandError("Survey pages not found: %s" % ', '.join(str(pk) for pk in sorted(missing_ids)))
+
+            jobs = [
+                ExportJob.objects.create(
+                    page=survey_page, date_from=options['date_from'], date_to=options['date_to']
+                )
+                for survey_page in survey_pages
+            ]
+        else:
+            jobs = list(ExportJob.objects.pending())
+
+        for job in jobs:
+            # Skip jobs taken by another process since they were fetched
+            if not ExportJob.objects.claim(job):
+                continue
+
+            run_export_job(job, chunk_size=options['chunk_size'])
+
+            if options['verbosity'] >= 1:
+                if job.is_complete:
+                    self.stdout.write("Exported %d submissions of page %d: %s" % (
+                        job.exported_count, job.page_id, ', '.join(job.get_part_names())
+                    ))
+                else:
+                    self.stderr.write("Export job %d of page %d failed" % (job.pk, job.page_id))
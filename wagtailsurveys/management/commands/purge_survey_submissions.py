@@ -0,0 +1,78 @@
+from __future__ import absolute_import, unicode_literals
+
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+try:
+    from wagtail.core.models import Page
+except ImportError:  # fallback for Wagtail <2.0
+    from wagtail.wagtailcore.models import Page
+
+from wagtailsurveys.archive import ArchivedSubmissions
+from wagtailsurveys.export import filter_submissions
+from wagtailsurveys.management.commands.export_survey_submissions import date
+from wagtailsurveys.models import get_survey_types
+
+
+class Command(BaseCommand):
+    help = (
+        "Deletes survey submissions, archived ones included, older than a number of days or created "
+        "in a date range, in batches, removing their answers from results and statistics."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'page_ids', metavar='page_id', nargs='*', type=int,
+            help="IDs of survey pages to purge submissions of. All survey pages are purged by default."
+        )
+        parser.add_argument(
+            '--older-than', type=int, metavar='DAYS',
+            help="Delete submissions created more than this number of days ago."
+        )
+        parser.add_argument('--date-from', type=date, help="Delete submissions created on this date or later.")
+        parser.add_argument('--date-to', type=date, help="Delete submissions created on this date or earlier.")
+        parser.add_argument('--batch-size', type=int, help="Number of submissions deleted in each transaction.")
+        parser.add_argument(
+            '--dry-run', action='store_true', default=False,
+            help="Only print numbers of submissions which would be deleted."
+        )
+
+    def handle(self, *args, **options):
+        if options['older_than'] is None and not (options['date_from'] or options['date_to']):
+            raise CommandError("--older-than or --date-from/--date-to is required")
+        if options['older_than'] is not None and options['older_than'] < 0:
+            raise CommandError("--older-than must not be negative")
+
+        cutoff = None
+        if options['older_than'] is not None:
+            cutoff = timezone.now() - datetime.timedelta(days=options['older_than'])
+
+        survey_pages = Page.objects.filter(content_type__in=get_survey_types())
+        if options['page_ids']:
+            survey_pages = survey_pages.filter(id__in=options['page_ids'])
+
+        for survey_page in survey_pages.specific():
+            submissions = filter_submissions(
+                survey_page.get_submission_class().objects.filter(page=survey_page),
+                date_from=options['date_from'],
+                date_to=options['date_to'],
+            )
+            if cutoff is not None:
+                submissions = submissions.filter(created_at__lt=cutoff)
+            archived = ArchivedSubmissions(
+                survey_page, date_from=options['date_from'], date_to=options['date_to'], before=cutoff
+            )
+
+            if options['dry_run']:
+                count = submissions.count() + archived.count()
+            else:
+                count = survey_page.delete_submissions(
+                    submissions, batch_size=options['batch_size'], archived=archived
+                )
+
+            if options['verbosity'] >= 1:
+                self.stdout.write("%s %d submissions of '%s'" % (
+                    "Would delete" if options['dry_run'] else "Deleted", count, survey_page.title
+                ))
@@ -0,0 +1,45 @@
+from __future__ import absolute_import, unicode_literals
+
+from collections import Counter
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+
+try:
+    from wagtail.core.models import Page
+except ImportError:  # fallback for Wagtail <2.0
+    from wagtail.wagtailcore.models import Page
+
+from wagtailsurveys.archive import ArchivedSubmissions
+from wagtailsurveys.cache import get_results_cache_key
+from wagtailsurveys.export import iter_submissions
+from wagtailsurveys.models import SurveyResult, get_survey_types
+
+
+class Command(BaseCommand):
+    help = "Recounts survey results from stored and archived submissions."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'page_ids', metavar='page_id', nargs='*', type=int,
+            help="IDs of survey pages to rebuild results for. All survey pages are rebuilt by default."
+        )
+
+    def handle(self, *args, **options):
+        survey_pages = Page.objects.filter(content_type__in=get_survey_types())
+        if options['page_ids']:
+            survey_pages = survey_pages.filter(id__in=options['page_ids'])
+
+        for survey_page in survey_pages.specific():
+            fields = survey_page.get_results_fields()
+            submissions = survey_page.get_submission_class().objects.filter(page=survey_page)
+
+            counts = Counter()
+            for submission in iter_submissions(submissions, archived=ArchivedSubmissions(survey_page)):
+                counts.update(survey_page.get_submission_answers(submission.get_data(), fields))
+
+            SurveyResult.objects.replace_results(survey_page, counts)
+            cache.delete(get_results_cache_key(survey_page.id))
+
+            if options['verbosity'] >= 1:
+                self.stdout.write("Rebuilt results of '%s'" % survey_page.title)
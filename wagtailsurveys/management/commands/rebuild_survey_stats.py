@@ -0,0 +1,36 @@
+from __future__ import absolute_import, unicode_literals
+
+from django.core.management.base import BaseCommand
+
+try:
+    from wagtail.core.models import Page
+except ImportError:  # fallback for Wagtail <2.0
+    from wagtail.wagtailcore.models import Page
+
+from wagtailsurveys.models import SurveyStats, get_survey_types
+
+
+class Command(BaseCommand):
+    help = "Recomputes submission statistics of survey pages which track them."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'page_ids', metavar='page_id', nargs='*', type=int,
+            help="IDs of survey pages to rebuild statistics for. All survey pages are rebuilt by default."
+        )
+
+    def handle(self, *args, **options):
+        survey_pages = Page.objects.filter(content_type__in=get_survey_types())
+        if options['page_ids']:
+            survey_pages = survey_pages.filter(id__in=options['page_ids'])
+
+        for survey_page in survey_pages.specific():
+            if not survey_page.track_submission_stats:
+                continue
+
+            stats = SurveyStats.objects.rebuild(survey_page)
+
+            if options['verbosity'] >= 1:
+                self.stdout.write("Rebuilt statistics of '%s': %d submissions" % (
+                    survey_page.title, stats.submission_count
+                ))
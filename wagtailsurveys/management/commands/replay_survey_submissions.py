@@ -0,0 +1,18 @@
+from __future__ import absolute_import, unicode_literals
+
+from django.core.management.base import BaseCommand
+
+from wagtailsurveys.writer import submission_writer
+
+
+class Command(BaseCommand):
+    help = (
+        "Saves survey submissions left in spool files of the write-behind writer "
+        "by processes which stopped before saving them."
+    )
+
+    def handle(self, *args, **options):
+        replayed = submission_writer.replay()
+
+        if options['verbosity'] >= 1:
+            self.stdout.write("Replayed %d spooled submissions" % replayed)
@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-17 14:22
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wagtailcore', '0002_initial_data'),
+        ('wagtailsurveys', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SurveyResult',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('field_name', models.CharField(max_length=255, verbose_name='field name')),
+                ('answer', models.CharField(max_length=255, verbose_name='answer')),
+                ('count', models.IntegerField(default=0, verbose_name='count')),
+                ('page', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='wagtailcore.Page')),
+            ],
+            options={
+                'verbose_name': 'survey result',
+            },
+        ),
+        migrations.AlterUniqueTogether(
+            name='surveyresult',
+            unique_together=set([('page', 'field_name', 'answer')]),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-17 14:23
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wagtailsurveys', '0002_surveyresult'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='surveyresult',
+            name='shard',
+            field=models.PositiveSmallIntegerField(default=0, verbose_name='shard'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='surveyresult',
+            unique_together=set([('page', 'field_name', 'answer', 'shard')]),
+        ),
+    ]
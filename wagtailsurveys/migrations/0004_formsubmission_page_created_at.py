@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-17 14:25
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wagtailsurveys', '0003_surveyresult_shard'),
+    ]
+
+    operations = [
+        migrations.AlterIndexTogether(
+            name='formsubmission',
+            index_together=set([('page', 'created_at')]),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-17 14:27
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wagtailsurveys', '0004_formsubmission_page_created_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SubmissionAnswer',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('submission_id', models.PositiveIntegerField(verbose_name='submission id')),
+                ('field_name', models.CharField(max_length=255, verbose_name='field name')),
+                ('value', models.CharField(max_length=255, verbose_name='value')),
+                ('page', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='wagtailcore.Page')),
+            ],
+            options={
+                'verbose_name': 'submission answer',
+            },
+        ),
+        migrations.AlterIndexTogether(
+            name='submissionanswer',
+            index_together=set([('page', 'field_name', 'value'), ('page', 'submission_id')]),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-17 14:40
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wagtailcore', '0002_initial_data'),
+        ('wagtailsurveys', '0005_submissionanswer'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SurveyStats',
+            fields=[
+                ('page', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='+', serialize=False, to='wagtailcore.Page')),
+                ('submission_count', models.IntegerField(default=0, verbose_name='submission count')),
+                ('last_submitted_at', models.DateTimeField(null=True, verbose_name='last submitted at')),
+            ],
+            options={
+                'verbose_name': 'survey stats',
+                'verbose_name_plural': 'survey stats',
+            },
+        ),
+    ]
@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-17 14:53
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wagtailcore', '0002_initial_data'),
+        ('wagtailsurveys', '0007_exportjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SubmissionFieldKey',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.PositiveIntegerField(verbose_name='key')),
+                ('field_id', models.PositiveIntegerField(blank=True, null=True, verbose_name='form field id')),
+                ('name', models.CharField(max_length=255, verbose_name='name')),
+                ('page', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='wagtailcore.Page')),
+            ],
+            options={
+                'verbose_name': 'submission field key',
+            },
+        ),
+        migrations.AlterUniqueTogether(
+            name='submissionfieldkey',
+            unique_together=set([('page', 'key')]),
+        ),
+        migrations.AlterIndexTogether(
+            name='submissionfieldkey',
+            index_together=set([('page', 'field_id')]),
+        ),
+    ]
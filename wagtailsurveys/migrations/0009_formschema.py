@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-17 14:56
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wagtailcore', '0002_initial_data'),
+        ('wagtailsurveys', '0008_submissionfieldkey'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FormSchema',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('checksum', models.CharField(max_length=40)),
+                ('fields', models.TextField()),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='created at')),
+                ('page', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='wagtailcore.Page')),
+            ],
+            options={
+                'verbose_name': 'form schema',
+            },
+        ),
+        migrations.AddField(
+            model_name='formsubmission',
+            name='schema',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='wagtailsurveys.FormSchema'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='formschema',
+            unique_together=set([('page', 'checksum')]),
+        ),
+    ]
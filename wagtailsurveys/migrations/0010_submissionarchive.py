@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-17 15:10
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wagtailcore', '0002_initial_data'),
+        ('wagtailsurveys', '0009_formschema'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SubmissionArchive',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file', models.CharField(max_length=255, verbose_name='file')),
+                ('size', models.PositiveIntegerField(verbose_name='size')),
+                ('checksum', models.CharField(max_length=40, verbose_name='checksum')),
+                ('submission_count', models.PositiveIntegerField(verbose_name='submissions')),
+                ('first_created_at', models.DateTimeField()),
+                ('first_submission_id', models.PositiveIntegerField()),
+                ('last_created_at', models.DateTimeField()),
+                ('last_submission_id', models.PositiveIntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='created at')),
+                ('page', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='wagtailcore.Page')),
+            ],
+            options={
+                'verbose_name': 'submission archive',
+                'ordering': ['first_created_at', 'first_submission_id'],
+            },
+        ),
+        migrations.AlterIndexTogether(
+            name='submissionarchive',
+            index_together=set([('page', 'first_created_at')]),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-17 15:28
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import wagtailsurveys.storage
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wagtailsurveys', '0011_pendingsubmission'),
+    ]
+
+    operations = [
+        # Existing jobs keep their files under the old names
+        migrations.AddField(
+            model_name='exportjob',
+            name='file_token',
+            field=models.CharField(blank=True, default='', editable=False, max_length=32),
+        ),
+        migrations.AlterField(
+            model_name='exportjob',
+            name='file_token',
+            field=models.CharField(
+                blank=True, default=wagtailsurveys.storage.make_file_token, editable=False, max_length=32
+            ),
+        ),
+    ]
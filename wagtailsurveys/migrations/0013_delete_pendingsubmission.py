@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-17 15:48
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wagtailsurveys', '0012_exportjob_file_token'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='pendingsubmission',
+            name='page',
+        ),
+        migrations.DeleteModel(
+            name='PendingSubmission',
+        ),
+    ]
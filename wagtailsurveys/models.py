@@ -1,13 +1,25 @@
 from __future__ import absolute_import, unicode_literals
 
+import datetime
+import gzip
+import hashlib
 import json
+import random
 import re
+import threading
+import time
+from collections import Counter, OrderedDict
 
 from django.contrib.contenttypes.models import ContentType
+from django.conf import settings
 from django.core.serializers.json import DjangoJSONEncoder
-from django.db import models
+from django.db import IntegrityError, connection, models, transaction
+from django.core.cache import cache
+from django.db.models import Case, Count, F, Max, Q, Sum, Value, When
 from django.shortcuts import render
+from django.utils import six, timezone
 from django.utils.six import text_type
+from django.utils.dateparse import parse_datetime
 from django.utils.text import slugify
 from django.utils.translation import ugettext_lazy as _
 from django.utils.encoding import python_2_unicode_compatible
@@ -20,7 +32,14 @@ except ImportError:  # fallback for Wagtail <2.0
     from wagtail.wagtailadmin.edit_handlers import FieldPanel
     from wagtail.wagtailcore.models import Page, Orderable, UserPagePermissionsProxy, get_page_models
 
+from wagtailsurveys import codec
+from wagtailsurveys.storage import delete_file_on_commit, get_archive_storage, get_export_storage, make_file_token
+from wagtailsurveys.cache import (
+    field_keys_cache, form_class_cache, form_schema_cache, get_form_fields_cache, get_form_fields_cache_key,
+    get_results_cache_key
+)
 from wagtailsurveys.forms import FormBuilder
+from wagtailsurveys.writer import submission_writer
 
 
 @python_2_unicode_compatible
@@ -34,33 +53,852 @@ class AbstractFormSubmission(models.Model):
 
     form_data = models.TextField()
     page = models.ForeignKey(Page, on_delete=models.CASCADE, related_name='+')
+    # Form fields at submit time, None for submissions saved before schemas were introduced
+    schema = models.ForeignKey(
+        'wagtailsurveys.FormSchema', null=True, blank=True, on_delete=models.SET_NULL, related_name='+'
+    )
+
+    # Set when the submission is built, so submissions saved later keep their submit time
+    created_at = models.DateTimeField(verbose_name=_('submit time'), default=timezone.now, editable=False)
+
+    # Data fields added by an overridden `get_data`, mapped to lookups of their values,
+    # for example {'username': 'user__username'}. Declaring them lets the submissions list
+    # and exports read submissions with `values_list` instead of loading model instances.
+    extra_data_fields = None
+
+    # Whether stored data is keyed by form fields rather than by their names, so answers
+    # stored before a field was renamed are decoded under its new name
+    resolves_renames = False
+
+    def set_form_data(self, data):
+        """
+        Stores cleaned data of a submitted form in `form_data`.
+        """
+        self.form_data = codec.dumps(data)
+
+    @classmethod
+    def decode_form_data(cls, form_data, page_id):
+        """
+        Decodes stored `form_data` of a submission of a survey page into a dict.
+
+        Override it together with `set_form_data` to store data in another form.
+        """
+        return codec.loads(form_data)
+
+    def get_decoded_form_data(self):
+        """
+        Returns decoded `form_data`, kept on the instance until `form_data` is assigned again.
+
+        The dict is shared between calls, so it must not be modified.
+        """
+
+        cached = self.__dict__.get('_decoded_form_data')
+        if cached is not None and cached[0] is self.form_data:
+            return cached[1]
+
+        data = self.decode_form_data(self.form_data, self.page_id)
+        self._decoded_form_data = (self.form_data, data)
+        return data
+
+    def get_form_data(self):
+        """
+        Returns dict with decoded `form_data`.
+        """
+        return dict(self.get_decoded_form_data())
+
+    def get_data(self):
+        """
+        Returns dict with form data.
+
+        You can override this method to add additional data (like a reference to a user).
+        """
+        form_data = self.get_form_data()
+        form_data.update({
+            'created_at': self.created_at,
+        })
+
+        return form_data
+
+    @classmethod
+    def can_read_values(cls):
+        """
+        Returns True if data of submissions can be read with `values_list` by `SubmissionValues`,
+        which is the case unless reading data is customised without declaring `extra_data_fields`.
+        """
+
+        if cls.extra_data_fields is not None:
+            return True
+
+        return all(
+            six.get_unbound_function(getattr(cls, name)) is six.get_unbound_function(
+                getattr(AbstractFormSubmission, name)
+            )
+            for name in ('get_data', 'get_form_data', 'get_decoded_form_data', 'get_row')
+        )
+
+    def get_row(self, names):
+        """
+        Returns a tuple of values of data fields `names`, with None for missing ones.
+
+        Unless `get_data` is overridden, values are taken from decoded data without building a dict.
+        """
+
+        if six.get_unbound_function(type(self).get_data) is not six.get_unbound_function(
+            AbstractFormSubmission.get_data
+        ):
+            data = self.get_data()
+            return tuple(data.get(name) for name in names)
+
+        data = self.get_decoded_form_data()
+        return tuple(self.created_at if name == 'created_at' else data.get(name) for name in names)
+
+    def __str__(self):
+        return self.form_data
+
+    class Meta:
+        abstract = True
+        verbose_name = _('form submission')
+        ordering = ['created_at']
+        index_together = [('page', 'created_at')]
+
+
+class FormSubmission(AbstractFormSubmission):
+    """Data for a survey submission."""
+
+
+class SubmissionValues(object):
+    """
+    Values of a submission read with `values_list`, used instead of a model instance
+    by the submissions list and exports. See `AbstractFormSubmission.can_read_values`.
+
+    Its `get_data`, `get_form_data` and `get_row` return the same data as ones of the model.
+    """
+
+    __slots__ = ['model', 'id', 'created_at', 'page_id', 'schema_id', 'form_data', 'extra']
+
+    lookups = ['id', 'created_at', 'page_id', 'schema_id', 'form_data']
+
+    def __init__(self, model, values, extra_names):
+        self.model = model
+        self.id, self.created_at, self.page_id, self.schema_id, self.form_data = values[:5]
+        self.extra = dict(zip(extra_names, values[5:]))
+
+    @property
+    def pk(self):
+        return self.id
+
+    @property
+    def resolves_renames(self):
+        return self.model.resolves_renames
+
+    def get_form_data(self):
+        return self.model.decode_form_data(self.form_data, self.page_id)
+
+    def get_data(self):
+        data = self.get_form_data()
+        data['created_at'] = self.created_at
+        data.update(self.extra)
+        return data
+
+    def get_row(self, names):
+        data = self.get_form_data()
+        extra = self.extra
+        return tuple(
+            extra[name] if name in extra else self.created_at if name == 'created_at' else data.get(name)
+            for name in names
+        )
+
+
+def load_submissions(submissions):
+    """
+    Returns a list of submissions of a queryset, as `SubmissionValues` when the submission model
+    supports it, as model instances otherwise. Both have `id`, `created_at`, `schema_id`,
+    `get_data` and `get_row`.
+    """
+
+    model = submissions.model
+    if not model.can_read_values():
+        return list(submissions)
+
+    extra_data_fields = model.extra_data_fields or {}
+    extra_names = list(extra_data_fields)
+    lookups = SubmissionValues.lookups + [extra_data_fields[name] for name in extra_names]
+
+    return [SubmissionValues(model, values, extra_names) for values in submissions.values_list(*lookups)]
+
+
+class FormSchemaManager(models.Manager):
+    def get_for_page(self, page):
+        """
+        Returns the schema of the current form fields of a survey page, creating it if needed.
+        """
+
+        fields = json.dumps(page.get_schema_fields(), sort_keys=True)
+        checksum = hashlib.sha1(fields.encode('utf-8')).hexdigest()
+
+        try:
+            return self.get(page=page, checksum=checksum)
+        except self.model.DoesNotExist:
+            pass
+
+        try:
+            with transaction.atomic():
+                return self.create(page=page, checksum=checksum, fields=fields)
+        except IntegrityError:
+            # The schema was created by a concurrent submission
+            return self.get(page=page, checksum=checksum)
+
+
+@python_2_unicode_compatible
+class FormSchema(models.Model):
+    """
+    An immutable snapshot of form fields of a survey page, referenced by submissions saved with it.
+
+    `fields` is a JSON list of dicts with `id`, `name`, `label` and `type` of each form field.
+    Form field ids stay the same when fields are renamed, so data of older submissions
+    can be matched to the current fields.
+    """
+
+    page = models.ForeignKey(Page, on_delete=models.CASCADE, related_name='+')
+    checksum = models.CharField(max_length=40)
+    fields = models.TextField()
+    created_at = models.DateTimeField(verbose_name=_('created at'), auto_now_add=True)
+
+    objects = FormSchemaManager()
+
+    def __str__(self):
+        return '%s: %s' % (self.page_id, self.checksum)
+
+    def get_fields(self):
+        if not hasattr(self, '_fields'):
+            self._fields = json.loads(self.fields)
+        return self._fields
+
+    class Meta:
+        verbose_name = _('form schema')
+        unique_together = [('page', 'checksum')]
+
+
+def get_versioned_data(submission, renames=None):
+    """
+    Returns data of a submission, with fields renamed since it was saved
+    moved to their current names.
+
+    `renames` is a dict returned by `AbstractSurvey.get_versioned_data_fields`.
+    """
+
+    data = submission.get_data()
+
+    # Data of submissions which resolve renames is already read under current names
+    names = renames.get(submission.schema_id) if renames and not submission.resolves_renames else None
+    if not names:
+        return data
+
+    versioned_data = {}
+    for name, value in data.items():
+        name = names.get(name, name)
+        # Answers to removed questions whose names are taken by current questions are dropped
+        if name is not None:
+            versioned_data[name] = value
+
+    return versioned_data
+
+
+class SurveyResultManager(models.Manager):
+    def increment(self, page, field_name, answer, delta=1, shards=1):
+        """
+        Adds `delta` to the counter of an answer, creating the counter if needed.
+
+        Each answer may have up to `shards` counter rows. A random one is updated,
+        so concurrent submissions rarely wait for each other's row locks.
+        """
+
+        shard = random.randrange(shards)
+        counters = self.filter(page=page, field_name=field_name, answer=answer, shard=shard)
+        if counters.update(count=F('count') + delta):
+            return
+
+        try:
+            with transaction.atomic():
+                self.create(page=page, field_name=field_name, answer=answer, shard=shard, count=delta)
+        except IntegrityError:
+            # The counter was created by a concurrent submission
+            counters.update(count=F('count') + delta)
+
+    def get_counts(self, page):
+        """
+        Returns a dict mapping field names to dicts of answers and their counts summed across shards.
+        """
+
+        counts = {}
+        for field_name, answer, count in self.filter(page=page).values('field_name', 'answer').annotate(
+            total=Sum('count')
+        ).values_list('field_name', 'answer', 'total'):
+            counts.setdefault(field_name, {})[answer] = count
+
+        return counts
+
+    def replace_results(self, page, counts):
+        """
+        Replaces all counters of a page with `counts`, a mapping of (field_name, answer) to counts.
+        """
+
+        with transaction.atomic():
+            self.filter(page=page).delete()
+            self.bulk_create([
+                self.model(page=page, field_name=field_name, answer=answer, count=count)
+                for (field_name, answer), count in counts.items()
+                if count > 0
+            ])
+
+
+@python_2_unicode_compatible
+class SurveyResult(models.Model):
+    """
+    Number of submissions of a survey which gave a particular answer to a question.
+
+    Counters are updated on submission, so results can be shown
+    without decoding every submission of the page.
+    An answer may be counted in several rows (shards), which are summed on read.
+    """
+
+    page = models.ForeignKey(Page, on_delete=models.CASCADE, related_name='+')
+    field_name = models.CharField(verbose_name=_('field name'), max_length=255)
+    answer = models.CharField(verbose_name=_('answer'), max_length=255)
+    shard = models.PositiveSmallIntegerField(verbose_name=_('shard'), default=0)
+    count = models.IntegerField(verbose_name=_('count'), default=0)
+
+    objects = SurveyResultManager()
+
+    def __str__(self):
+        return '%s: %s' % (self.field_name, self.answer)
+
+    class Meta:
+        verbose_name = _('survey result')
+        unique_together = ('page', 'field_name', 'answer', 'shard')
+
+
+def get_answers(value):
+    """
+    Returns a list of answers given in a submitted form field value, as strings up to 255 characters long.
+
+    Each selected option of a 'checkboxes' field is a separate answer.
+    Dates, times and numbers are formatted as in stored submission data.
+    """
+
+    if value is None or value == '':
+        return []
+
+    if not isinstance(value, (list, tuple)):
+        value = [value]
+
+    answers = []
+    for answer in value:
+        if not isinstance(answer, text_type):
+            try:
+                answer = DjangoJSONEncoder().default(answer)
+            except TypeError:
+                answer = text_type(answer)
+        answers.append(answer[:255])
+
+    return answers
+
+
+class SubmissionAnswerManager(models.Manager):
+    def count_answers(self, page, field_name, filters=None):
+        """
+        Returns a dict mapping answers to a question to numbers of submissions which gave them.
+
+        `filters` maps names of other questions to answers which counted submissions must have,
+        for example `{'your-choices': 'foo'}`, so crosstabs can be built from several calls.
+        """
+
+        answers = self.filter(page=page, field_name=field_name)
+        for other_field_name, value in (filters or {}).items():
+            answers = answers.filter(submission_id__in=self.filter(
+                page=page, field_name=other_field_name, value=value
+            ).values('submission_id'))
+
+        return dict(answers.order_by().values_list('value').annotate(count=Count('id')))
+
+
+@python_2_unicode_compatible
+class SubmissionAnswer(models.Model):
+    """
+    An answer given in a survey submission, stored next to submission data
+    when `store_answers` of the survey page is enabled.
+
+    A 'checkboxes' field has a row per selected option.
+    """
+
+    page = models.ForeignKey(Page, on_delete=models.CASCADE, related_name='+')
+    submission_id = models.PositiveIntegerField(verbose_name=_('submission id'))
+    field_name = models.CharField(verbose_name=_('field name'), max_length=255)
+    value = models.CharField(verbose_name=_('value'), max_length=255)
+
+    objects = SubmissionAnswerManager()
+
+    def __str__(self):
+        return '%s: %s' % (self.field_name, self.value)
+
+    class Meta:
+        verbose_name = _('submission answer')
+        index_together = [
+            ('page', 'field_name', 'value'),
+            ('page', 'submission_id'),
+        ]
+
+
+class SurveyStatsManager(models.Manager):
+    def count_submissions(self, page):
+        """
+        Returns a dict with the number of submissions of a survey page and the time of the last one,
+        counted from the submissions table and archives.
+        """
+
+        stats = page.get_submission_class().objects.filter(page=page).aggregate(
+            submission_count=Count('id'),
+            last_submitted_at=Max('created_at'),
+        )
+
+        # Submissions moved into archives still count
+        archived = SubmissionArchive.objects.get_stats(page)
+        if archived['submission_count']:
+            stats['submission_count'] += archived['submission_count']
+            stats['last_submitted_at'] = max(
+                date for date in (stats['last_submitted_at'], archived['last_submitted_at']) if date is not None
+            )
+
+        return stats
+
+    def rebuild(self, page):
+        """
+        Recomputes statistics of a survey page from its submissions.
+        """
+
+        stats = self.count_submissions(page)
+
+        try:
+            with transaction.atomic():
+                return self.update_or_create(page=page, defaults=stats)[0]
+        except IntegrityError:
+            # The row was created by a concurrent submission
+            return self.update_or_create(page=page, defaults=stats)[0]
+
+    def add_submissions(self, page, count, last_submitted_at):
+        """
+        Adds new submissions to statistics of a survey page, creating them if needed.
+        """
+
+        updated = self.filter(page=page).update(
+            submission_count=F('submission_count') + count,
+            # Submissions saved by concurrent requests may be committed in any order
+            last_submitted_at=Case(
+                When(
+                    Q(last_submitted_at__isnull=True) | Q(last_submitted_at__lt=last_submitted_at),
+                    then=Value(last_submitted_at, output_field=models.DateTimeField()),
+                ),
+                default=F('last_submitted_at'),
+                output_field=models.DateTimeField(),
+            ),
+        )
+        if not updated:
+            # Submissions saved before statistics were enabled must be counted as well
+            self.rebuild(page)
+
+    def remove_submission(self, page):
+        """
+        Removes a deleted submission from statistics of a survey page.
+        """
+
+        self.remove_submissions(page, 1)
+
+    def remove_submissions(self, page, count, update_last_submitted_at=True):
+        """
+        Removes a number of deleted submissions from statistics of a survey page.
+        When deleting in batches, the time of the last submission can be updated once
+        after the last batch by passing `update_last_submitted_at=False` and calling
+        `update_last_submitted_at`.
+        """
+
+        values = {'submission_count': F('submission_count') - count}
+        if update_last_submitted_at:
+            values['last_submitted_at'] = self.get_last_submitted_at(page)
+
+        updated = self.filter(page=page).update(**values)
+        if not updated:
+            self.rebuild(page)
+
+    def update_last_submitted_at(self, page):
+        """
+        Updates the time of the last submission in statistics of a survey page.
+        """
+
+        self.filter(page=page).update(last_submitted_at=self.get_last_submitted_at(page))
+
+    def get_last_submitted_at(self, page):
+        """
+        Returns the time of the last submission of a survey page, in the submissions table or archives,
+        without counting them.
+        """
+
+        dates = [
+            page.get_submission_class().objects.filter(page=page).aggregate(date=Max('created_at'))['date'],
+            SubmissionArchive.objects.filter(page=page).aggregate(date=Max('last_created_at'))['date'],
+        ]
+        dates = [date for date in dates if date is not None]
+        return max(dates) if dates else None
+
+
+@python_2_unicode_compatible
+class SurveyStats(models.Model):
+    """
+    Number of submissions of a survey page and time of the last one,
+    kept up to date when `track_submission_stats` of the survey page is enabled.
+    """
+
+    page = models.OneToOneField(Page, on_delete=models.CASCADE, primary_key=True, related_name='+')
+    submission_count = models.IntegerField(verbose_name=_('submission count'), default=0)
+    last_submitted_at = models.DateTimeField(verbose_name=_('last submitted at'), null=True)
+
+    objects = SurveyStatsManager()
+
+    def __str__(self):
+        return '%s: %d' % (self.page_id, self.submission_count)
+
+    class Meta:
+        verbose_name = _('survey stats')
+        verbose_name_plural = _('survey stats')
+
+
+class ExportJobManager(models.Manager):
+    def pending(self):
+        """
+        Returns jobs which are queued, or were interrupted while running.
+        """
+
+        timeout = getattr(settings, 'WAGTAILSURVEYS_EXPORT_JOB_TIMEOUT', 600)
+        stale = timezone.now() - datetime.timedelta(seconds=timeout)
+
+        return self.filter(
+            Q(status=ExportJob.STATUS_QUEUED) | Q(status=ExportJob.STATUS_RUNNING, updated_at__lt=stale)
+        ).order_by('created_at')
+
+    def claim(self, job):
+        """
+        Marks a job as running, unless another process has changed it since it was fetched.
+        """
+
+        now = timezone.now()
+        claimed = self.filter(pk=job.pk, status=job.status, updated_at=job.updated_at).update(
+            status=ExportJob.STATUS_RUNNING, updated_at=now
+        )
+        if claimed:
+            job.status = ExportJob.STATUS_RUNNING
+            job.updated_at = now
+
+        return bool(claimed)
+
+
+@python_2_unicode_compatible
+class ExportJob(models.Model):
+    """
+    Export of survey submissions into a CSV file, written in parts to the storage
+    given by `WAGTAILSURVEYS_EXPORT_STORAGE` setting.
+
+    Progress is saved after each part, so an interrupted job continues
+    from the last exported submission.
+    """
+
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_COMPLETE = 'complete'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = (
+        (STATUS_QUEUED, _('queued')),
+        (STATUS_RUNNING, _('running')),
+        (STATUS_COMPLETE, _('complete')),
+        (STATUS_FAILED, _('failed')),
+    )
+
+    page = models.ForeignKey(Page, on_delete=models.CASCADE, related_name='+')
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.SET_NULL, related_name='+'
+    )
+    status = models.CharField(
+        verbose_name=_('status'), max_length=20, choices=STATUS_CHOICES, default=STATUS_QUEUED, db_index=True
+    )
+    date_from = models.DateField(verbose_name=_('date from'), null=True, blank=True)
+    date_to = models.DateField(verbose_name=_('date to'), null=True, blank=True)
+    created_at = models.DateTimeField(verbose_name=_('created at'), auto_now_add=True)
+    updated_at = models.DateTimeField(verbose_name=_('updated at'), auto_now=True)
+    finished_at = models.DateTimeField(verbose_name=_('finished at'), null=True, blank=True)
+
+    exported_count = models.PositiveIntegerField(verbose_name=_('exported submissions'), default=0)
+    part_count = models.PositiveIntegerField(default=0)
+    # The last exported submission, in (created_at, id) order
+    last_created_at = models.DateTimeField(null=True, blank=True)
+    last_submission_id = models.PositiveIntegerField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    # A random part of names of the files, which are only served by the download view
+    file_token = models.CharField(max_length=32, blank=True, default=make_file_token, editable=False)
+
+    objects = ExportJobManager()
+
+    def __str__(self):
+        return '%s: %s' % (self.page_id, self.status)
+
+    @property
+    def is_complete(self):
+        return self.status == self.STATUS_COMPLETE
+
+    def get_part_name(self, index):
+        if not self.file_token:
+            # Jobs created before file tokens were added
+            return 'wagtailsurveys/exports/%d/part-%05d.csv' % (self.pk, index)
+        return 'wagtailsurveys/exports/%s/part-%05d.csv' % (self.file_token, index)
+
+    def get_part_names(self):
+        return [self.get_part_name(index) for index in range(self.part_count)]
+
+    def get_file_name(self):
+        return 'export-%d-%d.csv' % (self.page_id, self.pk)
+
+    def delete_files(self):
+        storage = get_export_storage()
+        for index in range(self.part_count + 1):
+            # The part after the last saved one may be left by an interrupted job
+            name = self.get_part_name(index)
+            if storage.exists(name):
+                storage.delete(name)
+
+    def delete(self, *args, **kwargs):
+        self.delete_files()
+        return super(ExportJob, self).delete(*args, **kwargs)
+
+    class Meta:
+        verbose_name = _('export job')
+        ordering = ['-created_at']
+
+
+class SubmissionFieldKeyManager(models.Manager):
+    def get_names(self, page_id, refresh=False):
+        """
+        Returns a dict mapping short keys of a survey page's data fields to their names.
+
+        Keys are kept in a per-process cache for `WAGTAILSURVEYS_FIELD_KEYS_CACHE_TIMEOUT` seconds,
+        so a renamed field may keep its old name in other processes until then.
+        """
+
+        cached = field_keys_cache.get((page_id,))
+        if cached is not None and not refresh:
+            expires_at, names = cached
+            if expires_at > time.time():
+                return names
+
+        names = dict(self.filter(page_id=page_id).values_list('key', 'name'))
+        timeout = getattr(settings, 'WAGTAILSURVEYS_FIELD_KEYS_CACHE_TIMEOUT', 60)
+        field_keys_cache.set((page_id,), (time.time() + timeout, names))
+
+        return names
+
+    def get_keys(self, page, names):
+        """
+        Returns a dict mapping names of a survey page's data fields to their short keys,
+        adding keys for names which don't have them yet.
+        """
+
+        keys = {name: key for key, name in self.get_names(page.pk).items()}
+        refreshed = False
+        attempts = 3
+
+        while True:
+            missing = [name for name in names if name not in keys]
+            if not missing:
+                return keys
+
+            if refreshed:
+                try:
+                    self.add_keys(page, missing)
+                except IntegrityError:
+                    # Keys were added by a concurrent submission
+                    attempts -= 1
+                    if not attempts:
+                        raise
+
+            keys = {name: key for key, name in self.get_names(page.pk, refresh=True).items()}
+            refreshed = True
+
+    def add_keys(self, page, names):
+        """
+        Adds keys for new data field names of a survey page.
+        Keys are linked to form fields, so a renamed field keeps its key.
+        """
+
+        field_ids = {field.clean_name: field.pk for field in page.get_form_fields()}
+
+        with transaction.atomic():
+            # Keys of a page are added by one transaction at a time, so concurrent
+            # submissions don't add the same name twice
+            list(Page.objects.select_for_update().filter(pk=page.pk).values_list('pk', flat=True))
+
+            existing_names = set(self.filter(page=page).values_list('name', flat=True))
+            next_key = (self.filter(page=page).aggregate(Max('key'))['key__max'] or 0) + 1
+            for name in names:
+                if name in existing_names:
+                    continue
+
+                field_id = field_ids.get(name)
+                if field_id is not None and self.filter(page=page, field_id=field_id).update(name=name):
+                    continue
+
+                self.create(page=page, key=next_key, name=name, field_id=field_id)
+                next_key += 1
+
+    def rename_field(self, page_id, field_id, name):
+        """
+        Updates the name of a form field's key after its label is changed,
+        so previously stored answers are read under the new name.
+        """
+
+        if self.filter(page_id=page_id, field_id=field_id).exclude(name=name).update(name=name):
+            field_keys_cache.invalidate_page(page_id)
+
+
+@python_2_unicode_compatible
+class SubmissionFieldKey(models.Model):
+    """
+    A short key of a survey page's data field, used by compact submission encoding
+    instead of the field name (see `wagtailsurveys.contrib.compact`).
+
+    `field_id` refers to the form field row of the page, and is None for data which
+    doesn't come from form fields. Keys are never reused, so data of deleted fields can still be read.
+    """
 
-    created_at = models.DateTimeField(verbose_name=_('submit time'), auto_now_add=True)
+    page = models.ForeignKey(Page, on_delete=models.CASCADE, related_name='+')
+    key = models.PositiveIntegerField(verbose_name=_('key'))
+    field_id = models.PositiveIntegerField(verbose_name=_('form field id'), null=True, blank=True)
+    name = models.CharField(verbose_name=_('name'), max_length=255)
+
+    objects = SubmissionFieldKeyManager()
+
+    def __str__(self):
+        return '%s: %s' % (self.key, self.name)
+
+    class Meta:
+        verbose_name = _('submission field key')
+        unique_together = [('page', 'key')]
+        index_together = [('page', 'field_id')]
+
+
+class ArchivedSubmission(object):
+    """
+    A submission read from an archive file, used like `SubmissionValues` by exports and results.
+
+    Its data is keyed by field names of the schema `schema_id`, so fields renamed
+    since it was archived are renamed by `get_versioned_data_fields`.
+    """
+
+    __slots__ = ['id', 'created_at', 'page_id', 'schema_id', 'data']
+
+    resolves_renames = False
+
+    def __init__(self, page_id, record):
+        self.page_id = page_id
+        self.id = record['id']
+        self.created_at = parse_datetime(record['created_at'])
+        self.schema_id = record['schema']
+        self.data = record['data']
+
+    @property
+    def pk(self):
+        return self.id
+
+    def get_form_data(self):
+        return dict(self.data)
 
     def get_data(self):
-        """
-        Returns dict with form data.
+        data = self.get_form_data()
+        data['created_at'] = self.created_at
+        return data
 
-        You can override this method to add additional data (like a reference to a user).
+    def get_row(self, names):
+        data = self.data
+        return tuple(self.created_at if name == 'created_at' else data.get(name) for name in names)
+
+
+class SubmissionArchiveManager(models.Manager):
+    def get_stats(self, page):
+        """
+        Returns the number of archived submissions of a survey page and the time of the last one.
         """
-        form_data = json.loads(self.form_data)
-        form_data.update({
-            'created_at': self.created_at,
-        })
 
-        return form_data
+        return self.filter(page=page).aggregate(
+            submission_count=Sum('submission_count'),
+            last_submitted_at=Max('last_created_at'),
+        )
+
+
+@python_2_unicode_compatible
+class SubmissionArchive(models.Model):
+    """
+    A manifest entry of a gzipped NDJSON file in the archive storage, holding a chunk
+    of a survey page's submissions moved out of the submissions table.
+
+    Files are written once and never changed. Submissions in a file are ordered by (created_at, id),
+    and the first and the last of them are recorded, so chunks outside a date range aren't read.
+    """
+
+    page = models.ForeignKey(Page, on_delete=models.CASCADE, related_name='+')
+    file = models.CharField(verbose_name=_('file'), max_length=255)
+    size = models.PositiveIntegerField(verbose_name=_('size'))
+    checksum = models.CharField(verbose_name=_('checksum'), max_length=40)
+    submission_count = models.PositiveIntegerField(verbose_name=_('submissions'))
+    first_created_at = models.DateTimeField()
+    first_submission_id = models.PositiveIntegerField()
+    last_created_at = models.DateTimeField()
+    last_submission_id = models.PositiveIntegerField()
+    created_at = models.DateTimeField(verbose_name=_('created at'), auto_now_add=True)
+
+    objects = SubmissionArchiveManager()
 
     def __str__(self):
-        return self.form_data
+        return self.file
+
+    def delete_file(self):
+        """
+        Deletes the file once the transaction deleting this row is committed.
+        """
+
+        delete_file_on_commit(get_archive_storage(), self.file)
+
+    def read_submissions(self):
+        """
+        Returns a list of `ArchivedSubmission` read from the file.
+        """
+
+        with get_archive_storage().open(self.file, 'rb') as archive_file:
+            with gzip.GzipFile(fileobj=archive_file, mode='rb') as lines:
+                return [
+                    ArchivedSubmission(self.page_id, codec.loads(line.decode('utf-8')))
+                    for line in lines if line.strip()
+                ]
 
     class Meta:
-        abstract = True
-        verbose_name = _('form submission')
-        ordering = ['created_at']
+        verbose_name = _('submission archive')
+        ordering = ['first_created_at', 'first_submission_id']
+        index_together = [('page', 'first_created_at')]
 
 
-class FormSubmission(AbstractFormSubmission):
-    """Data for a survey submission."""
+def get_field_clean_name(label):
+    """
+    Converts a form field label into the key used in submission data.
+    """
+
+    # unidecode will return an ascii string while slugify wants a
+    # unicode string on the other hand, slugify returns a safe-string
+    # which will be converted to a normal str
+    return str(slugify(text_type(unidecode(label))))[:255]
 
 
 class AbstractFormField(Orderable):
@@ -102,13 +940,26 @@ class AbstractFormField(Orderable):
         help_text=_('Default value. Comma separated values supported for checkboxes.')
     )
     help_text = models.CharField(verbose_name=_('help text'), max_length=255, blank=True)
+    clean_name = models.CharField(
+        verbose_name=_('name'),
+        max_length=255,
+        blank=True,
+        default='',
+        db_index=True,
+        editable=False,
+        help_text=_('Key of the field in submission data. Generated from the label on save.')
+    )
 
-    @property
-    def clean_name(self):
-        # unidecode will return an ascii string while slugify wants a
-        # unicode string on the other hand, slugify returns a safe-string
-        # which will be converted to a normal str
-        return str(slugify(text_type(unidecode(self.label))))
+    def clean(self):
+        super(AbstractFormField, self).clean()
+
+        # Form fields created in the admin are used in previews and revisions
+        # before they are saved, so the key is needed at this point too
+        self.clean_name = get_field_clean_name(self.label)
+
+    def save(self, *args, **kwargs):
+        self.clean_name = get_field_clean_name(self.label)
+        super(AbstractFormField, self).save(*args, **kwargs)
 
     panels = [
         FieldPanel('label'),
@@ -124,21 +975,64 @@ class AbstractFormField(Orderable):
         ordering = ['sort_order']
 
 
-_FORM_CONTENT_TYPES = None
+class SurveyTypesRegistry(object):
+    """
+    Survey page models and their content types.
 
+    Models are collected in `WagtailSurveysAppConfig.ready()`. Content types are looked up
+    on first use, as the database must not be queried while apps are loading.
+    """
 
-def get_survey_types():
-    global _FORM_CONTENT_TYPES
-    if _FORM_CONTENT_TYPES is None:
-        form_models = [
-            model for model in get_page_models()
-            if issubclass(model, AbstractSurvey)
-        ]
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._models = None
+        self._content_types = None
 
-        _FORM_CONTENT_TYPES = list(
-            ContentType.objects.get_for_models(*form_models).values()
-        )
-    return _FORM_CONTENT_TYPES
+    def populate(self):
+        with self._lock:
+            self._models = tuple(
+                model for model in get_page_models()
+                if issubclass(model, AbstractSurvey)
+            )
+
+    def get_models(self):
+        if self._models is None:
+            self.populate()
+
+        return self._models
+
+    def get_content_types(self):
+        content_types = self._content_types
+        if content_types is None:
+            with self._lock:
+                # Another thread may have looked them up while this one was waiting for the lock
+                if self._content_types is None:
+                    self._content_types = list(
+                        ContentType.objects.get_for_models(*self.get_models()).values()
+                    )
+                content_types = self._content_types
+
+        return content_types
+
+    def reset(self):
+        """
+        Forgets collected models and content types, for example after new survey models are created in tests.
+        """
+
+        with self._lock:
+            self._models = None
+            self._content_types = None
+
+
+survey_types = SurveyTypesRegistry()
+
+
+def get_survey_models():
+    return survey_types.get_models()
+
+
+def get_survey_types():
+    return survey_types.get_content_types()
 
 
 def get_surveys_for_user(user):
@@ -149,6 +1043,64 @@ def get_surveys_for_user(user):
     return editable_pages.filter(content_type__in=get_survey_types())
 
 
+def get_submission_stats(survey_pages):
+    """
+    Returns a dict of submission `count` and `last_submitted_at` time by page id
+    for a list of survey pages.
+
+    Statistics are read from `SurveyStats` rows of pages which track them. Submissions of other pages
+    are aggregated with one query per submission model, using the (page, created_at) index,
+    and one query for their archives.
+    """
+
+    specific_pages = list(Page.objects.filter(id__in=[page.pk for page in survey_pages]).specific())
+    stats = {}
+
+    # Pages which keep `SurveyStats` don't need their submissions to be counted
+    tracked_page_ids = [page.pk for page in specific_pages if page.track_submission_stats]
+    for row in SurveyStats.objects.filter(page_id__in=tracked_page_ids).values(
+        'page_id', 'submission_count', 'last_submitted_at'
+    ):
+        stats[row['page_id']] = {
+            'count': row['submission_count'],
+            'last_submitted_at': row['last_submitted_at'],
+        }
+
+    pages_by_submission_class = OrderedDict()
+    for page in specific_pages:
+        if page.pk not in stats:
+            pages_by_submission_class.setdefault(page.get_submission_class(), []).append(page.pk)
+
+    for submission_class, page_ids in pages_by_submission_class.items():
+        rows = submission_class.objects.filter(page_id__in=page_ids).order_by().values('page_id').annotate(
+            count=Count('id'),
+            last_submitted_at=Max('created_at'),
+        )
+        for row in rows:
+            stats[row['page_id']] = {
+                'count': row['count'],
+                'last_submitted_at': row['last_submitted_at'],
+            }
+
+    for page in survey_pages:
+        stats.setdefault(page.pk, {'count': 0, 'last_submitted_at': None})
+
+    untracked_page_ids = [page_id for page_ids in pages_by_submission_class.values() for page_id in page_ids]
+    if untracked_page_ids:
+        # Submissions moved into archives still count
+        rows = SubmissionArchive.objects.filter(page_id__in=untracked_page_ids).order_by().values('page_id').annotate(
+            count=Sum('submission_count'),
+            last_submitted_at=Max('last_created_at'),
+        )
+        for row in rows:
+            page_stats = stats[row['page_id']]
+            page_stats['count'] += row['count']
+            if page_stats['last_submitted_at'] is None or page_stats['last_submitted_at'] < row['last_submitted_at']:
+                page_stats['last_submitted_at'] = row['last_submitted_at']
+
+    return stats
+
+
 class AbstractSurvey(Page):
     """
     A Form Page. Pages implementing a survey or poll page should inherit from it
@@ -158,6 +1110,25 @@ class AbstractSurvey(Page):
 
     form_builder = FormBuilder
 
+    # Set to False to build the form class on every request
+    cache_form_class = True
+
+    # Answers to form fields of these types are counted in survey results
+    results_field_types = ('checkbox', 'checkboxes', 'dropdown', 'radio')
+
+    # Number of counter rows per answer. Increase it for polls
+    # receiving many concurrent submissions
+    results_shards = 4
+
+    # Number of seconds to cache summed results for, None disables caching
+    results_cache_timeout = None
+
+    # Set to True to store a `SubmissionAnswer` row per answer for analytics
+    store_answers = False
+
+    # Set to True to keep the number of submissions and time of the last one in a `SurveyStats` row
+    track_submission_stats = False
+
     def __init__(self, *args, **kwargs):
         super(AbstractSurvey, self).__init__(*args, **kwargs)
         if not hasattr(self, 'landing_page_template'):
@@ -191,9 +1162,137 @@ class AbstractSurvey(Page):
 
         return data_fields
 
+    def get_data_field_types(self):
+        """
+        Returns a dict of form field types by field name, used to give exported columns proper types.
+        Fields missing from it, such as extra fields added to `get_data_fields`, are exported as text.
+        """
+
+        field_types = {
+            'created_at': 'datetime',
+        }
+        field_types.update(
+            (field.clean_name, field.field_type)
+            for field in self.get_form_fields()
+        )
+
+        return field_types
+
+    def get_schema_fields(self):
+        """
+        Returns a list of dicts describing the current form fields, stored in form schemas.
+        """
+
+        return [
+            {'id': field.pk, 'name': field.clean_name, 'label': field.label, 'type': field.field_type}
+            for field in self.get_form_fields()
+        ]
+
+    def get_form_schema(self):
+        """
+        Returns the `FormSchema` of the current form fields, cached for each version of the form.
+        """
+
+        cache_key = self.get_form_class_cache_key()
+        if cache_key is None:
+            return FormSchema.objects.get_for_page(self)
+
+        schema = form_schema_cache.get(cache_key)
+        if schema is None:
+            schema = FormSchema.objects.get_for_page(self)
+            form_schema_cache.set(cache_key, schema)
+
+        return schema
+
+    def get_versioned_data_fields(self):
+        """
+        Returns a tuple of data fields and renames used to read submissions saved with any version of the form.
+
+        Data fields are `get_data_fields()` followed by removed questions which submissions may have answers to.
+        Renames map schema ids to dicts of {field name at submit time: current name},
+        to be passed to `get_versioned_data`. All schemas of the page are looked up with one query.
+        Submissions which resolve renames themselves ignore them, but archived ones don't.
+        """
+
+        data_fields = self.get_data_fields()
+        schemas = list(FormSchema.objects.filter(page=self).order_by('-pk'))
+        if not schemas:
+            return data_fields, {}
+
+        names = {name for name, label in data_fields}
+        current_names = {field['id']: field['name'] for field in self.get_schema_fields()}
+
+        removed_fields = OrderedDict()
+        renames = {}
+        # Labels of removed questions are taken from the latest schema they are in
+        for schema in schemas:
+            schema_renames = {}
+            for field in schema.get_fields():
+                if field['id'] in current_names:
+                    current_name = current_names[field['id']]
+                elif field['name'] in names:
+                    current_name = None
+                else:
+                    removed_fields.setdefault(field['name'], field['label'])
+                    continue
+
+                if current_name != field['name']:
+                    schema_renames[field['name']] = current_name
+
+            if schema_renames:
+                renames[schema.pk] = schema_renames
+
+        return data_fields + list(removed_fields.items()), renames
+
+    def get_form_class_cache_key(self):
+        """
+        Returns a key identifying the current version of the survey form,
+        or None if the form class must not be cached.
+
+        Publishing a page changes its live revision, so each process
+        picks up a new form after publishing even without invalidation.
+        """
+
+        if not self.cache_form_class or self.pk is None:
+            return None
+
+        return (
+            self.pk,
+            getattr(self, 'live_revision_id', None),
+            self.latest_revision_created_at,
+        )
+
+    def get_cached_form_fields(self, cache_key):
+        """
+        Returns form fields, using Django cache framework if `WAGTAILSURVEYS_FORM_FIELDS_CACHE` is set.
+        """
+
+        form_fields_cache = get_form_fields_cache()
+        if form_fields_cache is None:
+            return self.get_form_fields()
+
+        fields_cache_key = get_form_fields_cache_key(self.pk)
+        cached = form_fields_cache.get(fields_cache_key)
+        if cached is not None and cached[0] == cache_key:
+            return cached[1]
+
+        form_fields = list(self.get_form_fields())
+        form_fields_cache.set(fields_cache_key, (cache_key, form_fields))
+        return form_fields
+
     def get_form_class(self):
-        form_builder = self.form_builder(self.get_form_fields())
-        return form_builder.get_form_class()
+        cache_key = self.get_form_class_cache_key()
+        if cache_key is None:
+            form_builder = self.form_builder(self.get_form_fields())
+            return form_builder.get_form_class()
+
+        form_class = form_class_cache.get(cache_key)
+        if form_class is None:
+            form_builder = self.form_builder(self.get_cached_form_fields(cache_key))
+            form_class = form_builder.get_form_class()
+            form_class_cache.set(cache_key, form_class)
+
+        return form_class
 
     def get_form_parameters(self):
         return {}
@@ -222,14 +1321,315 @@ class AbstractSurvey(Page):
 
         You can override this method if you want to have custom creation logic.
         For example, if you want to save reference to a user.
+
+        With `WAGTAILSURVEYS_WRITE_BEHIND` enabled the returned submission isn't saved yet,
+        so its `pk` is None.
         """
 
-        self.get_submission_class().objects.create(
-            form_data=json.dumps(form.cleaned_data, cls=DjangoJSONEncoder),
-            page=self,
-        )
+        submission = self.build_submission(form)
+
+        if submission_writer.is_enabled():
+            # The submission will be saved later from a background thread
+            submission_writer.enqueue(self, submission, form.cleaned_data)
+        else:
+            self.save_submissions([(submission, form.cleaned_data)])
+
+        return submission
+
+    def build_submission(self, form):
+        """
+        Returns an unsaved submission instance for a valid form.
+        """
+
+        submission = self.get_submission_class()(page=self, schema=self.get_form_schema())
+        submission.set_form_data(form.cleaned_data)
+        return submission
+
+    def process_form_submissions(self, forms, submit_times=None):
+        """
+        Saves submissions for a list of valid forms in bulk and returns them.
+        Used by the bulk submissions endpoint instead of `process_form_submission`.
+
+        `submit_times` is a list of times the forms were submitted at, None for the current time.
+        Pages which override `process_form_submission` have it called for every form instead.
+        """
+
+        if submit_times is None:
+            submit_times = [None] * len(forms)
+
+        if six.get_unbound_function(type(self).process_form_submission) is not six.get_unbound_function(
+            AbstractSurvey.process_form_submission
+        ):
+            # Custom saving logic must run for every submission
+            submissions = []
+            for form, submitted_at in zip(forms, submit_times):
+                submission = self.process_form_submission(form)
+                if submitted_at is not None and submission is not None and submission.pk is not None:
+                    type(submission).objects.filter(pk=submission.pk).update(created_at=submitted_at)
+                    submission.created_at = submitted_at
+                submissions.append(submission)
+            return submissions
+
+        submissions = []
+        for form, submitted_at in zip(forms, submit_times):
+            submission = self.build_submission(form)
+            if submitted_at is not None:
+                submission.created_at = submitted_at
+            submissions.append((submission, form.cleaned_data))
+
+        if submissions:
+            self.save_submissions(submissions)
+
+        return [submission for submission, data in submissions]
+
+    def can_submit(self, request, count=1):
+        """
+        Returns True if the user of a request may make `count` more submissions of this survey.
+
+        Checked by `serve` before the form is shown and by the bulk submissions endpoint.
+        You can override it to limit submissions, for example to one per user.
+        """
+
+        return True
+
+    def save_submissions(self, submissions):
+        """
+        Saves new submissions of this survey, updating results and stored answers.
+
+        `submissions` is a list of (submission, data) pairs, where `data` is cleaned form data.
+        Several submissions are inserted with one query.
+        """
+
+        fields = self.get_results_fields()
+        counts = Counter()
+        for submission, data in submissions:
+            counts.update(self.get_submission_answers(data, fields))
+
+        with transaction.atomic():
+            if len(submissions) == 1 or (
+                self.store_answers and not connection.features.can_return_ids_from_bulk_insert
+            ):
+                # Stored answers need submission ids,
+                # which only some databases return from bulk inserts
+                for submission, data in submissions:
+                    submission.save()
+            else:
+                self.get_submission_class().objects.bulk_create([submission for submission, data in submissions])
+
+            self.increment_results(counts)
+
+            if self.track_submission_stats:
+                SurveyStats.objects.add_submissions(
+                    self, len(submissions), max(submission.created_at for submission, data in submissions)
+                )
+
+            if self.store_answers:
+                SubmissionAnswer.objects.bulk_create([
+                    answer
+                    for submission, data in submissions
+                    for answer in self.get_answer_rows(submission, data)
+                ])
+
+    def delete_submission(self, submission):
+        """
+        Deletes a submission of this survey and removes its answers from results.
+        """
+
+        with transaction.atomic():
+            SubmissionAnswer.objects.filter(page=self, submission_id=submission.pk).delete()
+            submission.delete()
+            self.update_results(submission.get_data(), delta=-1)
+
+            if self.track_submission_stats:
+                SurveyStats.objects.remove_submission(self)
+
+    def delete_submissions(self, submissions, batch_size=None, archived=None):
+        """
+        Deletes submissions of this survey from a queryset and removes their answers from results,
+        stored answers and statistics. Returns the number of deleted submissions.
+
+        Submissions are deleted in batches of `batch_size` primary keys, each in a short transaction,
+        so deleting millions of them doesn't lock the table for long.
+        The default size is set by `WAGTAILSURVEYS_DELETE_BATCH_SIZE` setting.
+        Archived submissions selected by `archived`, an `ArchivedSubmissions`, are deleted as well.
+        """
+
+        if batch_size is None:
+            batch_size = getattr(settings, 'WAGTAILSURVEYS_DELETE_BATCH_SIZE', 1000)
+
+        submission_class = self.get_submission_class()
+        submissions = submissions.filter(page=self).order_by('pk')
+        fields = self.get_results_fields()
+        deleted = 0
+        last_pk = None
+
+        while True:
+            batch = submissions
+            if last_pk is not None:
+                batch = batch.filter(pk__gt=last_pk)
+
+            with transaction.atomic():
+                batch = load_submissions(batch[:batch_size])
+                if not batch:
+                    break
+
+                submission_ids = [submission.pk for submission in batch]
+                counts = Counter()
+                for submission in batch:
+                    counts.update(self.get_submission_answers(submission.get_data(), fields))
+
+                SubmissionAnswer.objects.filter(page=self, submission_id__in=submission_ids).delete()
+                submission_class.objects.filter(pk__in=submission_ids).delete()
+                self.increment_results(counts, delta=-1)
+
+                if self.track_submission_stats:
+                    SurveyStats.objects.remove_submissions(self, len(batch), update_last_submitted_at=False)
+
+            deleted += len(batch)
+            last_pk = submission_ids[-1]
+
+        if deleted and self.track_submission_stats:
+            SurveyStats.objects.update_last_submitted_at(self)
+
+        if archived is not None:
+            deleted += archived.delete()
+
+        self.__dict__.pop('_survey_stats', None)
+        return deleted
+
+    def get_survey_stats(self):
+        """
+        Returns `SurveyStats` of this page, computing them if they don't exist yet.
+        """
+
+        if not hasattr(self, '_survey_stats'):
+            try:
+                self._survey_stats = SurveyStats.objects.get(page=self)
+            except SurveyStats.DoesNotExist:
+                self._survey_stats = SurveyStats.objects.rebuild(self)
+
+        return self._survey_stats
+
+    @property
+    def submission_count(self):
+        if self.track_submission_stats:
+            return self.get_survey_stats().submission_count
+
+        return SurveyStats.objects.count_submissions(self)['submission_count']
+
+    @property
+    def last_submitted_at(self):
+        if self.track_submission_stats:
+            return self.get_survey_stats().last_submitted_at
+
+        return SurveyStats.objects.count_submissions(self)['last_submitted_at']
+
+    def save_answers(self, submission, data):
+        """
+        Stores answers from submitted data as `SubmissionAnswer` rows.
+        If you override `process_form_submission`, call this method from it when `store_answers` is enabled.
+        """
+
+        SubmissionAnswer.objects.bulk_create(self.get_answer_rows(submission, data))
+
+    def get_answer_rows(self, submission, data):
+        return [
+            SubmissionAnswer(page=self, submission_id=submission.pk, field_name=field_name, value=answer)
+            for field_name, value in data.items()
+            for answer in get_answers(value)
+        ]
+
+    def get_results_fields(self):
+        """
+        Returns form fields which answers are counted in survey results.
+        """
+
+        return [
+            field for field in self.get_form_fields()
+            if field.field_type in self.results_field_types
+        ]
+
+    def get_field_answers(self, field):
+        """
+        Returns a list of possible answers to a form field, used to order results.
+        """
+
+        if field.field_type == 'checkbox':
+            return ['True', 'False']
+
+        return [choice.strip() for choice in field.choices.split(',')]
+
+    def get_submission_answers(self, data, fields=None):
+        """
+        Yields (field_name, answer) pairs to count for submitted data.
+
+        Each selected option of a 'checkboxes' field is counted separately.
+        """
+
+        if fields is None:
+            fields = self.get_results_fields()
+
+        for field in fields:
+            for answer in get_answers(data.get(field.clean_name)):
+                yield field.clean_name, answer
+
+    def update_results(self, data, delta=1):
+        """
+        Adds answers from submitted data to survey results.
+
+        Use `delta=-1` to remove answers of a deleted submission.
+        If you override `process_form_submission`, call this method from it.
+        """
+
+        self.increment_results(Counter(self.get_submission_answers(data)), delta)
+
+    def increment_results(self, counts, delta=1):
+        """
+        Adds `counts`, a mapping of (field_name, answer) to numbers of submissions, to survey results.
+        """
+
+        for (field_name, answer), count in counts.items():
+            SurveyResult.objects.increment(self, field_name, answer, delta * count, shards=self.results_shards)
+
+    def get_results(self):
+        """
+        Returns an ordered dict mapping labels of counted questions
+        to ordered dicts of answers and numbers of submissions which gave them.
+        """
+
+        if self.results_cache_timeout is None:
+            counts = SurveyResult.objects.get_counts(self)
+        else:
+            cache_key = get_results_cache_key(self.pk)
+            counts = cache.get(cache_key)
+            if counts is None:
+                counts = SurveyResult.objects.get_counts(self)
+                cache.set(cache_key, counts, self.results_cache_timeout)
+
+        results = OrderedDict()
+        for field in self.get_results_fields():
+            field_counts = dict(counts.get(field.clean_name, {}))
+            answers = OrderedDict(
+                (answer, field_counts.pop(answer, 0))
+                for answer in self.get_field_answers(field)
+            )
+
+            # Answers which are no longer among the choices
+            answers.update(sorted(field_counts.items()))
+
+            results[field.label] = answers
+
+        return results
 
     def serve(self, request, *args, **kwargs):
+        if not self.can_submit(request):
+            # The template is rendered without a form
+            return render(
+                request,
+                self.template,
+                self.get_context(request)
+            )
+
         if request.method == 'POST':
             form = self.get_form(request.POST, page=self, user=request.user)
 
@@ -259,6 +1659,10 @@ class AbstractSurvey(Page):
     ]
 
     def serve_preview(self, request, mode):
+        # Previews are built from unsaved content,
+        # so they must not use the cached form class of the live page
+        self.cache_form_class = False
+
         if mode == 'landing':
             return render(
                 request,
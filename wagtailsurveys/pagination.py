@@ -0,0 +1,104 @@
+from __future__ import absolute_import, unicode_literals
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+
+def encode_cursor(submission):
+    return '%s_%d' % (submission.created_at.isoformat(), submission.pk)
+
+
+def decode_cursor(cursor):
+    """
+    Returns a (created_at, id) pair encoded in a cursor, or None if the cursor is invalid.
+    """
+
+    if not cursor:
+        return None
+
+    created_at, _, pk = cursor.rpartition('_')
+    try:
+        created_at = parse_datetime(created_at)
+        pk = int(pk)
+    except ValueError:
+        return None
+
+    if created_at is None:
+        return None
+
+    return created_at, pk
+
+
+def filter_after(submissions, created_at, pk):
+    """
+    Filters submissions that follow (created_at, pk) in (created_at, id) order.
+    """
+
+    return submissions.filter(Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=pk))
+
+
+def filter_before(submissions, created_at, pk):
+    """
+    Filters submissions that precede (created_at, pk) in (created_at, id) order.
+    """
+
+    return submissions.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk))
+
+
+class CursorPage(object):
+    """
+    A page of submissions with cursors pointing to the previous and the next pages.
+    """
+
+    def __init__(self, object_list, has_previous, has_next):
+        self.object_list = object_list
+        self._has_previous = has_previous
+        self._has_next = has_next
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_previous(self):
+        return self._has_previous and bool(self.object_list)
+
+    def has_next(self):
+        return self._has_next and bool(self.object_list)
+
+    def has_other_pages(self):
+        return self.has_previous() or self.has_next()
+
+    def previous_cursor(self):
+        return encode_cursor(self.object_list[0])
+
+    def next_cursor(self):
+        return encode_cursor(self.object_list[-1])
+
+
+def paginate_by_cursor(request, submissions, per_page=20, load=list):
+    """
+    Paginates submissions in (created_at, id) order using `after` and `before` cursors from the query string.
+
+    Unlike OFFSET-based pagination, the cost of getting a page
+    doesn't depend on how far it is from the first one.
+    `load` turns a sliced queryset into a list of objects with `created_at` and `pk`.
+    """
+
+    after = decode_cursor(request.GET.get('after'))
+    before = decode_cursor(request.GET.get('before'))
+
+    if before is not None:
+        submissions = filter_before(submissions, *before).order_by('-created_at', '-id')
+        object_list = load(submissions[:per_page + 1])
+        has_previous = len(object_list) > per_page
+        return CursorPage(object_list[:per_page][::-1], has_previous=has_previous, has_next=True)
+
+    submissions = submissions.order_by('created_at', 'id')
+    if after is not None:
+        submissions = filter_after(submissions, *after)
+
+    object_list = load(submissions[:per_page + 1])
+    has_next = len(object_list) > per_page
+    return CursorPage(object_list[:per_page], has_previous=after is not None, has_next=has_next)
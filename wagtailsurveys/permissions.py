@@ -0,0 +1,70 @@
+from __future__ import absolute_import, unicode_literals
+
+from django.conf import settings
+
+from wagtailsurveys.cache import (
+    PERMISSIONS_GENERATION_CACHE_KEY, get_permissions_cache, get_permissions_cache_key, invalidate_permissions_cache)
+from wagtailsurveys.models import get_survey_types, get_surveys_for_user
+
+
+def get_survey_ids_for_user(user):
+    """
+    Returns a frozenset of ids of survey pages that this user is allowed to access the submissions for.
+
+    When `WAGTAILSURVEYS_PERMISSIONS_CACHE` is set, ids are kept in that cache
+    for `WAGTAILSURVEYS_PERMISSIONS_CACHE_TIMEOUT` seconds, until page permissions,
+    user's groups or survey pages change.
+    """
+
+    if user.pk is None:
+        # Anonymous users can't edit pages
+        return frozenset()
+
+    permissions_cache = get_permissions_cache()
+    if permissions_cache is None:
+        return frozenset(get_surveys_for_user(user).values_list('id', flat=True))
+
+    cache_key = get_permissions_cache_key(user)
+    cached = permissions_cache.get_many([PERMISSIONS_GENERATION_CACHE_KEY, cache_key])
+    generation = cached.get(PERMISSIONS_GENERATION_CACHE_KEY)
+
+    if generation is None:
+        # The generation was never set or was evicted from the cache,
+        # so ids cached before can't be trusted
+        generation = invalidate_permissions_cache()
+    elif cache_key in cached:
+        cached_generation, survey_ids = cached[cache_key]
+        if cached_generation == generation:
+            return survey_ids
+
+    survey_ids = frozenset(get_surveys_for_user(user).values_list('id', flat=True))
+    timeout = getattr(settings, 'WAGTAILSURVEYS_PERMISSIONS_CACHE_TIMEOUT', 300)
+    permissions_cache.set(cache_key, (generation, survey_ids), timeout)
+
+    return survey_ids
+
+
+def get_survey_ids_for_request(request):
+    """
+    Returns ids of survey pages available to the user of this request,
+    looking them up once per request.
+    """
+
+    if not hasattr(request, '_wagtailsurveys_survey_ids'):
+        request._wagtailsurveys_survey_ids = get_survey_ids_for_user(request.user)
+
+    return request._wagtailsurveys_survey_ids
+
+
+def user_can_access_submissions(user, page):
+    """
+    Checks that this user is allowed to access the submissions of a page.
+
+    Only permissions for the page itself are looked up,
+    so the check is cheap enough to run before loading the specific page.
+    """
+
+    if page.content_type_id not in [content_type.id for content_type in get_survey_types()]:
+        return False
+
+    return page.permissions_for_user(user).can_edit()
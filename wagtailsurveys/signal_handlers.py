@@ -0,0 +1,69 @@
+from __future__ import absolute_import, unicode_literals
+
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.db.models.signals import m2m_changed, post_delete, post_save
+
+try:
+    from wagtail.core.models import GroupPagePermission, Page
+except ImportError:  # fallback for Wagtail <2.0
+    from wagtail.wagtailcore.models import GroupPagePermission, Page
+
+from wagtailsurveys.cache import invalidate_form_cache, invalidate_permissions_cache
+from wagtailsurveys.models import AbstractFormField, SubmissionArchive, SubmissionFieldKey, get_survey_models
+
+
+def survey_page_changed_handler(instance, **kwargs):
+    invalidate_form_cache(instance.pk)
+    invalidate_permissions_cache()
+
+
+def permissions_changed_handler(**kwargs):
+    invalidate_permissions_cache()
+
+
+def form_field_changed_handler(instance, **kwargs):
+    # AbstractFormField expects concrete models to declare
+    # the reference to a survey page as `page`
+    if getattr(instance, 'page_id', None) is not None:
+        invalidate_form_cache(instance.page_id)
+
+
+def form_field_saved_handler(instance, created, **kwargs):
+    if created or getattr(instance, 'page_id', None) is None:
+        return
+
+    # Keys of compact submissions follow renamed fields, other pages don't have keys
+    get_submission_class = getattr(instance.page, 'get_submission_class', None)
+    if get_submission_class is not None and get_submission_class().resolves_renames:
+        SubmissionFieldKey.objects.rename_field(instance.page_id, instance.pk, instance.clean_name)
+
+
+def submission_archive_deleted_handler(instance, **kwargs):
+    # Archives are also deleted along with their pages, which doesn't call `delete()` of each one.
+    # The file is deleted once the deletion is committed
+    instance.delete_file()
+
+
+def register_signal_handlers():
+    # Connect to concrete models only: a receiver for all senders
+    # would disable fast deletes for every model in the project
+    for model in get_survey_models():
+        post_save.connect(survey_page_changed_handler, sender=model)
+        post_delete.connect(survey_page_changed_handler, sender=model)
+
+    for model in apps.get_models():
+        if issubclass(model, AbstractFormField):
+            post_save.connect(form_field_changed_handler, sender=model)
+            post_save.connect(form_field_saved_handler, sender=model)
+            post_delete.connect(form_field_changed_handler, sender=model)
+
+    post_delete.connect(submission_archive_deleted_handler, sender=SubmissionArchive)
+
+    # Surveys available to users depend on page permissions, users' groups
+    # and the page tree, which changes when pages are moved or deleted
+    post_save.connect(permissions_changed_handler, sender=GroupPagePermission)
+    post_delete.connect(permissions_changed_handler, sender=GroupPagePermission)
+    m2m_changed.connect(permissions_changed_handler, sender=get_user_model().groups.through)
+    post_save.connect(permissions_changed_handler, sender=Page)
+    post_delete.connect(permissions_changed_handler, sender=Page)
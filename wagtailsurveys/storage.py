@@ -0,0 +1,46 @@
+from __future__ import absolute_import, unicode_literals
+
+from django.conf import settings
+from django.core.files.storage import get_storage_class
+from django.db import transaction
+from django.utils.crypto import get_random_string
+
+
+def get_storage(setting_name):
+    """
+    Returns an instance of the storage class given by a dotted path in a setting,
+    or of the default storage class if the setting isn't set.
+    """
+
+    return get_storage_class(getattr(settings, setting_name, None))()
+
+
+def get_export_storage():
+    return get_storage('WAGTAILSURVEYS_EXPORT_STORAGE')
+
+
+def get_archive_storage():
+    return get_storage('WAGTAILSURVEYS_ARCHIVE_STORAGE')
+
+
+def delete_file_on_commit(storage, name):
+    """
+    Deletes a file once the current transaction is committed, so a rolled back transaction
+    doesn't leave rows pointing at a missing file. Django 1.8 doesn't have `transaction.on_commit`,
+    so there the file is deleted straight away.
+    """
+
+    def delete_file():
+        if storage.exists(name):
+            storage.delete(name)
+
+    on_commit = getattr(transaction, 'on_commit', None)
+    if on_commit is None:
+        delete_file()
+    else:
+        on_commit(delete_file)
+
+
+def make_file_token():
+    # Names of files holding submissions can't be guessed from ids of pages or submissions
+    return get_random_string(32)
@@ -0,0 +1,322 @@
+from __future__ import unicode_literals
+
+import datetime
+import gzip
+import json
+import shutil
+import tempfile
+
+import mock
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.core.urlresolvers import reverse
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from django.utils.six import StringIO
+try:
+    from wagtail.core.models import Page
+except ImportError:  # fallback for Wagtail <2.0
+    from wagtail.wagtailcore.models import Page
+
+from wagtail.tests.utils import WagtailTestUtils
+from wagtailsurveys import archive, export
+from wagtailsurveys.archive import ArchivedSubmissions, archive_submissions
+from wagtailsurveys.export import iter_submissions
+from wagtailsurveys.models import (
+    ExportJob, FormSubmission, SubmissionAnswer, SubmissionArchive, SurveyResult, SurveyStats, get_submission_stats
+)
+from wagtailsurveys.tests.testapp.models import SurveyPage
+from wagtailsurveys.tests.utils import run_on_commit_callbacks
+from wagtailsurveys.tests.test_export import EXPECTED_CSV, PrivateStorage
+
+
+class TestArchiveSubmissions(TestCase, WagtailTestUtils):
+    fixtures = ['test.json']
+
+    def setUp(self):
+        self.survey_page = Page.objects.get(url_path='/home/let-us-know/').specific
+
+        # Keep archive files out of the test media directory
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def archive_first_submission(self):
+        return archive_submissions(self.survey_page, timezone.make_aware(datetime.datetime(2013, 6, 1)))
+
+    def test_archive_submissions(self):
+        first_submission = FormSubmission.objects.get(created_at__year=2013)
+
+        self.assertEqual(self.archive_first_submission(), 1)
+
+        self.assertEqual([submission.created_at.year for submission in FormSubmission.objects.all()], [2014])
+        submission_archive = SubmissionArchive.objects.get()
+        self.assertEqual(submission_archive.submission_count, 1)
+        self.assertEqual(submission_archive.first_submission_id, first_submission.id)
+        self.assertEqual(submission_archive.last_created_at, first_submission.created_at)
+
+        with default_storage.open(submission_archive.file, 'rb') as archive_file:
+            records = [json.loads(line) for line in gzip.GzipFile(fileobj=archive_file).read().splitlines()]
+        self.assertEqual(records, [{
+            'id': first_submission.id,
+            'created_at': '2013-01-01T12:00:00+00:00',
+            'schema': None,
+            'data': first_submission.get_form_data(),
+        }])
+
+    def test_archive_names_are_random(self):
+        archive_submissions(self.survey_page, timezone.now(), chunk_size=1)
+
+        names = [submission_archive.file for submission_archive in SubmissionArchive.objects.all()]
+        for name in names:
+            directory, filename = name.rsplit('/', 1)
+            self.assertEqual(directory, 'wagtailsurveys/archives')
+            self.assertEqual(len(filename), len('.ndjson.gz') + 32)
+        self.assertNotEqual(names[0], names[1])
+
+    @override_settings(WAGTAILSURVEYS_ARCHIVE_STORAGE='wagtailsurveys.tests.test_export.PrivateStorage')
+    def test_archive_storage_setting(self):
+        self.archive_first_submission()
+        submission_archive = SubmissionArchive.objects.get()
+
+        self.assertFalse(default_storage.exists(submission_archive.file))
+        self.assertTrue(PrivateStorage().exists(submission_archive.file))
+        self.assertEqual([submission.data['your-name'] for submission in submission_archive.read_submissions()], [
+            'Mikalai'
+        ])
+
+    def test_deleting_page_deletes_archive_files(self):
+        self.archive_first_submission()
+        name = SubmissionArchive.objects.get().file
+
+        with run_on_commit_callbacks():
+            self.survey_page.delete()
+
+            # Files are deleted only once the deletion is committed
+            self.assertTrue(default_storage.exists(name))
+
+        self.assertFalse(SubmissionArchive.objects.exists())
+        self.assertFalse(default_storage.exists(name))
+
+    def test_archive_in_chunks(self):
+        archive_submissions(self.survey_page, timezone.now(), chunk_size=1)
+
+        self.assertFalse(FormSubmission.objects.exists())
+        self.assertEqual(
+            [submission.get_data()['your-name'] for submission in iter_submissions(
+                FormSubmission.objects.none(), archived=ArchivedSubmissions(self.survey_page)
+            )],
+            ['Mikalai', 'John']
+        )
+        self.assertEqual(SubmissionArchive.objects.count(), 2)
+
+    def test_chunk_is_archived_again_after_concurrent_delete(self):
+        write_archive = archive.write_archive
+
+        def delete_submission(page, chunk):
+            submission_archive = write_archive(page, chunk)
+            if len(chunk) == 2:
+                FormSubmission.objects.filter(created_at__year=2014).delete()
+            return submission_archive
+
+        with mock.patch.object(archive, 'write_archive', side_effect=delete_submission):
+            self.assertEqual(archive_submissions(self.survey_page, timezone.now()), 1)
+
+        self.assertEqual(SubmissionArchive.objects.get().submission_count, 1)
+
+    def test_archive_command(self):
+        stdout = StringIO()
+        call_command('archive_survey_submissions', str(self.survey_page.id), older_than=30, stdout=stdout)
+
+        self.assertIn("Archived 2 submissions of 'Let us know!'", stdout.getvalue())
+        self.assertFalse(FormSubmission.objects.exists())
+
+    def test_archive_command_dry_run(self):
+        stdout = StringIO()
+        call_command('archive_survey_submissions', older_than=30, dry_run=True, stdout=stdout)
+
+        self.assertIn("Would archive 2 submissions of 'Let us know!'", stdout.getvalue())
+        self.assertEqual(FormSubmission.objects.count(), 2)
+        self.assertFalse(SubmissionArchive.objects.exists())
+
+    def test_export_merges_archived_submissions(self):
+        self.archive_first_submission()
+        self.login()
+
+        response = self.client.get(
+            reverse('wagtailsurveys:list_submissions', args=(self.survey_page.id,)), {'action': 'CSV'}
+        )
+        self.assertEqual(b''.join(response.streaming_content).decode('utf-8'), EXPECTED_CSV)
+
+        response = self.client.get(
+            reverse('wagtailsurveys:list_submissions', args=(self.survey_page.id,)),
+            {'action': 'CSV', 'date_to': '2013-01-01'}
+        )
+        self.assertEqual(
+            b''.join(response.streaming_content).decode('utf-8').splitlines()[1:],
+            ['2013-01-01 12:00:00+00:00,Mikalai,Airhead :),bar']
+        )
+
+    def test_export_job_merges_archived_submissions(self):
+        self.archive_first_submission()
+
+        call_command('export_survey_submissions', str(self.survey_page.id), chunk_size=1, verbosity=0)
+
+        job = ExportJob.objects.get()
+        self.assertEqual(job.exported_count, 2)
+        self.assertEqual(b''.join(export.iter_export_job_file(job)).decode('utf-8'), EXPECTED_CSV)
+
+    def test_archived_submissions_after(self):
+        self.archive_first_submission()
+        submission_archive = SubmissionArchive.objects.get()
+        archived = ArchivedSubmissions(self.survey_page)
+        after = (submission_archive.last_created_at, submission_archive.last_submission_id)
+
+        self.assertEqual(len(list(archived.iter_chunks())), 1)
+        self.assertEqual(list(archived.iter_chunks(after=after)), [])
+
+    def test_rebuild_results_and_stats_include_archived_submissions(self):
+        call_command('rebuild_survey_results', str(self.survey_page.id), verbosity=0)
+        counts = SurveyResult.objects.get_counts(self.survey_page)
+
+        self.archive_first_submission()
+        SurveyResult.objects.filter(page=self.survey_page).delete()
+        call_command('rebuild_survey_results', str(self.survey_page.id), verbosity=0)
+
+        self.assertEqual(SurveyResult.objects.get_counts(self.survey_page), counts)
+
+        stats = SurveyStats.objects.rebuild(self.survey_page)
+        self.assertEqual(stats.submission_count, 2)
+        self.assertEqual(stats.last_submitted_at, FormSubmission.objects.get().created_at)
+
+
+class TestDeleteArchivedSubmissions(TestCase, WagtailTestUtils):
+    fixtures = ['test.json']
+
+    def setUp(self):
+        self.survey_page = Page.objects.get(url_path='/home/let-us-know/').specific
+
+        # Keep archive files out of the test media directory
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        call_command('rebuild_survey_results', str(self.survey_page.id), verbosity=0)
+        self.first_submission, self.second_submission = FormSubmission.objects.order_by('created_at')
+        for submission in (self.first_submission, self.second_submission):
+            SubmissionAnswer.objects.create(
+                page=self.survey_page, submission_id=submission.id, field_name='your-name',
+                value=submission.get_data()['your-name']
+            )
+
+    def archive_all(self, chunk_size=None):
+        archive_submissions(self.survey_page, timezone.now(), chunk_size=chunk_size)
+
+    def assert_only_second_submission_is_left(self):
+        self.assertEqual(
+            [submission.get_data()['your-name'] for submission in iter_submissions(
+                FormSubmission.objects.none(), archived=ArchivedSubmissions(self.survey_page)
+            )],
+            ['John']
+        )
+        self.assertEqual(SurveyResult.objects.get_counts(self.survey_page)['your-choices'].get('bar', 0), 0)
+        self.assertEqual(
+            list(SubmissionAnswer.objects.filter(page=self.survey_page).values_list('submission_id', flat=True)),
+            [self.second_submission.id]
+        )
+
+    def test_purge_drops_whole_chunks(self):
+        self.archive_all(chunk_size=1)
+        first_name = SubmissionArchive.objects.get(first_submission_id=self.first_submission.id).file
+
+        stdout = StringIO()
+        with run_on_commit_callbacks():
+            call_command(
+                'purge_survey_submissions', str(self.survey_page.id), date_to=datetime.date(2013, 6, 1), stdout=stdout
+            )
+
+        self.assertIn("Deleted 1 submissions of 'Let us know!'", stdout.getvalue())
+        self.assertEqual(
+            list(SubmissionArchive.objects.values_list('first_submission_id', flat=True)), [self.second_submission.id]
+        )
+        self.assertFalse(default_storage.exists(first_name))
+        self.assert_only_second_submission_is_left()
+
+    def test_purge_rewrites_chunks_spanning_the_cutoff(self):
+        self.archive_all()
+        old_name = SubmissionArchive.objects.get().file
+
+        with mock.patch.object(SurveyPage, 'track_submission_stats', True):
+            SurveyStats.objects.rebuild(self.survey_page)
+            with run_on_commit_callbacks():
+                call_command(
+                    'purge_survey_submissions', str(self.survey_page.id), date_to=datetime.date(2013, 6, 1),
+                    verbosity=0
+                )
+
+        submission_archive = SubmissionArchive.objects.get()
+        self.assertEqual(submission_archive.submission_count, 1)
+        self.assertEqual(submission_archive.first_submission_id, self.second_submission.id)
+        self.assertNotEqual(submission_archive.file, old_name)
+        self.assertFalse(default_storage.exists(old_name))
+        self.assert_only_second_submission_is_left()
+
+        stats = SurveyStats.objects.get(page=self.survey_page)
+        self.assertEqual(stats.submission_count, 1)
+        self.assertEqual(stats.last_submitted_at, self.second_submission.created_at)
+
+    def test_failed_deletion_keeps_archive_files(self):
+        self.archive_all()
+        submission_archive = SubmissionArchive.objects.get()
+        archived = ArchivedSubmissions(self.survey_page, date_to=datetime.date(2013, 6, 1))
+
+        with run_on_commit_callbacks():
+            with mock.patch.object(SurveyPage, 'increment_results', side_effect=IOError("Database is gone")):
+                with self.assertRaises(IOError):
+                    archived.delete()
+
+        # The old file is kept with its row, and the replacing file isn't left behind
+        self.assertEqual(SubmissionArchive.objects.get(), submission_archive)
+        self.assertTrue(default_storage.exists(submission_archive.file))
+        self.assertEqual(default_storage.listdir('wagtailsurveys/archives')[1], [
+            submission_archive.file.rsplit('/', 1)[1]
+        ])
+
+    def test_purge_dry_run_counts_archived_submissions(self):
+        self.archive_all()
+
+        stdout = StringIO()
+        call_command('purge_survey_submissions', older_than=30, dry_run=True, stdout=stdout)
+
+        self.assertIn("Would delete 2 submissions of 'Let us know!'", stdout.getvalue())
+        self.assertEqual(SubmissionArchive.objects.get().submission_count, 2)
+
+    def test_delete_in_date_range_includes_archived_submissions(self):
+        self.archive_all()
+        self.login()
+        url = reverse('wagtailsurveys:delete_submissions', args=(self.survey_page.id,))
+
+        response = self.client.get(url, {'date_from': '2012-01-01', 'date_to': '2013-06-01'})
+        self.assertEqual(response.context['submission_count'], 1)
+
+        self.client.post(url, {'date_from': '2012-01-01', 'date_to': '2013-06-01'})
+
+        self.assert_only_second_submission_is_left()
+
+    def test_submission_stats_include_archived_submissions(self):
+        self.first_submission.delete()
+        self.archive_all()
+        FormSubmission.objects.create(
+            page=self.survey_page, form_data='{}', created_at=self.first_submission.created_at
+        )
+
+        survey_page = SurveyPage.objects.get(pk=self.survey_page.pk)
+        self.assertEqual(survey_page.submission_count, 2)
+        self.assertEqual(survey_page.last_submitted_at, self.second_submission.created_at)
+
+        stats = get_submission_stats([survey_page])[survey_page.pk]
+        self.assertEqual(stats, {'count': 2, 'last_submitted_at': self.second_submission.created_at})
@@ -0,0 +1,142 @@
+from __future__ import unicode_literals
+
+import datetime
+import unittest
+import uuid
+from decimal import Decimal
+
+import mock
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from django.utils.six import StringIO
+from django.utils.translation import ugettext_lazy as _
+
+from wagtailsurveys import codec
+from wagtailsurveys.codec import JSONCodec, ORJSONCodec, SimpleJSONCodec, get_json_codec
+from wagtailsurveys.models import FormSubmission
+
+
+DATA = {
+    'your-name': 'Mikalai',
+    'your-choices': ['foo', 'bar'],
+    'your-age': Decimal('42.50'),
+    'your-birthday': datetime.date(1990, 1, 1),
+    'your-appointment': datetime.datetime(2014, 1, 1, 12, 30, 15, 123456, tzinfo=timezone.utc),
+    'your-time': datetime.time(12, 30, 15, 123456),
+    'your-id': uuid.UUID('12345678123456781234567812345678'),
+    'your-consent': True,
+    'your-label': _("Submission date"),
+}
+
+EXPECTED = {
+    'your-name': 'Mikalai',
+    'your-choices': ['foo', 'bar'],
+    'your-age': '42.50',
+    'your-birthday': '1990-01-01',
+    'your-appointment': '2014-01-01T12:30:15.123Z',
+    'your-time': '12:30:15.123',
+    'your-id': '12345678-1234-5678-1234-567812345678',
+    'your-consent': True,
+    'your-label': 'Submission date',
+}
+
+
+class CodecTestMixin(object):
+    codec_class = None
+
+    def test_round_trip(self):
+        codec = self.codec_class()
+
+        self.assertEqual(codec.loads(codec.dumps(DATA)), EXPECTED)
+
+    def test_decodes_other_codecs(self):
+        codec = self.codec_class()
+
+        self.assertEqual(codec.loads(JSONCodec().dumps(DATA)), EXPECTED)
+        self.assertEqual(JSONCodec().loads(codec.dumps(DATA)), EXPECTED)
+
+
+class TestJSONCodec(CodecTestMixin, unittest.TestCase):
+    codec_class = JSONCodec
+
+
+@unittest.skipUnless(codec.orjson, "orjson is not installed")
+class TestORJSONCodec(CodecTestMixin, unittest.TestCase):
+    codec_class = ORJSONCodec
+
+
+@unittest.skipUnless(codec.simplejson, "simplejson is not installed")
+class TestSimpleJSONCodec(CodecTestMixin, unittest.TestCase):
+    codec_class = SimpleJSONCodec
+
+
+class TestGetJSONCodec(unittest.TestCase):
+    def setUp(self):
+        codec._codecs.clear()
+
+    def tearDown(self):
+        codec._codecs.clear()
+
+    def test_default(self):
+        self.assertIsInstance(get_json_codec(), JSONCodec)
+        self.assertIs(get_json_codec(), get_json_codec())
+
+    @override_settings(WAGTAILSURVEYS_JSON_CODEC='wagtailsurveys.codec.SimpleJSONCodec')
+    @mock.patch('wagtailsurveys.codec.simplejson', object())
+    def test_dotted_path(self):
+        self.assertIsInstance(get_json_codec(), SimpleJSONCodec)
+
+    @override_settings(WAGTAILSURVEYS_JSON_CODEC='orjson')
+    @mock.patch('wagtailsurveys.codec.orjson', None)
+    def test_fallback(self):
+        with self.assertLogs('wagtailsurveys', level='WARNING'):
+            json_codec = get_json_codec()
+
+        self.assertIs(type(json_codec), JSONCodec)
+
+    @override_settings(WAGTAILSURVEYS_JSON_CODEC='auto')
+    @mock.patch('wagtailsurveys.codec.orjson', None)
+    def test_auto(self):
+        self.assertIs(type(get_json_codec()), JSONCodec)
+
+
+@unittest.skipUnless(codec.orjson, "orjson is not installed")
+class TestSubmissionCodec(TestCase):
+    fixtures = ['test.json']
+
+    def setUp(self):
+        codec._codecs.clear()
+
+    def tearDown(self):
+        codec._codecs.clear()
+
+    def test_submissions_stored_with_orjson(self):
+        submission = FormSubmission.objects.first()
+
+        with override_settings(WAGTAILSURVEYS_JSON_CODEC='orjson'):
+            submission.set_form_data(DATA)
+            submission.save()
+
+        # Submissions are readable after the codec is switched back
+        submission = FormSubmission.objects.get(pk=submission.pk)
+        self.assertEqual(submission.get_form_data(), EXPECTED)
+
+
+class TestBenchmarkJSONCodecsCommand(TestCase):
+    fixtures = ['test.json']
+
+    def test_generated_data(self):
+        stdout = StringIO()
+        call_command('benchmark_json_codecs', count=10, repeat=1, stdout=stdout)
+
+        self.assertIn("10 submissions", stdout.getvalue())
+        self.assertRegex(stdout.getvalue(), r'\njson +\d+\.\d+ +\d+\.\d+')
+
+    def test_stored_data(self):
+        page_id = FormSubmission.objects.first().page_id
+
+        stdout = StringIO()
+        call_command('benchmark_json_codecs', page=page_id, repeat=1, stdout=stdout)
+
+        self.assertIn("2 submissions", stdout.getvalue())
@@ -0,0 +1,190 @@
+from __future__ import unicode_literals
+
+import json
+import shutil
+import tempfile
+from decimal import Decimal
+
+from django.core.urlresolvers import reverse
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from wagtail.tests.utils import WagtailTestUtils
+from wagtailsurveys.archive import archive_submissions
+from wagtailsurveys.cache import field_keys_cache
+from wagtailsurveys.contrib.compact import decode_form_data
+from wagtailsurveys.models import SubmissionFieldKey
+from wagtailsurveys.tests.testapp.models import CompactSubmission
+from wagtailsurveys.tests import utils as tests_utils
+
+
+QUESTION = 'what-is-the-most-important-question-you-would-like-to-ask-the-team'
+
+
+class TestCompactSubmissions(TestCase, WagtailTestUtils):
+    def setUp(self):
+        field_keys_cache.clear()
+        self.survey_page = tests_utils.make_compact_survey_page()
+
+    def tearDown(self):
+        field_keys_cache.clear()
+
+    def submit(self, **data):
+        form = self.survey_page.get_form(data, page=self.survey_page, user=None)
+        self.assertTrue(form.is_valid(), form.errors)
+        return self.survey_page.process_form_submission(form)
+
+    def test_submission_is_stored_with_short_keys(self):
+        self.submit(**{QUESTION: 'Why?', 'your-choices': ['foo', 'baz'], 'your-age': '42.5'})
+
+        submission = CompactSubmission.objects.get()
+        self.assertNotIn(QUESTION.encode('utf-8'), bytes(submission.form_data))
+        self.assertLess(len(bytes(submission.form_data)), len(QUESTION))
+
+        self.assertEqual(submission.get_form_data(), {
+            QUESTION: 'Why?',
+            'your-choices': ['foo', 'baz'],
+            'your-age': '42.5',
+        })
+        self.assertEqual(submission.get_data()['created_at'], submission.created_at)
+        self.assertEqual(json.loads(str(submission))['your-age'], '42.5')
+
+    def test_keys(self):
+        self.submit(**{QUESTION: 'Why?', 'your-age': '1'})
+        self.submit(**{QUESTION: 'Why not?'})
+
+        keys = SubmissionFieldKey.objects.filter(page=self.survey_page).order_by('key')
+        self.assertEqual([key.key for key in keys], [1, 2, 3])
+        self.assertEqual(
+            {key.name: key.field_id for key in keys},
+            {field.clean_name: field.pk for field in self.survey_page.get_form_fields()}
+        )
+
+    def test_keys_are_cached(self):
+        self.submit(**{QUESTION: 'Why?', 'your-choices': ['foo'], 'your-age': '1'})
+        submission = CompactSubmission.objects.get()
+
+        with self.assertNumQueries(0):
+            submission.get_form_data()
+
+        form = self.survey_page.get_form({QUESTION: 'Why not?'}, page=self.survey_page, user=None)
+        self.assertTrue(form.is_valid())
+
+        with self.assertNumQueries(0):
+            self.survey_page.build_submission(form)
+
+    def test_renamed_field_keeps_answers(self):
+        self.submit(**{QUESTION: 'Why?', 'your-age': '30'})
+
+        field = self.survey_page.get_form_fields().get(clean_name='your-age')
+        field.label = "How old are you"
+        field.save()
+
+        submission = CompactSubmission.objects.get()
+        self.assertEqual(submission.get_form_data(), {
+            QUESTION: 'Why?',
+            'how-old-are-you': '30',
+            'your-choices': [],
+        })
+
+        # New submissions use the same key
+        self.submit(**{QUESTION: 'Why?', 'how-old-are-you': '31'})
+        self.assertEqual(SubmissionFieldKey.objects.filter(page=self.survey_page).count(), 3)
+
+    def test_renamed_field_answers_are_listed_and_exported(self):
+        self.submit(**{QUESTION: 'Why?', 'your-age': '30'})
+
+        field = self.survey_page.get_form_fields().get(clean_name='your-age')
+        field.label = "How old are you"
+        field.save()
+
+        self.login()
+        url = reverse('wagtailsurveys:list_submissions', args=(self.survey_page.id,))
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, '<td>30</td>', html=True)
+
+        response = self.client.get(url, {'action': 'CSV'})
+        lines = b''.join(response.streaming_content).decode('utf-8').splitlines()
+        self.assertIn('How old are you', lines[0])
+        self.assertTrue(lines[1].endswith(',30'), lines[1])
+
+    def test_renamed_field_answers_are_exported_from_archives(self):
+        self.submit(**{QUESTION: 'Why?', 'your-age': '30'})
+
+        # The field is renamed both before and after the submission is archived
+        field = self.survey_page.get_form_fields().get(clean_name='your-age')
+        field.label = "How old are you"
+        field.save()
+
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        with override_settings(MEDIA_ROOT=media_root):
+            self.assertEqual(archive_submissions(self.survey_page, timezone.now()), 1)
+
+            field.label = "Age"
+            field.save()
+
+            self.login()
+            response = self.client.get(
+                reverse('wagtailsurveys:list_submissions', args=(self.survey_page.id,)), {'action': 'CSV'}
+            )
+            lines = b''.join(response.streaming_content).decode('utf-8').splitlines()
+
+        self.assertFalse(CompactSubmission.objects.exists())
+        self.assertIn('Age', lines[0].split(','))
+        self.assertNotIn('How old are you', lines[0])
+        self.assertTrue(lines[1].endswith(',30'), lines[1])
+
+    def test_deleted_field_answers_are_kept(self):
+        self.submit(**{QUESTION: 'Why?', 'your-age': '30'})
+
+        self.survey_page.get_form_fields().get(clean_name='your-age').delete()
+
+        self.assertEqual(CompactSubmission.objects.get().get_form_data()['your-age'], '30')
+
+    def test_values_are_stored_like_json(self):
+        submission = CompactSubmission(page=self.survey_page)
+        submission.set_form_data({'your-age': Decimal('1.50'), 'extra': None})
+        submission.save()
+
+        self.assertEqual(CompactSubmission.objects.get().get_form_data(), {'your-age': '1.50', 'extra': None})
+        self.assertIsNone(SubmissionFieldKey.objects.get(page=self.survey_page, name='extra').field_id)
+
+    def test_keys_added_by_another_process(self):
+        # Fill the cache of keys
+        SubmissionFieldKey.objects.get_names(self.survey_page.pk)
+
+        SubmissionFieldKey.objects.create(page=self.survey_page, key=7, name='added-elsewhere')
+
+        self.assertEqual(
+            decode_form_data(self.survey_page.pk, b'\x81\x07\xa3yes'),
+            {'added-elsewhere': 'yes'}
+        )
+
+    def test_add_existing_keys(self):
+        SubmissionFieldKey.objects.add_keys(self.survey_page, ['your-age', 'extra'])
+
+        # Names added by a concurrent submission since the keys were read aren't added again
+        SubmissionFieldKey.objects.add_keys(self.survey_page, ['extra', 'your-age'])
+
+        self.assertEqual(
+            sorted(SubmissionFieldKey.objects.filter(page=self.survey_page).values_list('key', 'name')),
+            [(1, 'your-age'), (2, 'extra')]
+        )
+
+    def test_fields_of_other_pages_are_renamed_without_keys(self):
+        survey_page = tests_utils.make_survey_page()
+        field = survey_page.get_form_fields().get(clean_name='your-name')
+        field.label = "Your full name"
+
+        with CaptureQueriesContext(connection) as context:
+            field.save()
+
+        self.assertFalse([
+            query for query in context.captured_queries
+            if SubmissionFieldKey._meta.db_table in query['sql']
+        ])
@@ -0,0 +1,255 @@
+from __future__ import unicode_literals
+
+import datetime
+import os
+import shutil
+import tempfile
+
+import mock
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.core.management import call_command
+from django.core.urlresolvers import reverse
+from django.test import TestCase, override_settings
+from django.utils import timezone
+try:
+    from wagtail.core.models import Page
+except ImportError:  # fallback for Wagtail <2.0
+    from wagtail.wagtailcore.models import Page
+
+from wagtail.tests.utils import WagtailTestUtils
+from wagtailsurveys import export
+from wagtailsurveys.models import ExportJob, FormSubmission
+
+
+EXPECTED_CSV = (
+    'Submission Date,Your name,Your biography,Your choices\r\n'
+    '2013-01-01 12:00:00+00:00,Mikalai,Airhead :),bar\r\n'
+    '2014-01-01 12:00:00+00:00,John,Genius,None\r\n'
+)
+
+
+class PrivateStorage(FileSystemStorage):
+    def __init__(self):
+        super(PrivateStorage, self).__init__(location=os.path.join(settings.MEDIA_ROOT, 'private'))
+
+
+class ExportJobTestMixin(object):
+    fixtures = ['test.json']
+
+    def setUp(self):
+        self.survey_page = Page.objects.get(url_path='/home/let-us-know/')
+
+        # Keep exported files out of the test media directory
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def read_job_file(self, job):
+        return b''.join(export.iter_export_job_file(job)).decode('utf-8')
+
+
+class TestExportSurveySubmissionsCommand(ExportJobTestMixin, TestCase):
+    def test_export(self):
+        call_command('export_survey_submissions', str(self.survey_page.id), chunk_size=1, verbosity=0)
+
+        job = ExportJob.objects.get()
+        self.assertEqual(job.status, ExportJob.STATUS_COMPLETE)
+        self.assertEqual(job.exported_count, 2)
+        self.assertEqual(job.part_count, 2)
+        self.assertEqual(self.read_job_file(job), EXPECTED_CSV)
+
+    def test_export_with_dates(self):
+        call_command(
+            'export_survey_submissions', str(self.survey_page.id), date_from=datetime.date(2014, 1, 1), verbosity=0
+        )
+
+        job = ExportJob.objects.get()
+        self.assertEqual(job.exported_count, 1)
+        self.assertEqual(self.read_job_file(job).splitlines()[1], '2014-01-01 12:00:00+00:00,John,Genius,None')
+
+    def test_export_without_submissions(self):
+        call_command(
+            'export_survey_submissions', str(self.survey_page.id), date_from=datetime.date(2015, 1, 1), verbosity=0
+        )
+
+        job = ExportJob.objects.get()
+        self.assertEqual(job.status, ExportJob.STATUS_COMPLETE)
+        self.assertEqual(self.read_job_file(job), 'Submission Date,Your name,Your biography,Your choices\r\n')
+
+    def test_run_queued_jobs(self):
+        job = ExportJob.objects.create(page=self.survey_page)
+
+        call_command('export_survey_submissions', verbosity=0)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, ExportJob.STATUS_COMPLETE)
+        self.assertEqual(self.read_job_file(job), EXPECTED_CSV)
+
+    def test_resume_interrupted_job(self):
+        job = ExportJob.objects.create(page=self.survey_page)
+        ExportJob.objects.claim(job)
+
+        # Interrupt the job while it saves the second part
+        save_export_part = export.save_export_part
+
+        def interrupt_second_part(job, index, rows):
+            if index > 0:
+                raise KeyboardInterrupt
+            save_export_part(job, index, rows)
+
+        with mock.patch.object(export, 'save_export_part', side_effect=interrupt_second_part):
+            with self.assertRaises(KeyboardInterrupt):
+                export.run_export_job(job, chunk_size=1)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, ExportJob.STATUS_RUNNING)
+        self.assertEqual(job.part_count, 1)
+
+        # Check that a running job is resumed only after it stops updating
+        call_command('export_survey_submissions', verbosity=0)
+        job.refresh_from_db()
+        self.assertEqual(job.status, ExportJob.STATUS_RUNNING)
+
+        ExportJob.objects.filter(pk=job.pk).update(updated_at=timezone.now() - datetime.timedelta(hours=1))
+        call_command('export_survey_submissions', chunk_size=1, verbosity=0)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, ExportJob.STATUS_COMPLETE)
+        self.assertEqual(job.exported_count, 2)
+        self.assertEqual(self.read_job_file(job), EXPECTED_CSV)
+
+    def test_failed_job(self):
+        job = ExportJob.objects.create(page=self.survey_page)
+
+        with self.assertLogs('wagtailsurveys', level='ERROR') as logs:
+            with mock.patch.object(export, 'save_export_part', side_effect=IOError("Disk is full")):
+                call_command('export_survey_submissions', verbosity=0)
+
+        self.assertIn("Disk is full", '\n'.join(logs.output))
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, ExportJob.STATUS_FAILED)
+        self.assertIn("Disk is full", job.error)
+
+    def test_delete_job_deletes_files(self):
+        call_command('export_survey_submissions', str(self.survey_page.id), chunk_size=1, verbosity=0)
+        job = ExportJob.objects.get()
+        part_names = job.get_part_names()
+
+        job.delete()
+
+        for name in part_names:
+            self.assertFalse(default_storage.exists(name))
+
+    def test_part_names_are_random(self):
+        call_command('export_survey_submissions', str(self.survey_page.id), verbosity=0)
+        call_command('export_survey_submissions', str(self.survey_page.id), verbosity=0)
+        first_job, second_job = ExportJob.objects.order_by('pk')
+
+        self.assertEqual(len(first_job.file_token), 32)
+        self.assertNotEqual(first_job.file_token, second_job.file_token)
+        self.assertNotIn('/%d/' % first_job.pk, first_job.get_part_name(0))
+
+    @override_settings(WAGTAILSURVEYS_EXPORT_STORAGE='wagtailsurveys.tests.test_export.PrivateStorage')
+    def test_export_storage_setting(self):
+        call_command('export_survey_submissions', str(self.survey_page.id), verbosity=0)
+        job = ExportJob.objects.get()
+        part_name = job.get_part_name(0)
+
+        self.assertFalse(default_storage.exists(part_name))
+        self.assertTrue(PrivateStorage().exists(part_name))
+        self.assertEqual(self.read_job_file(job), EXPECTED_CSV)
+
+        job.delete()
+        self.assertFalse(PrivateStorage().exists(part_name))
+
+
+class TestExportJobViews(ExportJobTestMixin, TestCase, WagtailTestUtils):
+    def setUp(self):
+        super(TestExportJobViews, self).setUp()
+        self.assertTrue(self.client.login(username='siteeditor', password='password'))
+
+    def test_create_export_job(self):
+        response = self.client.post(
+            reverse('wagtailsurveys:create_export_job', args=(self.survey_page.id,)),
+            {'date_from': '2014-01-01', 'date_to': ''}
+        )
+
+        # Check that the job was queued
+        self.assertRedirects(response, reverse('wagtailsurveys:list_export_jobs', args=(self.survey_page.id,)))
+        job = ExportJob.objects.get()
+        self.assertEqual(job.status, ExportJob.STATUS_QUEUED)
+        self.assertEqual(job.date_from, datetime.date(2014, 1, 1))
+        self.assertIsNone(job.date_to)
+        self.assertEqual(job.user.username, 'siteeditor')
+
+    def test_list_export_jobs(self):
+        ExportJob.objects.create(page=self.survey_page)
+
+        response = self.client.get(reverse('wagtailsurveys:list_export_jobs', args=(self.survey_page.id,)))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, 'wagtailsurveys/export_jobs.html')
+        self.assertEqual(len(response.context['export_jobs']), 1)
+
+    def test_download_export_job(self):
+        call_command('export_survey_submissions', str(self.survey_page.id), chunk_size=1, verbosity=0)
+        job = ExportJob.objects.get()
+
+        response = self.client.get(
+            reverse('wagtailsurveys:download_export_job', args=(self.survey_page.id, job.id))
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(b''.join(response.streaming_content).decode('utf-8'), EXPECTED_CSV)
+        self.assertEqual(
+            response['Content-Disposition'], 'attachment;filename=export-%d-%d.csv' % (self.survey_page.id, job.id)
+        )
+
+    def test_download_unfinished_export_job(self):
+        job = ExportJob.objects.create(page=self.survey_page)
+
+        response = self.client.get(
+            reverse('wagtailsurveys:download_export_job', args=(self.survey_page.id, job.id))
+        )
+
+        self.assertEqual(response.status_code, 404)
+
+    def test_export_jobs_bad_permissions(self):
+        self.assertTrue(self.client.login(username='eventeditor', password='password'))
+
+        response = self.client.post(reverse('wagtailsurveys:create_export_job', args=(self.survey_page.id,)))
+        self.assertEqual(response.status_code, 403)
+
+        response = self.client.get(reverse('wagtailsurveys:list_export_jobs', args=(self.survey_page.id,)))
+        self.assertEqual(response.status_code, 403)
+
+        self.assertFalse(ExportJob.objects.exists())
+
+
+class TestIterRows(TestCase):
+    fixtures = ['test.json']
+
+    def test_get_source_names(self):
+        self.assertEqual(export.get_source_names(['a', 'b']), ['a', 'b'])
+
+        # 'old-b' was renamed to 'b', and 'a' was removed and its name is taken by another field
+        self.assertEqual(
+            export.get_source_names(['a', 'b', 'c'], {'old-b': 'b', 'a': None}),
+            [None, 'old-b', 'c']
+        )
+
+    def test_iter_rows(self):
+        submissions = list(FormSubmission.objects.order_by('created_at'))
+        renames = {None: {'your-biography': 'about-you'}}
+
+        rows = list(export.iter_rows(submissions, ['your-name', 'about-you'], renames))
+
+        self.assertEqual(rows, [
+            (submission.get_data().get('your-name'), submission.get_data().get('your-biography'))
+            for submission in submissions
+        ])
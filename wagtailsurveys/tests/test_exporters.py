@@ -0,0 +1,246 @@
+from __future__ import unicode_literals
+
+import datetime
+import gzip
+import io
+import json
+import unittest
+import zipfile
+from decimal import Decimal
+
+import mock
+from django.core.urlresolvers import reverse
+from django.test import TestCase, override_settings
+from django.utils import timezone
+try:
+    from wagtail.core.models import Page
+except ImportError:  # fallback for Wagtail <2.0
+    from wagtail.wagtailcore.models import Page
+
+from wagtail.tests.utils import WagtailTestUtils
+from wagtailsurveys.exporters import (
+    ParquetExporter, XLSXExporter, convert_value, get_exporters, iter_gzip, pyarrow, xlsxwriter
+)
+from wagtailsurveys.models import FormSubmission
+from wagtailsurveys.tests.testapp.models import SurveyField
+
+
+class TestConvertValue(unittest.TestCase):
+    def test_convert_value(self):
+        self.assertEqual(convert_value('number', '7.3'), Decimal('7.3'))
+        self.assertEqual(convert_value('date', '2014-01-01'), datetime.date(2014, 1, 1))
+        self.assertEqual(
+            convert_value('datetime', '2014-01-01T12:00:00Z'),
+            datetime.datetime(2014, 1, 1, 12, tzinfo=timezone.utc)
+        )
+        self.assertIs(convert_value('checkbox', True), True)
+        self.assertEqual(convert_value('checkboxes', ['foo', 'bar']), ['foo', 'bar'])
+        self.assertEqual(convert_value('singleline', ['foo', 'bar']), 'foo, bar')
+        self.assertEqual(convert_value('singleline', 7), '7')
+
+    def test_convert_empty_value(self):
+        self.assertIsNone(convert_value('number', None))
+        self.assertIsNone(convert_value('number', ''))
+        self.assertIsNone(convert_value('date', ''))
+        self.assertEqual(convert_value('singleline', ''), '')
+
+
+class TestGzip(unittest.TestCase):
+    def test_iter_gzip(self):
+        chunks = ['line %d\n' % i for i in range(1000)]
+
+        content = b''.join(iter_gzip(iter(chunks)))
+
+        self.assertEqual(gzip.GzipFile(fileobj=io.BytesIO(content)).read().decode('utf-8'), ''.join(chunks))
+
+    def test_iter_gzip_compression_level(self):
+        chunks = ['line %d\n' % i for i in range(1000)]
+
+        with override_settings(WAGTAILSURVEYS_EXPORT_COMPRESSION_LEVEL=0):
+            stored = b''.join(iter_gzip(chunks))
+        compressed = b''.join(iter_gzip(chunks, level=9))
+
+        self.assertGreater(len(stored), len(''.join(chunks)))
+        self.assertLess(len(compressed), len(''.join(chunks)) // 2)
+
+
+class TestExporters(TestCase, WagtailTestUtils):
+    fixtures = ['test.json']
+
+    def setUp(self):
+        self.survey_page = Page.objects.get(url_path='/home/let-us-know/')
+        SurveyField.objects.create(page=self.survey_page.specific, label="Your age", field_type='number')
+        FormSubmission.objects.filter(page=self.survey_page, form_data__contains='John').update(form_data=json.dumps({
+            'your-name': 'John',
+            'your-biography': 'Genius',
+            'your-choices': ['foo', 'bar'],
+            'your-age': '42.5',
+        }))
+
+        self.login()
+
+    def export(self, export_format):
+        response = self.client.get(
+            reverse('wagtailsurveys:list_submissions', args=(self.survey_page.id,)),
+            {'export': export_format}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content)
+
+    def test_ndjson_export(self):
+        response, content = self.export('ndjson')
+
+        self.assertEqual(response['Content-Disposition'], 'attachment;filename=export.ndjson')
+        rows = [json.loads(line) for line in content.decode('utf-8').splitlines()]
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[1], {
+            'created_at': '2014-01-01T12:00:00Z',
+            'your-name': 'John',
+            'your-biography': 'Genius',
+            'your-choices': ['foo', 'bar'],
+            'your-age': '42.5',
+        })
+
+    def test_compressed_csv_export(self):
+        response = self.client.get(
+            reverse('wagtailsurveys:list_submissions', args=(self.survey_page.id,)),
+            {'action': 'CSV', 'compress': 'gzip'}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        self.assertEqual(response['Content-Disposition'], 'attachment;filename=export.csv.gz')
+        content = gzip.GzipFile(fileobj=io.BytesIO(b''.join(response.streaming_content))).read().decode('utf-8')
+        lines = content.splitlines()
+        self.assertEqual(lines[0], 'Submission Date,Your age,Your name,Your biography,Your choices')
+        self.assertEqual(len(lines), 3)
+
+    def test_compressed_ndjson_export(self):
+        response = self.client.get(
+            reverse('wagtailsurveys:list_submissions', args=(self.survey_page.id,)),
+            {'export': 'ndjson', 'compress': 'gzip'}
+        )
+
+        self.assertEqual(response['Content-Disposition'], 'attachment;filename=export.ndjson.gz')
+        content = gzip.GzipFile(fileobj=io.BytesIO(b''.join(response.streaming_content))).read().decode('utf-8')
+        self.assertEqual(json.loads(content.splitlines()[1])['your-choices'], ['foo', 'bar'])
+
+    @unittest.skipUnless(xlsxwriter, "XlsxWriter is not installed")
+    def test_xlsx_export(self):
+        response, content = self.export('xlsx')
+
+        self.assertEqual(response['Content-Disposition'], 'attachment;filename=export.xlsx')
+        with zipfile.ZipFile(io.BytesIO(content)) as workbook:
+            sheet = workbook.read('xl/worksheets/sheet1.xml').decode('utf-8')
+            strings = workbook.read('xl/sharedStrings.xml').decode('utf-8') if (
+                'xl/sharedStrings.xml' in workbook.namelist()
+            ) else sheet
+
+        # Check that the number was written as a number
+        self.assertIn('<v>42.5</v>', sheet)
+        self.assertIn('foo, bar', strings)
+
+    @unittest.skipUnless(xlsxwriter, "XlsxWriter is not installed")
+    def test_xlsx_export_continues_on_next_worksheet(self):
+        with mock.patch.object(XLSXExporter, 'max_rows', 2):
+            response, content = self.export('xlsx')
+
+        with zipfile.ZipFile(io.BytesIO(content)) as workbook:
+            sheets = [workbook.read(name).decode('utf-8') for name in sorted(workbook.namelist()) if (
+                name.startswith('xl/worksheets/sheet')
+            )]
+
+        # Check that each worksheet holds the header and a submission
+        self.assertEqual(len(sheets), 2)
+        self.assertNotIn('<v>42.5</v>', sheets[0])
+        self.assertIn('<v>42.5</v>', sheets[1])
+        for sheet in sheets:
+            self.assertEqual(sheet.count('<row '), 2)
+
+    @unittest.skipUnless(pyarrow, "pyarrow is not installed")
+    def test_parquet_export(self):
+        import pyarrow.parquet
+
+        response, content = self.export('parquet')
+
+        table = pyarrow.parquet.read_table(pyarrow.BufferReader(content))
+        self.assertEqual(table.num_rows, 2)
+
+        # Check that columns are typed by form field types
+        self.assertEqual(table.schema.field('created_at').type, pyarrow.timestamp('us', tz='UTC'))
+        self.assertEqual(table.schema.field('your-age').type, pyarrow.decimal128(3, 1))
+        self.assertEqual(table.schema.field('your-choices').type, pyarrow.list_(pyarrow.string()))
+
+        rows = table.to_pydict()
+        self.assertEqual(rows['your-age'], [None, Decimal('42.5')])
+        self.assertEqual(rows['your-choices'], [['bar'], ['foo', 'bar']])
+        self.assertEqual(rows['your-name'], ['Mikalai', 'John'])
+
+    @unittest.skipUnless(pyarrow, "pyarrow is not installed")
+    def test_parquet_export_keeps_decimal_digits(self):
+        import pyarrow.parquet
+
+        FormSubmission.objects.create(page=self.survey_page, form_data=json.dumps({
+            'your-age': '12345678901234567.123456789',
+        }))
+
+        response, content = self.export('parquet')
+
+        table = pyarrow.parquet.read_table(pyarrow.BufferReader(content))
+        self.assertEqual(table.schema.field('your-age').type, pyarrow.decimal128(26, 9))
+        self.assertEqual(
+            table.to_pydict()['your-age'], [None, Decimal('42.5'), Decimal('12345678901234567.123456789')]
+        )
+
+    @unittest.skipUnless(pyarrow, "pyarrow is not installed")
+    def test_parquet_export_numbers_out_of_decimal_range(self):
+        import pyarrow.parquet
+
+        FormSubmission.objects.create(page=self.survey_page, form_data=json.dumps({'your-age': '1e40'}))
+
+        response, content = self.export('parquet')
+
+        table = pyarrow.parquet.read_table(pyarrow.BufferReader(content))
+        self.assertEqual(table.schema.field('your-age').type, pyarrow.string())
+        self.assertEqual(table.to_pydict()['your-age'], [None, '42.5', '1E+40'])
+
+    @unittest.skipUnless(pyarrow, "pyarrow is not installed")
+    def test_parquet_export_ignores_submissions_saved_while_writing(self):
+        import pyarrow.parquet
+
+        write_row_chunks = ParquetExporter.write_row_chunks
+
+        def submit_and_write(exporter, *args):
+            # This number doesn't fit the column typed before it was submitted
+            FormSubmission.objects.create(page=self.survey_page, form_data=json.dumps({'your-age': '12345.678'}))
+            return write_row_chunks(exporter, *args)
+
+        with mock.patch.object(ParquetExporter, 'write_row_chunks', submit_and_write):
+            response, content = self.export('parquet')
+
+        table = pyarrow.parquet.read_table(pyarrow.BufferReader(content))
+        self.assertEqual(table.to_pydict()['your-age'], [None, Decimal('42.5')])
+
+    def test_unknown_export_format(self):
+        response = self.client.get(
+            reverse('wagtailsurveys:list_submissions', args=(self.survey_page.id,)),
+            {'export': 'doc'}
+        )
+
+        self.assertEqual(response.status_code, 404)
+
+    @override_settings(WAGTAILSURVEYS_EXPORTERS=['wagtailsurveys.exporters.CSVExporter'])
+    def test_exporters_setting(self):
+        self.assertEqual(list(get_exporters()), ['csv'])
+
+        response = self.client.get(
+            reverse('wagtailsurveys:list_submissions', args=(self.survey_page.id,)),
+            {'export': 'ndjson'}
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_exporters_are_listed(self):
+        response = self.client.get(reverse('wagtailsurveys:list_submissions', args=(self.survey_page.id,)))
+
+        self.assertContains(response, 'name="export" value="ndjson"')
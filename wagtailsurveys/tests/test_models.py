@@ -1,17 +1,31 @@
 # -*- coding: utf-8 -*-
 from __future__ import unicode_literals
 
+import datetime
 import json
-
+import threading
+from decimal import Decimal
+
+import mock
+from django.contrib.contenttypes.models import ContentType
+from django.core.management import CommandError, call_command
+from django.core.urlresolvers import reverse
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.six import StringIO
 try:
     from wagtail.core.models import Page
 except ImportError:  # fallback for Wagtail <2.0
     from wagtail.wagtailcore.models import Page
 
 from wagtail.tests.utils import WagtailTestUtils
-from wagtailsurveys.models import FormSubmission
-from wagtailsurveys.tests.testapp.models import SurveyField, CustomSubmission
+from wagtailsurveys.models import (
+    FormSchema, FormSubmission, SubmissionAnswer, SubmissionValues, SurveyResult, SurveyStats, SurveyTypesRegistry,
+    get_submission_stats, get_versioned_data, load_submissions)
+from wagtailsurveys.tests.testapp.models import (
+    CompactSurveyPage, SurveyPage, SurveyField, CustomSubmission, SurveyWithCustomSubmissionPage)
 from wagtailsurveys.tests import utils as tests_utils
 
 
@@ -185,3 +199,752 @@ class TestSurveyWithCustomSubmissionPageFormSubmission(TestCase, WagtailTestUtil
         self.assertEqual(submissions_qs.count(), 1)
         self.assertTrue(submissions_qs.filter(form_data__contains='hello world').exists())
         self.assertFalse(submissions_qs.filter(form_data__contains='hello cruel world').exists())
+
+
+class TestSurveyFormClassCache(TestCase):
+    def setUp(self):
+        # Create a survey page
+        self.survey_page = tests_utils.make_survey_page()
+
+    def test_form_class_is_cached(self):
+        form_class = self.survey_page.get_form_class()
+
+        with self.assertNumQueries(0):
+            self.assertIs(self.survey_page.get_form_class(), form_class)
+
+    def test_form_class_is_not_cached_when_disabled(self):
+        self.survey_page.cache_form_class = False
+
+        self.assertIsNot(self.survey_page.get_form_class(), self.survey_page.get_form_class())
+
+    def test_adding_field_invalidates_form_class(self):
+        form_class = self.survey_page.get_form_class()
+
+        SurveyField.objects.create(
+            page=self.survey_page,
+            label="Your favourite number",
+            field_type='number',
+        )
+
+        new_form_class = self.survey_page.get_form_class()
+        self.assertIsNot(new_form_class, form_class)
+        self.assertIn('your-favourite-number', new_form_class.base_fields)
+
+    def test_deleting_field_invalidates_form_class(self):
+        self.survey_page.get_form_class()
+
+        SurveyField.objects.get(page=self.survey_page, label="Your biography").delete()
+
+        self.assertNotIn('your-biography', self.survey_page.get_form_class().base_fields)
+
+    def test_publishing_invalidates_form_class(self):
+        form_class = self.survey_page.get_form_class()
+
+        self.survey_page.save_revision().publish()
+        survey_page = Page.objects.get(id=self.survey_page.id).specific
+
+        self.assertIsNot(survey_page.get_form_class(), form_class)
+
+    def test_get_survey_uses_cached_form_class(self):
+        self.client.get('/let-us-know/')
+
+        with mock.patch.object(self.survey_page.form_builder, 'get_form_class') as get_form_class:
+            response = self.client.get('/let-us-know/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(get_form_class.called)
+
+
+class TestFormFieldCleanName(TestCase):
+    def setUp(self):
+        # Create a survey page
+        self.survey_page = tests_utils.make_survey_page()
+
+    def test_clean_name_is_stored_on_save(self):
+        field = SurveyField.objects.create(
+            page=self.survey_page,
+            label="Выберите самую любимую IDE",
+            field_type='singleline',
+        )
+
+        self.assertEqual(SurveyField.objects.get(id=field.id).clean_name, 'vyberite-samuiu-liubimuiu-ide')
+
+    def test_clean_name_follows_label(self):
+        field = SurveyField.objects.get(page=self.survey_page, label="Your name")
+        field.label = "Your full name"
+        field.save()
+
+        self.assertEqual(SurveyField.objects.get(id=field.id).clean_name, 'your-full-name')
+
+    def test_clean_name_is_set_on_clean(self):
+        field = SurveyField(page=self.survey_page, label="Your age", field_type='number')
+        field.clean()
+
+        self.assertEqual(field.clean_name, 'your-age')
+
+    def test_clean_name_is_not_recomputed_on_read(self):
+        field = SurveyField.objects.get(page=self.survey_page, label="Your name")
+
+        with mock.patch('wagtailsurveys.models.unidecode') as unidecode:
+            self.survey_page.get_data_fields()
+            self.assertEqual(field.clean_name, 'your-name')
+
+        self.assertFalse(unidecode.called)
+
+
+class TestSurveyResults(TestCase, WagtailTestUtils):
+    def setUp(self):
+        # Create a survey page
+        self.survey_page = tests_utils.make_survey_page()
+
+    def post_survey(self, choices):
+        return self.client.post('/let-us-know/', {
+            'your-name': 'Bob',
+            'your-biography': 'hello world',
+            'your-choices': choices,
+        })
+
+    def test_results_are_counted_on_submission(self):
+        self.post_survey(['foo', 'bar'])
+        self.post_survey(['bar'])
+        self.post_survey([])
+
+        counts = SurveyResult.objects.get_counts(self.survey_page)
+        self.assertEqual(counts['your-choices'], {'foo': 1, 'bar': 2})
+
+        # Free text answers are not counted
+        self.assertFalse(SurveyResult.objects.filter(field_name='your-name').exists())
+
+    def test_get_results(self):
+        self.post_survey(['baz'])
+        self.post_survey(['baz', 'foo'])
+
+        with self.assertNumQueries(2):
+            results = self.survey_page.get_results()
+
+        self.assertEqual(list(results.keys()), ["Your choices"])
+        self.assertEqual(list(results["Your choices"].items()), [('foo', 1), ('bar', 0), ('baz', 2)])
+
+    def test_delete_submission_updates_results(self):
+        self.post_survey(['foo'])
+        self.post_survey(['foo'])
+
+        self.survey_page.delete_submission(FormSubmission.objects.first())
+
+        self.assertEqual(self.survey_page.get_results()["Your choices"]['foo'], 1)
+
+    def test_custom_submission_results(self):
+        survey_page = tests_utils.make_survey_page_with_custom_submission()
+        self.login()
+
+        self.client.post('/dont-touch-this-survey/', {
+            'your-name': 'Bob',
+            'your-biography': 'hello world',
+            'your-choices': ['foo'],
+        })
+
+        self.assertEqual(survey_page.get_results()["Your choices"]['foo'], 1)
+
+    def test_rebuild_survey_results(self):
+        for choices in (['foo'], ['foo', 'bar'], 'baz'):
+            FormSubmission.objects.create(
+                page=self.survey_page,
+                form_data=json.dumps({'your-name': 'Bob', 'your-choices': choices}),
+            )
+        SurveyResult.objects.create(page=self.survey_page, field_name='your-choices', answer='foo', count=42)
+
+        call_command('rebuild_survey_results', str(self.survey_page.id), verbosity=0)
+
+        results = self.survey_page.get_results()
+        self.assertEqual(list(results["Your choices"].items()), [('foo', 2), ('bar', 1), ('baz', 1)])
+
+    def test_results_are_summed_across_shards(self):
+        self.survey_page.results_shards = 3
+        for i in range(20):
+            self.survey_page.update_results({'your-choices': ['foo']})
+        self.survey_page.update_results({'your-choices': ['foo']}, delta=-1)
+
+        self.assertEqual(self.survey_page.get_results()["Your choices"]['foo'], 19)
+        self.assertLessEqual(SurveyResult.objects.filter(page=self.survey_page, answer='foo').count(), 3)
+
+    def test_results_are_cached(self):
+        self.survey_page.results_cache_timeout = 60
+        self.post_survey(['foo'])
+        self.survey_page.get_results()
+
+        # Test settings use database cache, so getting cached counts is a query too
+        with mock.patch.object(SurveyResult.objects, 'get_counts') as get_counts:
+            results = self.survey_page.get_results()
+
+        self.assertFalse(get_counts.called)
+        self.assertEqual(results["Your choices"]['foo'], 1)
+
+
+class TestFormSubmissionData(TestCase):
+    def test_form_data_round_trip(self):
+        submission = FormSubmission()
+        submission.set_form_data({
+            'your-name': "Bob",
+            'your-number': Decimal('7.3'),
+            'your-birthday': datetime.date(2000, 1, 2),
+        })
+
+        self.assertEqual(submission.get_form_data(), {
+            'your-name': "Bob",
+            'your-number': '7.3',
+            'your-birthday': '2000-01-02',
+        })
+
+
+class TestSubmissionAnswers(TestCase):
+    def setUp(self):
+        # Create a survey page
+        self.survey_page = tests_utils.make_survey_page()
+
+        store_answers = mock.patch.object(SurveyPage, 'store_answers', True)
+        store_answers.start()
+        self.addCleanup(store_answers.stop)
+
+    def post_survey(self, name, choices):
+        return self.client.post('/let-us-know/', {
+            'your-name': name,
+            'your-biography': 'hello world',
+            'your-choices': choices,
+        })
+
+    def test_answers_are_stored_on_submission(self):
+        self.post_survey('Bob', ['foo', 'bar'])
+
+        submission = FormSubmission.objects.get()
+        self.assertEqual(
+            sorted(SubmissionAnswer.objects.filter(submission_id=submission.id).values_list('field_name', 'value')),
+            [
+                ('your-biography', 'hello world'),
+                ('your-choices', 'bar'),
+                ('your-choices', 'foo'),
+                ('your-name', 'Bob'),
+            ]
+        )
+
+    def test_answers_are_not_stored_by_default(self):
+        with mock.patch.object(SurveyPage, 'store_answers', False):
+            self.post_survey('Bob', ['foo'])
+
+        self.assertFalse(SubmissionAnswer.objects.exists())
+
+    def test_count_answers(self):
+        self.post_survey('Bob', ['foo', 'bar'])
+        self.post_survey('Bob', ['foo'])
+        self.post_survey('Alice', ['baz'])
+
+        self.assertEqual(
+            SubmissionAnswer.objects.count_answers(self.survey_page, 'your-choices'),
+            {'foo': 2, 'bar': 1, 'baz': 1}
+        )
+        self.assertEqual(
+            SubmissionAnswer.objects.count_answers(self.survey_page, 'your-name', filters={'your-choices': 'foo'}),
+            {'Bob': 2}
+        )
+
+    def test_delete_submission_deletes_answers(self):
+        self.post_survey('Bob', ['foo'])
+
+        self.survey_page.delete_submission(FormSubmission.objects.get())
+
+        self.assertFalse(SubmissionAnswer.objects.exists())
+
+
+class TestSurveyTypesRegistry(TestCase):
+    def setUp(self):
+        self.registry = SurveyTypesRegistry()
+
+    def test_get_models(self):
+        self.assertEqual(
+            set(self.registry.get_models()),
+            {SurveyPage, SurveyWithCustomSubmissionPage, CompactSurveyPage}
+        )
+
+    def test_get_content_types(self):
+        ContentType.objects.clear_cache()
+
+        with self.assertNumQueries(1):
+            content_types = self.registry.get_content_types()
+
+        self.assertEqual(
+            {content_type.model_class() for content_type in content_types},
+            {SurveyPage, SurveyWithCustomSubmissionPage, CompactSurveyPage}
+        )
+
+        # Check that content types are kept
+        with self.assertNumQueries(0):
+            self.assertIs(self.registry.get_content_types(), content_types)
+
+    def test_content_types_are_looked_up_once_by_concurrent_threads(self):
+        results = []
+        with mock.patch.object(
+            ContentType.objects, 'get_for_models', wraps=ContentType.objects.get_for_models
+        ) as get_for_models:
+            threads = [
+                threading.Thread(target=lambda: results.append(self.registry.get_content_types()))
+                for i in range(5)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(get_for_models.call_count, 1)
+        self.assertEqual(len(results), 5)
+        for content_types in results:
+            self.assertIs(content_types, results[0])
+
+    def test_reset(self):
+        content_types = self.registry.get_content_types()
+
+        self.registry.reset()
+
+        self.assertIsNot(self.registry.get_content_types(), content_types)
+
+
+class TestGetSubmissionStats(TestCase):
+    fixtures = ['test.json']
+
+    def setUp(self):
+        self.survey_pages = list(Page.objects.filter(
+            url_path__in=['/home/let-us-know/', '/home/dont-touch-this-survey/']
+        ))
+
+        # Fill content types cache, so it doesn't affect query counts
+        get_submission_stats(self.survey_pages)
+
+    def test_queries(self):
+        # Pages, a query per specific page type, a query per submission model and one for archives
+        with self.assertNumQueries(6):
+            stats = get_submission_stats(self.survey_pages)
+
+        self.assertEqual([stats[page.pk]['count'] for page in self.survey_pages], [2, 2])
+
+    def test_queries_with_tracked_stats(self):
+        survey_page = SurveyPage.objects.get(url_path='/home/let-us-know/')
+        with mock.patch.object(SurveyPage, 'track_submission_stats', True):
+            SurveyStats.objects.rebuild(survey_page)
+
+            # Statistics of the tracked page are read instead of counting its submissions
+            with self.assertNumQueries(6):
+                stats = get_submission_stats(self.survey_pages)
+
+        self.assertEqual(stats[survey_page.pk]['count'], 2)
+
+
+class TestSurveyStats(TestCase):
+    def setUp(self):
+        # Create a survey page
+        self.survey_page = tests_utils.make_survey_page()
+
+        track_submission_stats = mock.patch.object(SurveyPage, 'track_submission_stats', True)
+        track_submission_stats.start()
+        self.addCleanup(track_submission_stats.stop)
+
+    def post_survey(self):
+        return self.client.post('/let-us-know/', {
+            'your-name': 'Bob',
+            'your-biography': 'hello world',
+            'your-choices': ['foo'],
+        })
+
+    def get_survey_page(self):
+        return SurveyPage.objects.get(id=self.survey_page.id)
+
+    def test_stats_are_updated_on_submission(self):
+        self.post_survey()
+        self.post_survey()
+
+        latest_submission = FormSubmission.objects.latest('created_at')
+        stats = SurveyStats.objects.get(page=self.survey_page)
+        self.assertEqual(stats.submission_count, 2)
+        self.assertEqual(stats.last_submitted_at, latest_submission.created_at)
+
+        # Check that properties don't count submissions
+        survey_page = self.get_survey_page()
+        with self.assertNumQueries(1):
+            self.assertEqual(survey_page.submission_count, 2)
+            self.assertEqual(survey_page.last_submitted_at, latest_submission.created_at)
+
+    def test_stats_include_submissions_saved_before_tracking(self):
+        with mock.patch.object(SurveyPage, 'track_submission_stats', False):
+            self.post_survey()
+
+        self.assertFalse(SurveyStats.objects.exists())
+
+        self.post_survey()
+
+        self.assertEqual(SurveyStats.objects.get(page=self.survey_page).submission_count, 2)
+
+    def test_stats_are_updated_on_delete(self):
+        self.post_survey()
+        self.post_survey()
+        first_submission, last_submission = FormSubmission.objects.order_by('created_at', 'id')
+
+        self.survey_page.delete_submission(last_submission)
+
+        stats = SurveyStats.objects.get(page=self.survey_page)
+        self.assertEqual(stats.submission_count, 1)
+        self.assertEqual(stats.last_submitted_at, first_submission.created_at)
+
+    def test_delete_doesnt_count_submissions(self):
+        self.post_survey()
+        self.post_survey()
+
+        with CaptureQueriesContext(connection) as context:
+            self.survey_page.delete_submission(FormSubmission.objects.earliest('created_at'))
+
+        self.assertFalse([query for query in context.captured_queries if 'COUNT(' in query['sql']])
+        self.assertEqual(SurveyStats.objects.get(page=self.survey_page).submission_count, 1)
+
+    def test_properties_without_tracking(self):
+        with mock.patch.object(SurveyPage, 'track_submission_stats', False):
+            self.post_survey()
+
+            survey_page = self.get_survey_page()
+            self.assertEqual(survey_page.submission_count, 1)
+            self.assertEqual(survey_page.last_submitted_at, FormSubmission.objects.get().created_at)
+
+        self.assertFalse(SurveyStats.objects.exists())
+
+    def test_rebuild_survey_stats_command(self):
+        self.post_survey()
+        SurveyStats.objects.filter(page=self.survey_page).update(submission_count=10, last_submitted_at=None)
+
+        call_command('rebuild_survey_stats', verbosity=0)
+
+        stats = SurveyStats.objects.get(page=self.survey_page)
+        self.assertEqual(stats.submission_count, 1)
+        self.assertEqual(stats.last_submitted_at, FormSubmission.objects.get().created_at)
+
+
+class TestDeleteSubmissions(TestCase):
+    def setUp(self):
+        # Create a survey page
+        self.survey_page = tests_utils.make_survey_page()
+
+        for name in ('store_answers', 'track_submission_stats'):
+            patcher = mock.patch.object(SurveyPage, name, True)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def post_survey(self, choices):
+        return self.client.post('/let-us-know/', {
+            'your-name': 'Bob',
+            'your-biography': 'hello world',
+            'your-choices': choices,
+        })
+
+    def age_submissions(self, submissions, days):
+        submissions.update(created_at=timezone.now() - datetime.timedelta(days=days))
+
+    def test_delete_submissions_in_batches(self):
+        for choices in (['foo'], ['foo', 'bar'], ['bar'], ['baz'], ['foo']):
+            self.post_survey(choices)
+        first_id, second_id = FormSubmission.objects.order_by('id').values_list('id', flat=True)[:2]
+
+        deleted = self.survey_page.delete_submissions(
+            FormSubmission.objects.exclude(id__in=[first_id, second_id]), batch_size=2
+        )
+
+        self.assertEqual(deleted, 3)
+        self.assertEqual(sorted(FormSubmission.objects.values_list('id', flat=True)), [first_id, second_id])
+        self.assertEqual(
+            SurveyResult.objects.get_counts(self.survey_page)['your-choices'], {'foo': 2, 'bar': 1, 'baz': 0}
+        )
+        self.assertEqual(
+            set(SubmissionAnswer.objects.values_list('submission_id', flat=True)), {first_id, second_id}
+        )
+        self.assertEqual(SurveyStats.objects.get(page=self.survey_page).submission_count, 2)
+
+    def test_delete_submissions_updates_last_submitted_at_once(self):
+        for choices in (['foo'], ['bar'], ['baz'], ['foo']):
+            self.post_survey(choices)
+        first_submission = FormSubmission.objects.earliest('created_at')
+
+        with CaptureQueriesContext(connection) as context:
+            self.survey_page.delete_submissions(FormSubmission.objects.exclude(id=first_submission.id), batch_size=1)
+
+        max_queries = [query for query in context.captured_queries if 'MAX(' in query['sql']]
+        self.assertEqual(len(max_queries), 2)  # submissions table and archives
+        stats = SurveyStats.objects.get(page=self.survey_page)
+        self.assertEqual(stats.submission_count, 1)
+        self.assertEqual(stats.last_submitted_at, first_submission.created_at)
+
+    def test_delete_submissions_of_other_pages_is_ignored(self):
+        self.post_survey(['foo'])
+        other_page = tests_utils.make_survey_page_with_custom_submission()
+
+        self.assertEqual(other_page.delete_submissions(FormSubmission.objects.all()), 0)
+        self.assertEqual(FormSubmission.objects.count(), 1)
+
+    def test_purge_survey_submissions_command(self):
+        self.post_survey(['foo'])
+        self.post_survey(['bar'])
+        self.age_submissions(FormSubmission.objects.filter(form_data__contains='bar'), days=40)
+
+        stdout = StringIO()
+        call_command('purge_survey_submissions', older_than=30, batch_size=1, stdout=stdout)
+
+        self.assertIn("Deleted 1 submissions of 'Let us know!'", stdout.getvalue())
+        self.assertEqual(FormSubmission.objects.count(), 1)
+        self.assertEqual(SurveyResult.objects.get_counts(self.survey_page)['your-choices'], {'foo': 1, 'bar': 0})
+        self.assertEqual(SurveyStats.objects.get(page=self.survey_page).submission_count, 1)
+
+    def test_purge_survey_submissions_dry_run(self):
+        self.post_survey(['foo'])
+        self.age_submissions(FormSubmission.objects.all(), days=40)
+
+        stdout = StringIO()
+        call_command('purge_survey_submissions', str(self.survey_page.id), older_than=30, dry_run=True, stdout=stdout)
+
+        self.assertIn("Would delete 1 submissions", stdout.getvalue())
+        self.assertEqual(FormSubmission.objects.count(), 1)
+
+    def test_purge_survey_submissions_in_date_range(self):
+        self.post_survey(['foo'])
+        self.post_survey(['bar'])
+        self.age_submissions(FormSubmission.objects.filter(form_data__contains='bar'), days=40)
+        date_from = (timezone.now() - datetime.timedelta(days=41)).date()
+        date_to = (timezone.now() - datetime.timedelta(days=39)).date()
+
+        call_command(
+            'purge_survey_submissions', str(self.survey_page.id), date_from=date_from, date_to=date_to, verbosity=0
+        )
+
+        self.assertEqual([submission.get_data()['your-choices'] for submission in FormSubmission.objects.all()], [
+            ['foo']
+        ])
+        self.assertEqual(SurveyResult.objects.get_counts(self.survey_page)['your-choices'], {'foo': 1, 'bar': 0})
+
+    def test_purge_survey_submissions_requires_dates(self):
+        with self.assertRaises(CommandError):
+            call_command('purge_survey_submissions', verbosity=0)
+
+
+class TestFormSchema(TestCase, WagtailTestUtils):
+    def setUp(self):
+        self.survey_page = tests_utils.make_survey_page()
+
+    def post_survey(self, **data):
+        response = self.client.post('/let-us-know/', dict({
+            'your-name': 'Bob',
+            'your-biography': 'hello world',
+        }, **data))
+        self.assertEqual(response.status_code, 200)
+
+    def get_survey_page(self):
+        return SurveyPage.objects.get(pk=self.survey_page.pk)
+
+    def rename_field(self, clean_name, label):
+        field = SurveyField.objects.get(page=self.survey_page, clean_name=clean_name)
+        field.label = label
+        field.save()
+
+    def test_submissions_reference_schema(self):
+        self.post_survey()
+        self.post_survey()
+
+        schema = FormSchema.objects.get()
+        self.assertEqual(list(FormSubmission.objects.values_list('schema', flat=True)), [schema.pk, schema.pk])
+        self.assertEqual(schema.get_fields(), [
+            {'id': field.pk, 'name': field.clean_name, 'label': field.label, 'type': field.field_type}
+            for field in self.survey_page.get_form_fields()
+        ])
+
+    def test_schema_is_cached(self):
+        schema = self.survey_page.get_form_schema()
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.survey_page.get_form_schema(), schema)
+
+    def test_new_schema_after_fields_change(self):
+        self.post_survey()
+        self.rename_field('your-biography', "About you")
+        self.post_survey(**{'about-you': 'hello'})
+
+        self.assertEqual(FormSchema.objects.count(), 2)
+        first_submission, last_submission = FormSubmission.objects.order_by('id')
+        self.assertNotEqual(first_submission.schema_id, last_submission.schema_id)
+
+    def test_renamed_field(self):
+        self.post_survey()
+        self.rename_field('your-biography', "About you")
+        self.post_survey(**{'about-you': 'hi'})
+
+        data_fields, renames = self.get_survey_page().get_versioned_data_fields()
+
+        self.assertEqual([name for name, label in data_fields], [
+            'created_at', 'your-name', 'about-you', 'your-choices'
+        ])
+        self.assertEqual(
+            [get_versioned_data(submission, renames)['about-you'] for submission in FormSubmission.objects.all()],
+            ['hello world', 'hi']
+        )
+
+    def test_removed_field(self):
+        self.post_survey()
+        SurveyField.objects.get(page=self.survey_page, clean_name='your-biography').delete()
+        SurveyField.objects.create(
+            page=self.survey_page, sort_order=4, label="Your biography", field_type='number', required=False
+        )
+        self.post_survey(**{'your-biography': '5'})
+
+        data_fields, renames = self.get_survey_page().get_versioned_data_fields()
+
+        # The new field took the name of the removed one, so answers to the removed question are dropped
+        self.assertEqual([name for name, label in data_fields], [
+            'created_at', 'your-name', 'your-choices', 'your-biography'
+        ])
+        self.assertEqual(
+            [
+                get_versioned_data(submission, renames).get('your-biography')
+                for submission in FormSubmission.objects.all()
+            ],
+            [None, '5']
+        )
+
+    def test_removed_field_is_kept_in_data_fields(self):
+        self.post_survey()
+        SurveyField.objects.get(page=self.survey_page, clean_name='your-biography').delete()
+        self.post_survey()
+
+        data_fields, renames = self.get_survey_page().get_versioned_data_fields()
+
+        self.assertEqual(data_fields[-1], ('your-biography', "Your biography"))
+        self.assertEqual(get_versioned_data(FormSubmission.objects.first(), renames)['your-biography'], 'hello world')
+
+    def test_schemas_are_looked_up_once(self):
+        for label in ["About you", "Tell us about you", "Biography"]:
+            clean_name = SurveyField.objects.get(page=self.survey_page, sort_order=2).clean_name
+            self.post_survey(**{clean_name: 'hello world'})
+            self.rename_field(clean_name, label)
+
+        self.assertEqual(FormSubmission.objects.count(), 3)
+
+        survey_page = self.get_survey_page()
+
+        # Data fields, schemas and current form fields
+        with self.assertNumQueries(3):
+            data_fields, renames = survey_page.get_versioned_data_fields()
+
+        self.assertEqual(len(renames), 3)
+        self.assertEqual(
+            {get_versioned_data(submission, renames)['biography'] for submission in FormSubmission.objects.all()},
+            {'hello world'}
+        )
+
+    def test_submissions_without_schema(self):
+        FormSubmission.objects.create(page=self.survey_page, form_data=json.dumps({'your-name': 'Alice'}))
+        self.rename_field('your-name', "Name")
+        self.post_survey(name='Bob')
+
+        data_fields, renames = self.get_survey_page().get_versioned_data_fields()
+
+        self.assertEqual(get_versioned_data(FormSubmission.objects.get(schema=None), renames)['your-name'], 'Alice')
+
+    def test_csv_export_of_versions(self):
+        self.post_survey()
+        self.rename_field('your-biography', "About you")
+        self.post_survey(**{'about-you': 'hi'})
+        SurveyField.objects.get(page=self.survey_page, clean_name='your-name').delete()
+
+        self.login()
+        response = self.client.get(
+            reverse('wagtailsurveys:list_submissions', args=(self.survey_page.id,)), {'action': 'CSV'}
+        )
+
+        lines = b''.join(response.streaming_content).decode('utf-8').splitlines()
+        self.assertEqual(lines[0], 'Submission Date,About you,Your choices,Your name')
+        self.assertTrue(lines[1].endswith(',hello world,[],Bob'))
+        self.assertTrue(lines[2].endswith(',hi,[],Bob'))
+
+
+class TestSubmissionData(TestCase, WagtailTestUtils):
+    def setUp(self):
+        self.survey_page = tests_utils.make_survey_page()
+        self.submission = FormSubmission.objects.create(
+            page=self.survey_page,
+            form_data=json.dumps({'your-name': 'Bob', 'your-choices': ['foo']}),
+        )
+
+    def test_decoded_data_is_kept(self):
+        with mock.patch('wagtailsurveys.models.codec.loads', wraps=json.loads) as loads:
+            self.submission.get_data()
+            self.submission.get_data()
+            self.submission.get_form_data()
+
+        self.assertEqual(loads.call_count, 1)
+
+    def test_assigning_form_data_resets_decoded_data(self):
+        self.assertEqual(self.submission.get_data()['your-name'], 'Bob')
+
+        self.submission.set_form_data({'your-name': 'Alice'})
+        self.assertEqual(self.submission.get_data()['your-name'], 'Alice')
+
+        self.submission.form_data = json.dumps({'your-name': 'Eve'})
+        self.assertEqual(self.submission.get_data()['your-name'], 'Eve')
+
+    def test_returned_data_can_be_modified(self):
+        data = self.submission.get_form_data()
+        data['your-name'] = 'Alice'
+
+        self.assertEqual(self.submission.get_data()['your-name'], 'Bob')
+
+    def test_get_row(self):
+        self.assertEqual(
+            self.submission.get_row(['created_at', 'your-choices', 'missing', None]),
+            (self.submission.created_at, ['foo'], None, None)
+        )
+
+    def test_get_row_with_custom_get_data(self):
+        user = self.create_test_user()
+        submission = CustomSubmission.objects.create(
+            page=self.survey_page, user=user, form_data=json.dumps({'your-name': 'Bob'})
+        )
+
+        self.assertEqual(submission.get_row(['username', 'your-name']), (user.username, 'Bob'))
+
+
+class TestLoadSubmissions(TestCase, WagtailTestUtils):
+    def setUp(self):
+        self.survey_page = tests_utils.make_survey_page()
+        self.user = self.create_test_user()
+        for name in ['Alice', 'Bob']:
+            CustomSubmission.objects.create(
+                page=self.survey_page, user=self.user, form_data=json.dumps({'your-name': name})
+            )
+
+    def test_can_read_values(self):
+        self.assertTrue(FormSubmission.can_read_values())
+        self.assertTrue(CustomSubmission.can_read_values())
+
+        with mock.patch.object(CustomSubmission, 'extra_data_fields', None):
+            self.assertFalse(CustomSubmission.can_read_values())
+
+    def test_load_submissions(self):
+        submissions = CustomSubmission.objects.filter(page=self.survey_page).order_by('id')
+
+        with self.assertNumQueries(1):
+            values = load_submissions(submissions)
+            rows = [submission.get_row(['your-name', 'username', 'created_at']) for submission in values]
+
+        self.assertTrue(all(isinstance(submission, SubmissionValues) for submission in values))
+        self.assertEqual(rows, [
+            submission.get_row(['your-name', 'username', 'created_at']) for submission in submissions
+        ])
+        self.assertEqual(
+            [submission.get_data() for submission in values],
+            [submission.get_data() for submission in submissions]
+        )
+        self.assertEqual([submission.pk for submission in values], [submission.pk for submission in submissions])
+
+    def test_load_submissions_as_instances(self):
+        with mock.patch.object(CustomSubmission, 'extra_data_fields', None):
+            submissions = load_submissions(CustomSubmission.objects.all())
+
+        self.assertTrue(all(isinstance(submission, CustomSubmission) for submission in submissions))
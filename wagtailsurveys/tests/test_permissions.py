@@ -0,0 +1,146 @@
+from __future__ import unicode_literals
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.core.cache import caches
+from django.test import RequestFactory, TestCase, override_settings
+try:
+    from wagtail.core.models import GroupPagePermission, Page
+except ImportError:  # fallback for Wagtail <2.0
+    from wagtail.wagtailcore.models import GroupPagePermission, Page
+
+from wagtailsurveys.permissions import (
+    get_survey_ids_for_request, get_survey_ids_for_user, user_can_access_submissions)
+
+
+PERMISSIONS_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'cache',
+    },
+    'permissions': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'wagtailsurveys-permissions',
+    },
+}
+
+
+class TestSurveyIdsForUser(TestCase):
+    fixtures = ['test.json']
+
+    def setUp(self):
+        self.survey_page = Page.objects.get(url_path='/home/let-us-know/')
+        self.custom_survey_page = Page.objects.get(url_path='/home/dont-touch-this-survey/')
+
+    def get_user(self, username):
+        return get_user_model().objects.get(username=username)
+
+    def test_survey_ids(self):
+        self.assertEqual(
+            get_survey_ids_for_user(self.get_user('siteeditor')),
+            {self.survey_page.id, self.custom_survey_page.id}
+        )
+        self.assertEqual(get_survey_ids_for_user(self.get_user('justuser')), frozenset())
+
+    def test_survey_ids_are_memoised_per_request(self):
+        request = RequestFactory().get('/')
+        request.user = self.get_user('siteeditor')
+
+        survey_ids = get_survey_ids_for_request(request)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(get_survey_ids_for_request(request), survey_ids)
+
+
+@override_settings(CACHES=PERMISSIONS_CACHES, WAGTAILSURVEYS_PERMISSIONS_CACHE='permissions')
+class TestSurveyIdsCache(TestCase):
+    fixtures = ['test.json']
+
+    def setUp(self):
+        self.survey_page = Page.objects.get(url_path='/home/let-us-know/')
+
+        # Database changes are rolled back after each test, but the cache is not
+        caches['permissions'].clear()
+
+    def get_user(self, username):
+        return get_user_model().objects.get(username=username)
+
+    def test_survey_ids_are_cached(self):
+        survey_ids = get_survey_ids_for_user(self.get_user('siteeditor'))
+        user = self.get_user('siteeditor')
+
+        with self.assertNumQueries(0):
+            self.assertEqual(get_survey_ids_for_user(user), survey_ids)
+
+    def test_cache_is_invalidated_by_page_permissions(self):
+        self.assertEqual(get_survey_ids_for_user(self.get_user('justuser')), frozenset())
+
+        group = Group.objects.create(name="Survey editors")
+        group.user_set.add(self.get_user('justuser'))
+        GroupPagePermission.objects.create(group=group, page=self.survey_page, permission_type='edit')
+
+        self.assertEqual(get_survey_ids_for_user(self.get_user('justuser')), {self.survey_page.id})
+
+        GroupPagePermission.objects.filter(group=group).delete()
+
+        self.assertEqual(get_survey_ids_for_user(self.get_user('justuser')), frozenset())
+
+    def test_cache_is_invalidated_by_user_groups(self):
+        self.assertTrue(get_survey_ids_for_user(self.get_user('siteeditor')))
+
+        self.get_user('siteeditor').groups.clear()
+
+        self.assertEqual(get_survey_ids_for_user(self.get_user('siteeditor')), frozenset())
+
+    def test_cache_is_invalidated_by_survey_pages(self):
+        survey_ids = get_survey_ids_for_user(self.get_user('siteeditor'))
+
+        self.survey_page.specific.delete()
+
+        self.assertEqual(
+            get_survey_ids_for_user(self.get_user('siteeditor')),
+            survey_ids - {self.survey_page.id}
+        )
+
+    def test_superuser_flag_is_part_of_cache_key(self):
+        user = self.get_user('justuser')
+        self.assertEqual(get_survey_ids_for_user(user), frozenset())
+
+        user.is_superuser = True
+        user.save()
+
+        self.assertIn(self.survey_page.id, get_survey_ids_for_user(user))
+
+
+class TestUserCanAccessSubmissions(TestCase):
+    fixtures = ['test.json']
+
+    def setUp(self):
+        self.survey_page = Page.objects.get(url_path='/home/let-us-know/')
+
+    def get_user(self, username):
+        return get_user_model().objects.get(username=username)
+
+    def test_user_with_permissions(self):
+        user = self.get_user('siteeditor')
+
+        # Only permissions of the user's groups are queried
+        with self.assertNumQueries(1):
+            self.assertTrue(user_can_access_submissions(user, self.survey_page))
+
+    def test_user_without_permissions(self):
+        self.assertFalse(user_can_access_submissions(self.get_user('eventeditor'), self.survey_page))
+        self.assertFalse(user_can_access_submissions(self.get_user('justuser'), self.survey_page))
+
+    def test_superuser(self):
+        user = self.get_user('justuser')
+        user.is_superuser = True
+
+        with self.assertNumQueries(0):
+            self.assertTrue(user_can_access_submissions(user, self.survey_page))
+
+    def test_page_which_is_not_a_survey(self):
+        user = self.get_user('justuser')
+        user.is_superuser = True
+
+        self.assertFalse(user_can_access_submissions(user, Page.objects.get(url_path='/home/')))
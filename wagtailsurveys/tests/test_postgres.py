@@ -0,0 +1,57 @@
+from __future__ import unicode_literals
+
+import json
+import unittest
+
+import mock
+from django.db import connection
+from django.test import TestCase
+
+from wagtailsurveys.models import FormSubmission
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', "PostgreSQL is required")
+class TestCopyFormDataToJSON(TestCase):
+    fixtures = ['test.json']
+
+    def setUp(self):
+        # DDL is transactional in PostgreSQL, so the column is dropped with the test transaction
+        with connection.cursor() as cursor:
+            cursor.execute('ALTER TABLE %s ADD COLUMN form_data_json jsonb' % FormSubmission._meta.db_table)
+
+        model = mock.Mock(objects=FormSubmission.objects)
+        model._meta.db_table = FormSubmission._meta.db_table
+        model._meta.pk.column = FormSubmission._meta.pk.column
+        model._meta.get_field = lambda name: mock.Mock(column=name)
+        self.apps = mock.Mock(get_model=mock.Mock(return_value=model))
+
+    def get_copied_data(self):
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT form_data, form_data_json FROM %s' % FormSubmission._meta.db_table)
+            return cursor.fetchall()
+
+    def test_copy_in_batches(self):
+        from wagtailsurveys.contrib.postgres import copy_form_data_to_json
+
+        copy_form_data_to_json('wagtailsurveys', 'FormSubmission', batch_size=1)(self.apps, connection.schema_editor())
+
+        rows = self.get_copied_data()
+        self.assertEqual(len(rows), 2)
+        for form_data, form_data_json in rows:
+            self.assertEqual(form_data_json, json.loads(form_data))
+
+    def test_copy_only_missing(self):
+        from wagtailsurveys.contrib.postgres import copy_form_data_to_json
+
+        with connection.cursor() as cursor:
+            cursor.execute('UPDATE %s SET form_data_json = \'{}\'' % FormSubmission._meta.db_table)
+        FormSubmission.objects.create(page_id=FormSubmission.objects.first().page_id, form_data='{"a": 1}')
+
+        copy_form_data_to_json('wagtailsurveys', 'FormSubmission', only_missing=True)(
+            self.apps, connection.schema_editor()
+        )
+
+        self.assertEqual(
+            sorted((form_data_json for form_data, form_data_json in self.get_copied_data()), key=len),
+            sorted([{}, {}, {'a': 1}], key=len)
+        )
@@ -1,11 +1,17 @@
 # -*- coding: utf-8 -*-
 from __future__ import unicode_literals
 
+import datetime
 import json
 
+import mock
+
 from django.contrib.auth import get_user_model
 from django.core.urlresolvers import reverse
-from django.test import TestCase
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 try:
     from wagtail.core.models import Page
 except ImportError:  # fallback for Wagtail <2.0
@@ -13,7 +19,8 @@ except ImportError:  # fallback for Wagtail <2.0
 
 from wagtail.tests.utils import WagtailTestUtils
 from wagtailsurveys.models import FormSubmission
-from wagtailsurveys.tests.testapp.models import SurveyPage, CustomSubmission, SurveyField
+from wagtailsurveys.tests.testapp.models import (
+    SurveyPage, CustomSubmission, SurveyField, SurveyWithCustomSubmissionPage)
 from wagtailsurveys.tests import utils as tests_utils
 
 
@@ -43,6 +50,38 @@ class TestSurveysIndex(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertTemplateUsed(response, 'wagtailsurveys/index.html')
 
+    def test_survey_index_submission_stats(self):
+        response = self.client.get(reverse('wagtailsurveys:index'))
+
+        # Check that pages have statistics of their submissions
+        survey_pages = {page.id: page for page in response.context['survey_pages']}
+        stats = survey_pages[self.survey_page.id].submission_stats
+        self.assertEqual(stats['count'], 2)
+        self.assertEqual(
+            stats['last_submitted_at'],
+            FormSubmission.objects.filter(page=self.survey_page).latest('created_at').created_at
+        )
+        self.assertContains(response, '<td>2</td>', html=True)
+
+    def count_index_queries(self):
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(reverse('wagtailsurveys:index'))
+
+        return len(context.captured_queries)
+
+    def test_survey_index_submission_stats_queries(self):
+        # Fill process-wide caches, such as content types, so they don't affect query counts
+        self.client.get(reverse('wagtailsurveys:index'))
+        queries = self.count_index_queries()
+
+        # Check that more pages with submissions don't add queries
+        self.make_survey_pages()
+        for page in SurveyPage.objects.filter(slug__startswith='survey-'):
+            FormSubmission.objects.create(page=page, form_data='{}')
+
+        # (the page with a custom submission model moves off the first page of the listing)
+        self.assertLessEqual(self.count_index_queries(), queries)
+
     def test_survey_index_pagination(self):
         # Create some more survey pages to make pagination kick in
         self.make_survey_pages()
@@ -184,20 +223,55 @@ class TestFormsSubmissionsList(TestCase, WagtailTestUtils):
     def test_list_submissions_pagination(self):
         self.make_list_submissions()
 
-        response = self.client.get(reverse('wagtailsurveys:list_submissions', args=(self.survey_page.id,)), {'p': 2})
+        response = self.client.get(reverse('wagtailsurveys:list_submissions', args=(self.survey_page.id,)))
+        first_page = response.context['submissions']
+
+        # Check that we got the first page
+        self.assertEqual(len(first_page), 20)
+        self.assertFalse(first_page.has_previous())
+        self.assertTrue(first_page.has_next())
+
+        response = self.client.get(
+            reverse('wagtailsurveys:list_submissions', args=(self.survey_page.id,)),
+            {'after': first_page.next_cursor()}
+        )
 
         # Check response
         self.assertEqual(response.status_code, 200)
         self.assertTemplateUsed(response, 'wagtailsurveys/index_submissions.html')
 
-        # Check that we got the correct page
-        self.assertEqual(response.context['submissions'].number, 2)
+        # Check that we got the second page
+        second_page = response.context['submissions']
+        self.assertEqual(len(second_page), 20)
+        self.assertTrue(second_page.has_previous())
+        self.assertTrue(second_page.has_next())
+        self.assertFalse(set(s.id for s in first_page) & set(s.id for s in second_page))
+
+        response = self.client.get(
+            reverse('wagtailsurveys:list_submissions', args=(self.survey_page.id,)),
+            {'before': second_page.previous_cursor()}
+        )
+
+        # Check that we got back to the first page
+        self.assertEqual([s.id for s in response.context['submissions']], [s.id for s in first_page])
+        self.assertFalse(response.context['submissions'].has_previous())
+
+    def test_list_submissions_pagination_keeps_filters(self):
+        self.make_list_submissions()
+
+        response = self.client.get(
+            reverse('wagtailsurveys:list_submissions', args=(self.survey_page.id,)),
+            {'date_from': '01/01/2014'}
+        )
+
+        # Check that the link to the next page keeps the filter
+        self.assertContains(response, 'date_from=01%2F01%2F2014&amp;after=')
 
     def test_list_submissions_pagination_invalid(self):
         self.make_list_submissions()
 
         response = self.client.get(
-            reverse('wagtailsurveys:list_submissions', args=(self.survey_page.id,)), {'p': 'Hello World!'}
+            reverse('wagtailsurveys:list_submissions', args=(self.survey_page.id,)), {'after': 'Hello World!'}
         )
 
         # Check response
@@ -205,22 +279,27 @@ class TestFormsSubmissionsList(TestCase, WagtailTestUtils):
         self.assertTemplateUsed(response, 'wagtailsurveys/index_submissions.html')
 
         # Check that we got page one
-        self.assertEqual(response.context['submissions'].number, 1)
+        self.assertFalse(response.context['submissions'].has_previous())
+        self.assertEqual(len(response.context['submissions']), 20)
 
-    def test_list_submissions_pagination_out_of_range(self):
+    def test_list_submissions_pagination_last_page(self):
         self.make_list_submissions()
 
-        response = self.client.get(
-            reverse('wagtailsurveys:list_submissions', args=(self.survey_page.id,)),
-            {'p': 99999}
-        )
+        after = None
+        for page_number in range(6):
+            response = self.client.get(
+                reverse('wagtailsurveys:list_submissions', args=(self.survey_page.id,)),
+                {'after': after} if after else {}
+            )
+            after = response.context['submissions'].next_cursor()
 
         # Check response
         self.assertEqual(response.status_code, 200)
         self.assertTemplateUsed(response, 'wagtailsurveys/index_submissions.html')
 
         # Check that we got the last page
-        self.assertEqual(response.context['submissions'].number, response.context['submissions'].paginator.num_pages)
+        self.assertEqual(len(response.context['submissions']), 2)
+        self.assertFalse(response.context['submissions'].has_next())
 
 
 class TestCustomFormsSubmissionsList(TestCase, WagtailTestUtils):
@@ -293,6 +372,19 @@ class TestCustomFormsSubmissionsList(TestCase, WagtailTestUtils):
         self.assertContains(response, '<td>user-m1kola</td>', html=True)
         self.assertContains(response, '<td>user-john</td>', html=True)
 
+    def test_list_submissions_reads_values(self):
+        # Extra data fields are read with submissions, without loading model instances or users
+        with mock.patch.object(CustomSubmission, 'from_db', side_effect=AssertionError):
+            response = self.client.get(reverse('wagtailsurveys:list_submissions', args=(self.survey_page.id,)))
+
+        self.assertContains(response, '<td>user-m1kola</td>', html=True)
+
+        # Submissions are read as model instances when `get_data` adds undeclared data
+        with mock.patch.object(CustomSubmission, 'extra_data_fields', None):
+            response = self.client.get(reverse('wagtailsurveys:list_submissions', args=(self.survey_page.id,)))
+
+        self.assertContains(response, '<td>user-m1kola</td>', html=True)
+
     def test_list_submissions_filtering_date_from(self):
         response = self.client.get(
             reverse('wagtailsurveys:list_submissions', args=(self.survey_page.id, )), {'date_from': '01/01/2014'}
@@ -339,24 +431,59 @@ class TestCustomFormsSubmissionsList(TestCase, WagtailTestUtils):
     def test_list_submissions_pagination(self):
         self.make_list_submissions()
 
-        response = self.client.get(reverse('wagtailsurveys:list_submissions', args=(self.survey_page.id,)), {'p': 2})
+        response = self.client.get(reverse('wagtailsurveys:list_submissions', args=(self.survey_page.id,)))
+        first_page = response.context['submissions']
+
+        # Check that we got the first page
+        self.assertEqual(len(first_page), 20)
+        self.assertFalse(first_page.has_previous())
+        self.assertTrue(first_page.has_next())
+
+        response = self.client.get(
+            reverse('wagtailsurveys:list_submissions', args=(self.survey_page.id,)),
+            {'after': first_page.next_cursor()}
+        )
 
         # Check response
         self.assertEqual(response.status_code, 200)
         self.assertTemplateUsed(response, 'wagtailsurveys/index_submissions.html')
 
-        # Check that we got the correct page
-        self.assertEqual(response.context['submissions'].number, 2)
+        # Check that we got the second page
+        second_page = response.context['submissions']
+        self.assertEqual(len(second_page), 20)
+        self.assertTrue(second_page.has_previous())
+        self.assertTrue(second_page.has_next())
+        self.assertFalse(set(s.id for s in first_page) & set(s.id for s in second_page))
 
         # CustomSubmission have custom field. This field should appear in the list
         self.assertContains(response, '<th>Username</th>', html=True)
         self.assertContains(response, 'generated-username-', count=20)
 
+        response = self.client.get(
+            reverse('wagtailsurveys:list_submissions', args=(self.survey_page.id,)),
+            {'before': second_page.previous_cursor()}
+        )
+
+        # Check that we got back to the first page
+        self.assertEqual([s.id for s in response.context['submissions']], [s.id for s in first_page])
+        self.assertFalse(response.context['submissions'].has_previous())
+
+    def test_list_submissions_pagination_keeps_filters(self):
+        self.make_list_submissions()
+
+        response = self.client.get(
+            reverse('wagtailsurveys:list_submissions', args=(self.survey_page.id,)),
+            {'date_from': '01/01/2014'}
+        )
+
+        # Check that the link to the next page keeps the filter
+        self.assertContains(response, 'date_from=01%2F01%2F2014&amp;after=')
+
     def test_list_submissions_pagination_invalid(self):
         self.make_list_submissions()
 
         response = self.client.get(
-            reverse('wagtailsurveys:list_submissions', args=(self.survey_page.id,)), {'p': 'Hello World!'}
+            reverse('wagtailsurveys:list_submissions', args=(self.survey_page.id,)), {'after': 'Hello World!'}
         )
 
         # Check response
@@ -364,25 +491,30 @@ class TestCustomFormsSubmissionsList(TestCase, WagtailTestUtils):
         self.assertTemplateUsed(response, 'wagtailsurveys/index_submissions.html')
 
         # Check that we got page one
-        self.assertEqual(response.context['submissions'].number, 1)
+        self.assertFalse(response.context['submissions'].has_previous())
+        self.assertEqual(len(response.context['submissions']), 20)
 
         # CustomSubmission have custom field. This field should appear in the list
         self.assertContains(response, '<th>Username</th>', html=True)
 
-    def test_list_submissions_pagination_out_of_range(self):
+    def test_list_submissions_pagination_last_page(self):
         self.make_list_submissions()
 
-        response = self.client.get(
-            reverse('wagtailsurveys:list_submissions', args=(self.survey_page.id,)),
-            {'p': 99999}
-        )
+        after = None
+        for page_number in range(6):
+            response = self.client.get(
+                reverse('wagtailsurveys:list_submissions', args=(self.survey_page.id,)),
+                {'after': after} if after else {}
+            )
+            after = response.context['submissions'].next_cursor()
 
         # Check response
         self.assertEqual(response.status_code, 200)
         self.assertTemplateUsed(response, 'wagtailsurveys/index_submissions.html')
 
         # Check that we got the last page
-        self.assertEqual(response.context['submissions'].number, response.context['submissions'].paginator.num_pages)
+        self.assertEqual(len(response.context['submissions']), 2)
+        self.assertFalse(response.context['submissions'].has_next())
 
         # CustomSubmission have custom field. This field should appear in the list
         self.assertContains(response, '<th>Username</th>', html=True)
@@ -404,12 +536,49 @@ class TestFormsSubmissionsExport(TestCase, WagtailTestUtils):
 
         # Check response
         self.assertEqual(response.status_code, 200)
-        data_lines = response.content.decode().split("\n")
+        data_lines = b''.join(response.streaming_content).decode().split("\n")
 
         self.assertEqual(data_lines[0], 'Submission Date,Your name,Your biography,Your choices\r')
         self.assertEqual(data_lines[1], '2013-01-01 12:00:00+00:00,Mikalai,Airhead :),bar\r')
         self.assertEqual(data_lines[2], '2014-01-01 12:00:00+00:00,John,Genius,None\r')
 
+    def test_list_submissions_csv_export_is_streamed(self):
+        response = self.client.get(
+            reverse('wagtailsurveys:list_submissions', args=(self.survey_page.id,)),
+            {'action': 'CSV'}
+        )
+
+        # Check response
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertEqual(response['Content-Disposition'], 'attachment;filename=export.csv')
+
+    @override_settings(WAGTAILSURVEYS_EXPORT_CHUNK_SIZE=1)
+    def test_list_submissions_csv_export_in_chunks(self):
+        # Submissions with the same submit time must not be skipped between chunks
+        for name in ("Alice", "Bob"):
+            submission = FormSubmission.objects.create(
+                page=self.survey_page,
+                form_data=json.dumps({'your-name': name}),
+            )
+            submission.created_at = '2014-01-01T12:00:00.000Z'
+            submission.save()
+
+        response = self.client.get(
+            reverse('wagtailsurveys:list_submissions', args=(self.survey_page.id,)),
+            {'action': 'CSV'}
+        )
+
+        # Check response
+        self.assertEqual(response.status_code, 200)
+        data_lines = b''.join(response.streaming_content).decode().split("\n")
+
+        self.assertEqual(len(data_lines), 6)
+        self.assertEqual(data_lines[1], '2013-01-01 12:00:00+00:00,Mikalai,Airhead :),bar\r')
+        self.assertEqual(data_lines[2], '2014-01-01 12:00:00+00:00,John,Genius,None\r')
+        self.assertEqual(data_lines[3], '2014-01-01 12:00:00+00:00,Alice,None,None\r')
+        self.assertEqual(data_lines[4], '2014-01-01 12:00:00+00:00,Bob,None,None\r')
+
     def test_list_submissions_csv_export_with_date_from_filtering(self):
         response = self.client.get(
             reverse('wagtailsurveys:list_submissions', args=(self.survey_page.id,)),
@@ -418,7 +587,7 @@ class TestFormsSubmissionsExport(TestCase, WagtailTestUtils):
 
         # Check response
         self.assertEqual(response.status_code, 200)
-        data_lines = response.content.decode().split("\n")
+        data_lines = b''.join(response.streaming_content).decode().split("\n")
 
         self.assertEqual(data_lines[0], 'Submission Date,Your name,Your biography,Your choices\r')
         self.assertEqual(data_lines[1], '2014-01-01 12:00:00+00:00,John,Genius,None\r')
@@ -431,7 +600,7 @@ class TestFormsSubmissionsExport(TestCase, WagtailTestUtils):
 
         # Check response
         self.assertEqual(response.status_code, 200)
-        data_lines = response.content.decode().split("\n")
+        data_lines = b''.join(response.streaming_content).decode().split("\n")
 
         self.assertEqual(data_lines[0], 'Submission Date,Your name,Your biography,Your choices\r')
         self.assertEqual(data_lines[1], '2013-01-01 12:00:00+00:00,Mikalai,Airhead :),bar\r')
@@ -444,7 +613,7 @@ class TestFormsSubmissionsExport(TestCase, WagtailTestUtils):
 
         # Check response
         self.assertEqual(response.status_code, 200)
-        data_lines = response.content.decode().split("\n")
+        data_lines = b''.join(response.streaming_content).decode().split("\n")
 
         self.assertEqual(data_lines[0], 'Submission Date,Your name,Your biography,Your choices\r')
         self.assertEqual(data_lines[1], '2014-01-01 12:00:00+00:00,John,Genius,None\r')
@@ -467,7 +636,7 @@ class TestFormsSubmissionsExport(TestCase, WagtailTestUtils):
 
         # Check response
         self.assertEqual(response.status_code, 200)
-        data_line = response.content.decode('utf-8').split("\n")[3]
+        data_line = b''.join(response.streaming_content).decode('utf-8').split("\n")[3]
         self.assertIn('こんにちは、世界', data_line)
 
     def test_list_submissions_csv_export_with_unicode_in_field(self):
@@ -499,7 +668,7 @@ class TestFormsSubmissionsExport(TestCase, WagtailTestUtils):
         # Check response
         self.assertEqual(response.status_code, 200)
 
-        data_lines = response.content.decode('utf-8').split("\n")
+        data_lines = b''.join(response.streaming_content).decode('utf-8').split("\n")
         self.assertIn('Выберите самую любимую IDE для разработке на Python', data_lines[0])
         self.assertIn('vim', data_lines[1])
 
@@ -520,7 +689,7 @@ class TestCustomFormsSubmissionsExport(TestCase, WagtailTestUtils):
 
         # Check response
         self.assertEqual(response.status_code, 200)
-        data_lines = response.content.decode().split("\n")
+        data_lines = b''.join(response.streaming_content).decode().split("\n")
 
         self.assertEqual(data_lines[0], 'Username,Submission Date,Your name,Your biography,Your choices\r')
         self.assertEqual(data_lines[1], 'eventeditor,2013-01-01 12:00:00+00:00,Mikalai,Airhead :),bar\r')
@@ -534,7 +703,7 @@ class TestCustomFormsSubmissionsExport(TestCase, WagtailTestUtils):
 
         # Check response
         self.assertEqual(response.status_code, 200)
-        data_lines = response.content.decode().split("\n")
+        data_lines = b''.join(response.streaming_content).decode().split("\n")
 
         self.assertEqual(data_lines[0], 'Username,Submission Date,Your name,Your biography,Your choices\r')
         self.assertEqual(data_lines[1], 'siteeditor,2014-01-01 12:00:00+00:00,John,Genius,None\r')
@@ -547,7 +716,7 @@ class TestCustomFormsSubmissionsExport(TestCase, WagtailTestUtils):
 
         # Check response
         self.assertEqual(response.status_code, 200)
-        data_lines = response.content.decode().split("\n")
+        data_lines = b''.join(response.streaming_content).decode().split("\n")
 
         self.assertEqual(data_lines[0], 'Username,Submission Date,Your name,Your biography,Your choices\r')
         self.assertEqual(data_lines[1], 'eventeditor,2013-01-01 12:00:00+00:00,Mikalai,Airhead :),bar\r')
@@ -560,7 +729,7 @@ class TestCustomFormsSubmissionsExport(TestCase, WagtailTestUtils):
 
         # Check response
         self.assertEqual(response.status_code, 200)
-        data_lines = response.content.decode().split("\n")
+        data_lines = b''.join(response.streaming_content).decode().split("\n")
 
         self.assertEqual(data_lines[0], 'Username,Submission Date,Your name,Your biography,Your choices\r')
         self.assertEqual(data_lines[1], 'siteeditor,2014-01-01 12:00:00+00:00,John,Genius,None\r')
@@ -586,7 +755,7 @@ class TestCustomFormsSubmissionsExport(TestCase, WagtailTestUtils):
 
         # Check response
         self.assertEqual(response.status_code, 200)
-        data_line = response.content.decode('utf-8').split("\n")[3]
+        data_line = b''.join(response.streaming_content).decode('utf-8').split("\n")[3]
         self.assertIn('こんにちは、世界', data_line)
 
 
@@ -634,6 +803,60 @@ class TestDeleteFormSubmission(TestCase):
         self.assertEqual(FormSubmission.objects.count(), 2)
 
 
+class TestDeleteSubmissionsInDateRange(TestCase):
+    fixtures = ['test.json']
+
+    def setUp(self):
+        self.assertTrue(self.client.login(username='siteeditor', password='password'))
+        self.survey_page = Page.objects.get(url_path='/home/let-us-know/')
+        self.url = reverse('wagtailsurveys:delete_submissions', args=(self.survey_page.id,))
+
+    def test_show_confirmation(self):
+        response = self.client.get(self.url, {'date_from': '2014-01-01', 'date_to': '2014-01-01'})
+
+        self.assertTemplateUsed(response, 'wagtailsurveys/confirm_delete_submissions.html')
+        self.assertEqual(response.context['submission_count'], 1)
+        self.assertEqual(FormSubmission.objects.count(), 2)
+
+    def test_delete_submissions(self):
+        response = self.client.post(self.url, {'date_from': '2014-01-01', 'date_to': '2014-01-01'}, follow=True)
+
+        self.assertRedirects(response, reverse('wagtailsurveys:list_submissions', args=(self.survey_page.id,)))
+        self.assertContains(response, "1 submission deleted.")
+        self.assertEqual(FormSubmission.objects.count(), 1)
+        self.assertEqual(FormSubmission.objects.get().created_at.date().isoformat(), '2013-01-01')
+
+    @override_settings(WAGTAILSURVEYS_DELETE_SUBMISSIONS_MAX=1)
+    def test_too_many_submissions_are_left_to_command(self):
+        response = self.client.get(self.url, {'date_from': '2013-01-01', 'date_to': '2014-01-01'})
+
+        self.assertContains(
+            response,
+            'python manage.py purge_survey_submissions %d --date-from 2013-01-01 --date-to 2014-01-01'
+            % self.survey_page.id
+        )
+        self.assertNotContains(response, 'Delete them')
+
+        response = self.client.post(self.url, {'date_from': '2013-01-01', 'date_to': '2014-01-01'})
+
+        self.assertRedirects(response, reverse('wagtailsurveys:list_submissions', args=(self.survey_page.id,)))
+        self.assertEqual(FormSubmission.objects.count(), 2)
+
+    def test_dates_are_required(self):
+        response = self.client.post(self.url)
+
+        self.assertRedirects(response, reverse('wagtailsurveys:list_submissions', args=(self.survey_page.id,)))
+        self.assertEqual(FormSubmission.objects.count(), 2)
+
+    def test_bad_permissions(self):
+        self.assertTrue(self.client.login(username="eventeditor", password="password"))
+
+        response = self.client.post(self.url, {'date_from': '2013-01-01'})
+
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(FormSubmission.objects.count(), 2)
+
+
 class TestDeleteCustomFormsSubmissions(TestCase):
     fixtures = ['test.json']
 
@@ -676,3 +899,210 @@ class TestDeleteCustomFormsSubmissions(TestCase):
 
         # Check that the deletion has not happened
         self.assertEqual(CustomSubmission.objects.count(), 2)
+
+
+class TestBulkCreateSubmissions(TestCase):
+    fixtures = ['test.json']
+
+    def setUp(self):
+        self.assertTrue(self.client.login(username='siteeditor', password='password'))
+        self.survey_page = Page.objects.get(url_path='/home/let-us-know/')
+
+    def post_submissions(self, data, page=None):
+        return self.client.post(
+            reverse('wagtailsurveys:bulk_create_submissions', args=((page or self.survey_page).id,)),
+            json.dumps(data),
+            content_type='application/json'
+        )
+
+    def test_create_submissions(self):
+        response = self.post_submissions([
+            {'your-name': 'Alice', 'your-biography': 'hello', 'your-choices': ['foo']},
+            {'your-name': 'Bob', 'your-biography': 'world', 'your-choices': ['foo', 'bar']},
+        ])
+
+        # Check response
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content.decode('utf-8')), {'created': 2, 'errors': {}})
+
+        # Check that the submissions were saved and counted
+        self.assertEqual(FormSubmission.objects.filter(page=self.survey_page).count(), 4)
+        results = self.survey_page.specific.get_results()
+        self.assertEqual(results['Your choices']['foo'], 2)
+        self.assertEqual(results['Your choices']['bar'], 1)
+
+    def test_create_submissions_with_errors(self):
+        response = self.post_submissions([
+            {'your-name': 'Alice', 'your-biography': 'hello'},
+            {'your-name': 'Bob'},
+            'Carol',
+        ])
+
+        # Check that valid submissions were saved and errors were returned for others
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.content.decode('utf-8'))
+        self.assertEqual(data['created'], 1)
+        self.assertEqual(sorted(data['errors']), ['1', '2'])
+        self.assertIn('your-biography', data['errors']['1'])
+        self.assertEqual(FormSubmission.objects.filter(page=self.survey_page).count(), 3)
+
+    def test_create_submissions_with_custom_submission_model(self):
+        survey_page = Page.objects.get(url_path='/home/dont-touch-this-survey/')
+        CustomSubmission.objects.filter(user__username='siteeditor').delete()
+
+        with mock.patch.object(
+            SurveyWithCustomSubmissionPage, 'process_form_submission', autospec=True,
+            side_effect=SurveyWithCustomSubmissionPage.process_form_submission
+        ) as process_form_submission:
+            response = self.post_submissions([
+                {'your-name': 'Alice', 'your-biography': 'hello', '_submitted_at': self.get_submit_time(hours=1)},
+            ], page=survey_page)
+
+        # Check that the submission was saved by the overridden method with a reference to the user
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(process_form_submission.call_count, 1)
+        submission = CustomSubmission.objects.filter(page=survey_page).latest('id')
+        self.assertEqual(submission.user.username, 'siteeditor')
+        self.assertLess(submission.created_at, timezone.now() - datetime.timedelta(minutes=59))
+
+    def test_page_limits_submissions(self):
+        survey_page = Page.objects.get(url_path='/home/dont-touch-this-survey/')
+
+        # The page allows one submission per user, and siteeditor has made one already
+        response = self.post_submissions([{'your-name': 'Alice', 'your-biography': 'hello'}], page=survey_page)
+        self.assertEqual(response.status_code, 403)
+
+        CustomSubmission.objects.filter(user__username='siteeditor').delete()
+        response = self.post_submissions([
+            {'your-name': 'Alice', 'your-biography': 'hello'},
+            {'your-name': 'Bob', 'your-biography': 'world'},
+        ], page=survey_page)
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(CustomSubmission.objects.filter(user__username='siteeditor').exists())
+
+    def get_submit_time(self, **kwargs):
+        return (timezone.now() - datetime.timedelta(**kwargs)).isoformat()
+
+    def test_submit_time(self):
+        submitted_at = self.get_submit_time(days=2)
+
+        response = self.post_submissions([
+            {'your-name': 'Alice', 'your-biography': 'hello', '_submitted_at': submitted_at},
+            {'your-name': 'Bob', 'your-biography': 'hello', '_submitted_at': self.get_submit_time(days=-1)},
+            {'your-name': 'Carol', 'your-biography': 'hello', '_submitted_at': self.get_submit_time(days=365)},
+            {'your-name': 'Dave', 'your-biography': 'hello', '_submitted_at': 'yesterday'},
+        ])
+
+        data = json.loads(response.content.decode('utf-8'))
+        self.assertEqual(data['created'], 1)
+        self.assertEqual(sorted(data['errors']), ['1', '2', '3'])
+        self.assertIn('_submitted_at', data['errors']['1'])
+        submission = FormSubmission.objects.filter(page=self.survey_page).latest('id')
+        self.assertEqual(submission.created_at.isoformat(), submitted_at)
+
+    def test_invalid_json(self):
+        response = self.client.post(
+            reverse('wagtailsurveys:bulk_create_submissions', args=(self.survey_page.id,)),
+            'not json',
+            content_type='application/json'
+        )
+
+        self.assertEqual(response.status_code, 400)
+
+    @override_settings(WAGTAILSURVEYS_BULK_SUBMISSIONS_MAX_SIZE=1)
+    def test_too_many_submissions(self):
+        response = self.post_submissions([{}, {}])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(FormSubmission.objects.filter(page=self.survey_page).count(), 2)
+
+    def test_get_not_allowed(self):
+        response = self.client.get(reverse('wagtailsurveys:bulk_create_submissions', args=(self.survey_page.id,)))
+
+        self.assertEqual(response.status_code, 405)
+
+    def test_bad_permissions(self):
+        self.assertTrue(self.client.login(username="eventeditor", password="password"))
+
+        response = self.post_submissions([{'your-name': 'Alice', 'your-biography': 'hello'}])
+
+        # Check that the user recieved a 403 response and nothing was saved
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(FormSubmission.objects.filter(page=self.survey_page).count(), 2)
+
+
+class TestSubmissionsPermissionsQueries(TestCase):
+    """
+    Access to submissions is checked with permissions of the single page,
+    before the specific page and its submissions are loaded, so the number of queries
+    doesn't depend on the number of survey pages.
+    """
+
+    fixtures = ['test.json']
+
+    def setUp(self):
+        self.survey_page = Page.objects.get(url_path='/home/let-us-know/')
+        self.list_url = reverse('wagtailsurveys:list_submissions', args=(self.survey_page.id,))
+        self.delete_url = reverse(
+            'wagtailsurveys:delete_submission',
+            args=(self.survey_page.id, FormSubmission.objects.first().id)
+        )
+        self.page_count = 0
+
+    def add_survey_pages(self, count):
+        for i in range(self.page_count, self.page_count + count):
+            self.survey_page.add_child(instance=SurveyPage(title="Survey %d" % i, slug='survey-%d' % i, live=True))
+        self.page_count += count
+
+    def capture_queries(self, request):
+        # Fill caches, such as content types and permitted surveys, so they don't affect query counts
+        request()
+
+        with CaptureQueriesContext(connection) as context:
+            response = request()
+
+        return [query['sql'] for query in context.captured_queries], response
+
+    def assertQueriesDontGrowWithPages(self, request):
+        self.add_survey_pages(5)
+        queries, response = self.capture_queries(request)
+
+        self.add_survey_pages(5)
+        self.assertEqual(len(self.capture_queries(request)[0]), len(queries))
+
+        return queries, response
+
+    def assertDeniedWithoutLoading(self, queries):
+        # Only the session, the user, their permissions and the single page with its permissions are loaded
+        self.assertEqual(len(queries), 8)
+        for sql in queries:
+            # No pages the user can edit are listed
+            self.assertNotIn('"wagtailcore_page"."path" LIKE', sql)
+            # Neither the specific page nor its submissions are loaded
+            self.assertNotIn(SurveyPage._meta.db_table, sql)
+            self.assertNotIn(FormSubmission._meta.db_table, sql)
+
+    def test_list_submissions_queries(self):
+        self.assertTrue(self.client.login(username='siteeditor', password='password'))
+
+        queries, response = self.assertQueriesDontGrowWithPages(lambda: self.client.get(self.list_url))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len([sql for sql in queries if 'FROM "wagtailsurveys_formsubmission"' in sql]), 1)
+
+    def test_list_submissions_bad_permissions_queries(self):
+        self.assertTrue(self.client.login(username='eventeditor', password='password'))
+
+        queries, response = self.assertQueriesDontGrowWithPages(lambda: self.client.get(self.list_url))
+
+        self.assertEqual(response.status_code, 403)
+        self.assertDeniedWithoutLoading(queries)
+
+    def test_delete_submission_bad_permissions_queries(self):
+        self.assertTrue(self.client.login(username='eventeditor', password='password'))
+
+        queries, response = self.assertQueriesDontGrowWithPages(lambda: self.client.post(self.delete_url))
+
+        self.assertEqual(response.status_code, 403)
+        self.assertDeniedWithoutLoading(queries)
+        self.assertEqual(FormSubmission.objects.count(), 2)
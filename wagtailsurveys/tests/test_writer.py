@@ -0,0 +1,209 @@
+from __future__ import unicode_literals
+
+import json
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+import mock
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.six import StringIO
+
+from wagtailsurveys import writer
+from wagtailsurveys.models import FormSubmission, SurveyResult
+from wagtailsurveys.tests import utils as tests_utils
+from wagtailsurveys.writer import SubmissionWriter, fcntl
+
+
+class TestSubmissionWriter(TestCase):
+    def setUp(self):
+        # Create a survey page
+        self.survey_page = tests_utils.make_survey_page()
+
+        self.spool_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.spool_dir)
+        settings_override = override_settings(WAGTAILSURVEYS_WRITE_BEHIND={
+            'BATCH_SIZE': 10, 'MAX_QUEUE_SIZE': 2, 'SPOOL_DIR': self.spool_dir,
+        })
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        # Use a fresh writer and don't start its background thread,
+        # so submissions are written only when the queue is flushed
+        self.writer = SubmissionWriter()
+        for patch in (
+            mock.patch('wagtailsurveys.models.submission_writer', self.writer),
+            mock.patch.object(threading.Thread, 'start'),
+        ):
+            patch.start()
+            self.addCleanup(patch.stop)
+
+        # Don't leave queued submissions to be flushed at exit, after the test database is gone
+        self.addCleanup(self.writer.stop)
+
+    def post_survey(self, name):
+        return self.client.post('/let-us-know/', {
+            'your-name': name,
+            'your-biography': 'hello world',
+            'your-choices': ['foo'],
+        })
+
+    def test_submission_is_saved_on_flush(self):
+        response = self.post_survey('Bob')
+
+        # Check response
+        self.assertTemplateUsed(response, 'wagtailsurveys_tests/survey_page_landing.html')
+
+        # Check that the submission is waiting in the queue
+        self.assertFalse(FormSubmission.objects.exists())
+
+        self.writer.flush()
+
+        # Check that the submission was saved and counted
+        submission = FormSubmission.objects.get()
+        self.assertEqual(json.loads(submission.form_data)['your-name'], 'Bob')
+        self.assertEqual(self.survey_page.get_results()["Your choices"]['foo'], 1)
+
+    def test_submissions_are_saved_in_one_batch(self):
+        for name in ('Alice', 'Bob'):
+            self.post_survey(name)
+
+        with mock.patch.object(FormSubmission.objects, 'bulk_create') as bulk_create:
+            self.writer.flush()
+
+        self.assertEqual(bulk_create.call_count, 1)
+        self.assertEqual(len(bulk_create.call_args[0][0]), 2)
+
+    def test_submission_is_saved_synchronously_when_queue_is_full(self):
+        with self.assertLogs('wagtailsurveys', level='WARNING') as logs:
+            for name in ('Alice', 'Bob', 'Carol'):
+                self.post_survey(name)
+
+        self.assertIn("Survey submissions queue is full", logs.output[0])
+
+        # Check that the submission which didn't fit into the queue was saved
+        self.assertEqual(FormSubmission.objects.count(), 1)
+
+        self.writer.flush()
+
+        self.assertEqual(FormSubmission.objects.count(), 3)
+        self.assertEqual(self.survey_page.get_results()["Your choices"]['foo'], 3)
+
+    def test_failed_batch_is_saved_one_by_one(self):
+        for name in ('Alice', 'Bob'):
+            self.post_survey(name)
+
+        with mock.patch.object(FormSubmission.objects, 'bulk_create', side_effect=Exception), \
+                self.assertLogs('wagtailsurveys', level='ERROR') as logs:
+            self.writer.flush()
+
+        self.assertIn("Failed to save a batch of survey submissions", logs.output[0])
+        self.assertEqual(FormSubmission.objects.count(), 2)
+
+    def read_spool(self):
+        with open(self.writer._spool.path, 'rb') as spool_file:
+            return spool_file.read().decode('utf-8')
+
+    def test_queued_submission_is_spooled_until_saved(self):
+        # The form schema is saved by the first submission
+        self.post_survey('Alice')
+        self.writer.flush()
+
+        with CaptureQueriesContext(connection) as context:
+            self.post_survey('Bob')
+        submitted_at = timezone.now()
+
+        # Check that the response didn't wait for any writes to the database
+        writes = [query['sql'] for query in context.captured_queries if not query['sql'].startswith('SELECT')]
+        self.assertEqual(writes, [])
+
+        # Check that the submission is in the spool file instead of the database
+        self.assertIn('Bob', self.read_spool())
+
+        self.writer.flush()
+
+        self.assertEqual(self.read_spool(), '')
+        # Check that the submit time is kept, rather than the time of the flush
+        self.assertLessEqual(FormSubmission.objects.latest('pk').created_at, submitted_at)
+
+    def stop_process(self):
+        # Submissions left in the queue are lost, as if the process was killed
+        self.writer._queue = None
+        spool_file = self.writer._spool.file
+        self.writer._spool = None
+        spool_file.close()
+
+    @unittest.skipUnless(fcntl, "Spool files are replayed only where fcntl is available")
+    def test_replay_submissions_of_stopped_process(self):
+        self.post_survey('Alice')
+        self.post_survey('Bob')
+
+        # Submissions of a running process aren't replayed
+        self.assertEqual(SubmissionWriter().replay(), 0)
+
+        self.stop_process()
+
+        # Another process replays the submissions which this one didn't save
+        self.assertEqual(SubmissionWriter().replay(), 2)
+
+        self.assertEqual(
+            sorted(json.loads(submission.form_data)['your-name'] for submission in FormSubmission.objects.all()),
+            ['Alice', 'Bob']
+        )
+        self.assertEqual(self.survey_page.get_results()["Your choices"]['foo'], 2)
+        self.assertEqual(os.listdir(self.spool_dir), [])
+
+    @unittest.skipUnless(fcntl, "Spool files are replayed only where fcntl is available")
+    def test_saved_submissions_are_not_replayed(self):
+        self.post_survey('Alice')
+        self.writer.flush()
+        self.post_survey('Bob')
+        self.stop_process()
+
+        self.assertEqual(SubmissionWriter().replay(), 1)
+        self.assertEqual(FormSubmission.objects.count(), 2)
+
+    @unittest.skipUnless(fcntl, "Spool files are replayed only where fcntl is available")
+    def test_replay_command(self):
+        self.post_survey('Bob')
+        self.stop_process()
+
+        stdout = StringIO()
+        with mock.patch.object(writer, 'submission_writer', SubmissionWriter()):
+            call_command('replay_survey_submissions', stdout=stdout)
+
+        self.assertIn("Replayed 1 spooled submissions", stdout.getvalue())
+        self.assertEqual(FormSubmission.objects.count(), 1)
+
+    def test_failed_submission_is_kept_and_data_is_not_logged(self):
+        self.post_survey('Bob')
+
+        with mock.patch.object(FormSubmission, 'save', side_effect=Exception), \
+                self.assertLogs('wagtailsurveys', level='ERROR') as logs:
+            self.writer.flush()
+
+        self.assertFalse(FormSubmission.objects.exists())
+        self.assertIn('Bob', self.read_spool())
+        self.assertIn("Failed to save spooled submission 1", logs.output[-1])
+        self.assertNotIn('Bob', '\n'.join(logs.output))
+
+    def test_spool_file_is_deleted_on_stop(self):
+        self.post_survey('Bob')
+
+        self.writer.stop()
+
+        self.assertEqual(FormSubmission.objects.count(), 1)
+        self.assertEqual(os.listdir(self.spool_dir), [])
+
+    @override_settings(WAGTAILSURVEYS_WRITE_BEHIND=None)
+    def test_disabled_by_default(self):
+        self.post_survey('Bob')
+
+        self.assertEqual(FormSubmission.objects.count(), 1)
+        self.assertEqual(SurveyResult.objects.count(), 1)
@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-17 14:20
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+from wagtailsurveys.models import get_field_clean_name
+
+
+def populate_clean_name(apps, schema_editor):
+    for model_name in ('SurveyField', 'SurveyWithCustomSubmissionFormField'):
+        model = apps.get_model('wagtailsurveys_tests', model_name)
+        for pk, label in model.objects.values_list('pk', 'label'):
+            model.objects.filter(pk=pk).update(clean_name=get_field_clean_name(label))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wagtailsurveys_tests', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='surveyfield',
+            name='clean_name',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, help_text='Key of the field in submission data. Generated from the label on save.', max_length=255, verbose_name='name'),
+        ),
+        migrations.AddField(
+            model_name='surveywithcustomsubmissionformfield',
+            name='clean_name',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, help_text='Key of the field in submission data. Generated from the label on save.', max_length=255, verbose_name='name'),
+        ),
+        migrations.RunPython(populate_clean_name, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-17 14:25
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wagtailsurveys_tests', '0002_formfield_clean_name'),
+    ]
+
+    operations = [
+        migrations.AlterIndexTogether(
+            name='customsubmission',
+            index_together=set([('page', 'created_at')]),
+        ),
+    ]
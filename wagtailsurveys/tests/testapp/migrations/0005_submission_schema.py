@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-17 14:56
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wagtailsurveys', '0009_formschema'),
+        ('wagtailsurveys_tests', '0004_compactsurveypage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='compactsubmission',
+            name='schema',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='wagtailsurveys.FormSchema'),
+        ),
+        migrations.AddField(
+            model_name='customsubmission',
+            name='schema',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='wagtailsurveys.FormSchema'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-17 15:20
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wagtailsurveys_tests', '0005_submission_schema'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='compactsubmission',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False, verbose_name='submit time'),
+        ),
+        migrations.AlterField(
+            model_name='customsubmission',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False, verbose_name='submit time'),
+        ),
+    ]
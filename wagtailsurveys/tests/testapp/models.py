@@ -5,7 +5,6 @@ import json
 from django.conf import settings
 from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
-from django.shortcuts import render
 from modelcluster.fields import ParentalKey
 try:
     from wagtail.admin.edit_handlers import FieldPanel, InlinePanel
@@ -15,6 +14,7 @@ except ImportError:  # fallback for Wagtail <2.0
     from wagtail.wagtailcore.fields import RichTextField
 
 from wagtailsurveys import models as surveys_models
+from wagtailsurveys.contrib.compact import AbstractCompactFormSubmission
 
 
 class SurveyPage(surveys_models.AbstractSurvey):
@@ -66,20 +66,25 @@ class SurveyWithCustomSubmissionPage(surveys_models.AbstractSurvey):
         return CustomSubmission
 
     def process_form_submission(self, form):
-        self.get_submission_class().objects.create(
+        submission = self.get_submission_class().objects.create(
             form_data=json.dumps(form.cleaned_data, cls=DjangoJSONEncoder),
             page=self, user=form.user
         )
+        self.update_results(form.cleaned_data)
 
-    def serve(self, request, *args, **kwargs):
-        if self.get_submission_class().objects.filter(page=self, user__pk=request.user.pk).exists():
-            return render(
-                request,
-                self.template,
-                self.get_context(request)
-            )
+        return submission
 
-        return super(SurveyWithCustomSubmissionPage, self).serve(request, *args, **kwargs)
+    def build_submission(self, form):
+        submission = super(SurveyWithCustomSubmissionPage, self).build_submission(form)
+        submission.user = form.user
+
+        return submission
+
+    def can_submit(self, request, count=1):
+        # One submission per user
+        return count <= 1 and not self.get_submission_class().objects.filter(
+            page=self, user__pk=request.user.pk
+        ).exists()
 
 
 class SurveyWithCustomSubmissionFormField(surveys_models.AbstractFormField):
@@ -89,6 +94,10 @@ class SurveyWithCustomSubmissionFormField(surveys_models.AbstractFormField):
 class CustomSubmission(surveys_models.AbstractFormSubmission):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
 
+    extra_data_fields = {
+        'username': 'user__username',
+    }
+
     def get_data(self):
         form_data = super(CustomSubmission, self).get_data()
         form_data.update({
@@ -96,3 +105,27 @@ class CustomSubmission(surveys_models.AbstractFormSubmission):
         })
 
         return form_data
+
+
+class CompactSurveyPage(surveys_models.AbstractSurvey):
+    """
+    This Survey page stores submissions in compact binary form
+    """
+
+    content_panels = surveys_models.AbstractSurvey.content_panels + [
+        InlinePanel('compact_form_fields', label="Form fields"),
+    ]
+
+    def get_form_fields(self):
+        return self.compact_form_fields.all()
+
+    def get_submission_class(self):
+        return CompactSubmission
+
+
+class CompactSurveyFormField(surveys_models.AbstractFormField):
+    page = ParentalKey(CompactSurveyPage, related_name='compact_form_fields')
+
+
+class CompactSubmission(AbstractCompactFormSubmission):
+    pass
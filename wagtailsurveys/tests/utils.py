@@ -1,11 +1,15 @@
 from __future__ import unicode_literals
+
+from contextlib import contextmanager
+
+from django.db import connection
 try:
     from wagtail.core.models import Page
 except ImportError:  # fallback for Wagtail <2.0
     from wagtail.wagtailcore.models import Page
 
 from wagtailsurveys.tests.testapp.models import (
-    SurveyPage, SurveyField,
+    CompactSurveyPage, CompactSurveyFormField, SurveyPage, SurveyField,
     SurveyWithCustomSubmissionPage, SurveyWithCustomSubmissionFormField
 )
 
@@ -74,3 +78,51 @@ def make_survey_page_with_custom_submission(**kwargs):
     )
 
     return survey_page
+
+
+def make_compact_survey_page(**kwargs):
+    kwargs.setdefault('title', "Compact survey")
+    kwargs.setdefault('slug', "compact-survey")
+
+    home_page = Page.objects.get(url_path='/home/')
+    survey_page = home_page.add_child(instance=CompactSurveyPage(**kwargs))
+
+    CompactSurveyFormField.objects.create(
+        page=survey_page,
+        sort_order=1,
+        label="What is the most important question you would like to ask the team?",
+        field_type='singleline',
+        required=True,
+    )
+    CompactSurveyFormField.objects.create(
+        page=survey_page,
+        sort_order=2,
+        label="Your choices",
+        field_type='checkboxes',
+        required=False,
+        choices='foo,bar,baz',
+    )
+    CompactSurveyFormField.objects.create(
+        page=survey_page,
+        sort_order=3,
+        label="Your age",
+        field_type='number',
+        required=False,
+    )
+
+    return survey_page
+
+
+@contextmanager
+def run_on_commit_callbacks():
+    """
+    Runs `transaction.on_commit` callbacks registered in the block, which `TestCase`
+    never commits. Callbacks of rolled back savepoints are discarded by Django before that.
+    """
+
+    start = len(connection.run_on_commit)
+    yield
+    callbacks = connection.run_on_commit[start:]
+    del connection.run_on_commit[start:]
+    for sids, callback in callbacks:
+        callback()
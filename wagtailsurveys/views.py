@@ -1,13 +1,18 @@
 from __future__ import unicode_literals
 
-import csv
-
 import datetime
-from django.core.exceptions import PermissionDenied
-from django.http import HttpResponse
+import json
+
+from django.conf import settings
+from django.core.exceptions import PermissionDenied, ValidationError
+from django.http import Http404, JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, render, redirect
-from django.utils.encoding import smart_str
+from django.utils import six, timezone
+from django.utils.dateparse import parse_datetime
+from django.utils.encoding import force_text
 from django.utils.translation import ugettext as _
+from django.utils.translation import ungettext
+from django.views.decorators.http import require_POST
 
 try:
     from wagtail.core.models import Page
@@ -17,30 +22,43 @@ except ImportError:  # fallback for Wagtail <2.0
     from wagtail.wagtailadmin import messages
 
 from wagtail.utils.pagination import paginate
+from wagtailsurveys.archive import ArchivedSubmissions
+from wagtailsurveys.export import filter_submissions, iter_export_job_file, iter_rows
+from wagtailsurveys.exporters import get_exporters
 from wagtailsurveys.forms import SelectDateForm
+from wagtailsurveys.pagination import paginate_by_cursor
+from wagtailsurveys.permissions import user_can_access_submissions
 
-from wagtailsurveys.models import get_surveys_for_user
+from wagtailsurveys.models import ExportJob, get_submission_stats, get_surveys_for_user, load_submissions
 
 
 def index(request):
-    survey_pages = get_surveys_for_user(request.user)
+    # Content types are shown in the listing
+    survey_pages = get_surveys_for_user(request.user).select_related('content_type')
 
     paginator, survey_pages = paginate(request, survey_pages)
 
+    # Statistics of all pages on the current page of the listing are aggregated at once
+    survey_pages.object_list = list(survey_pages.object_list)
+    submission_stats = get_submission_stats(survey_pages.object_list)
+    for survey_page in survey_pages.object_list:
+        survey_page.submission_stats = submission_stats[survey_page.pk]
+
     return render(request, 'wagtailsurveys/index.html', {
         'survey_pages': survey_pages,
     })
 
 
 def delete_submission(request, page_id, submission_id):
-    if not get_surveys_for_user(request.user).filter(id=page_id).exists():
+    page = get_object_or_404(Page, id=page_id)
+    if not user_can_access_submissions(request.user, page):
         raise PermissionDenied
 
-    page = get_object_or_404(Page, id=page_id).specific
+    page = page.specific
     submission = get_object_or_404(page.get_submission_class(), id=submission_id)
 
     if request.method == 'POST':
-        submission.delete()
+        page.delete_submission(submission)
 
         messages.success(request, _("Submission deleted."))
         return redirect('wagtailsurveys:list_submissions', page_id)
@@ -51,59 +69,249 @@ def delete_submission(request, page_id, submission_id):
     })
 
 
+def delete_submissions(request, page_id):
+    """
+    Deletes submissions created in a date range, in batches, after a confirmation.
+
+    Deletion runs within the request, so ranges of more than `WAGTAILSURVEYS_DELETE_SUBMISSIONS_MAX`
+    submissions are left to `purge_survey_submissions` management command.
+    """
+
+    page = get_object_or_404(Page, id=page_id)
+    if not user_can_access_submissions(request.user, page):
+        raise PermissionDenied
+
+    page = page.specific
+    select_date_form = SelectDateForm(request.POST if request.method == 'POST' else request.GET)
+    if not select_date_form.is_valid() or not (
+        select_date_form.cleaned_data.get('date_from') or select_date_form.cleaned_data.get('date_to')
+    ):
+        messages.error(request, _("Choose dates of submissions to delete."))
+        return redirect('wagtailsurveys:list_submissions', page_id)
+
+    date_from = select_date_form.cleaned_data.get('date_from')
+    date_to = select_date_form.cleaned_data.get('date_to')
+    submissions = filter_submissions(
+        page.get_submission_class().objects.filter(page=page), date_from=date_from, date_to=date_to
+    )
+    archived = ArchivedSubmissions(page, date_from=date_from, date_to=date_to)
+    submission_count = submissions.count() + archived.count()
+    max_count = getattr(settings, 'WAGTAILSURVEYS_DELETE_SUBMISSIONS_MAX', 10000)
+
+    if request.method == 'POST':
+        if submission_count > max_count:
+            messages.error(request, _("Too many submissions to delete at once."))
+            return redirect('wagtailsurveys:list_submissions', page_id)
+
+        count = page.delete_submissions(submissions, archived=archived)
+
+        messages.success(request, ungettext(
+            "%(count)d submission deleted.", "%(count)d submissions deleted.", count
+        ) % {'count': count})
+        return redirect('wagtailsurveys:list_submissions', page_id)
+
+    purge_command = None
+    if submission_count > max_count:
+        purge_command = 'python manage.py purge_survey_submissions %d' % page.id
+        if date_from:
+            purge_command += ' --date-from %s' % date_from.date().isoformat()
+        if date_to:
+            purge_command += ' --date-to %s' % date_to.date().isoformat()
+
+    return render(request, 'wagtailsurveys/confirm_delete_submissions.html', {
+        'page': page,
+        'select_date_form': select_date_form,
+        'submission_count': submission_count,
+        'purge_command': purge_command,
+    })
+
+
+def parse_submit_time(value):
+    """
+    Returns a submit time sent by a client as an ISO 8601 string, None if it wasn't sent.
+    Times in the future or older than `WAGTAILSURVEYS_BULK_SUBMISSIONS_MAX_AGE` days are rejected.
+    """
+
+    if value is None:
+        return None
+
+    submitted_at = parse_datetime(value) if isinstance(value, six.string_types) else None
+    if submitted_at is None:
+        raise ValidationError(_("Enter a valid date and time."))
+
+    if settings.USE_TZ and timezone.is_naive(submitted_at):
+        submitted_at = timezone.make_aware(submitted_at)
+
+    now = timezone.now()
+    max_age = getattr(settings, 'WAGTAILSURVEYS_BULK_SUBMISSIONS_MAX_AGE', 30)
+    if submitted_at > now:
+        raise ValidationError(_("Submit time can't be in the future."))
+    if submitted_at < now - datetime.timedelta(days=max_age):
+        raise ValidationError(_("Submit time can't be more than %d days ago.") % max_age)
+
+    return submitted_at
+
+
+@require_POST
+def bulk_create_submissions(request, page_id):
+    """
+    Accepts a JSON array of submissions, each of them an object with form field values
+    and an optional `_submitted_at` time, validates every item against the survey form
+    and saves valid ones in bulk, if the page allows the user to make that many submissions.
+
+    Responds with a number of created submissions and errors of invalid items by their index.
+    """
+
+    survey_page = get_object_or_404(Page, id=page_id)
+    if not user_can_access_submissions(request.user, survey_page):
+        raise PermissionDenied
+
+    survey_page = survey_page.specific
+
+    try:
+        items = json.loads(force_text(request.body))
+    except ValueError:
+        return JsonResponse({'error': _("Request body is not valid JSON.")}, status=400)
+
+    if not isinstance(items, list):
+        return JsonResponse({'error': _("Request body must be a JSON array.")}, status=400)
+
+    max_size = getattr(settings, 'WAGTAILSURVEYS_BULK_SUBMISSIONS_MAX_SIZE', 1000)
+    if len(items) > max_size:
+        return JsonResponse({'error': _("At most %d submissions can be sent at once.") % max_size}, status=400)
+
+    # Build the form class once for the whole batch
+    form_class = survey_page.get_form_class()
+    form_params = survey_page.get_form_parameters()
+    form_params.update(page=survey_page, user=request.user)
+
+    forms = []
+    submit_times = []
+    errors = {}
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            errors[index] = {'__all__': [_("Submission must be a JSON object.")]}
+            continue
+
+        item = dict(item)
+        try:
+            submitted_at = parse_submit_time(item.pop('_submitted_at', None))
+        except ValidationError as e:
+            errors[index] = {'_submitted_at': e.messages}
+            continue
+
+        form = form_class(item, **form_params)
+        if form.is_valid():
+            forms.append(form)
+            submit_times.append(submitted_at)
+        else:
+            errors[index] = {name: [force_text(error) for error in field_errors]
+                             for name, field_errors in form.errors.items()}
+
+    if forms and not survey_page.can_submit(request, len(forms)):
+        return JsonResponse({'error': _("You can't make this many submissions of this survey.")}, status=403)
+
+    submissions = survey_page.process_form_submissions(forms, submit_times)
+
+    return JsonResponse({
+        'created': len(submissions),
+        'errors': errors,
+    })
+
+
+@require_POST
+def create_export_job(request, page_id):
+    survey_page = get_object_or_404(Page, id=page_id)
+    if not user_can_access_submissions(request.user, survey_page):
+        raise PermissionDenied
+
+    select_date_form = SelectDateForm(request.POST)
+    if not select_date_form.is_valid():
+        messages.error(request, _("The export could not be queued due to errors in dates."))
+        return redirect('wagtailsurveys:list_submissions', page_id)
+
+    ExportJob.objects.create(
+        page=survey_page,
+        user=request.user,
+        date_from=select_date_form.cleaned_data.get('date_from'),
+        date_to=select_date_form.cleaned_data.get('date_to'),
+    )
+
+    messages.success(request, _("Export queued. The file will be available for download when it's ready."))
+    return redirect('wagtailsurveys:list_export_jobs', page_id)
+
+
+def list_export_jobs(request, page_id):
+    survey_page = get_object_or_404(Page, id=page_id)
+    if not user_can_access_submissions(request.user, survey_page):
+        raise PermissionDenied
+
+    paginator, export_jobs = paginate(request, ExportJob.objects.filter(page=survey_page))
+
+    return render(request, 'wagtailsurveys/export_jobs.html', {
+        'survey_page': survey_page,
+        'export_jobs': export_jobs,
+    })
+
+
+def download_export_job(request, page_id, job_id):
+    survey_page = get_object_or_404(Page, id=page_id)
+    if not user_can_access_submissions(request.user, survey_page):
+        raise PermissionDenied
+
+    job = get_object_or_404(ExportJob, page=survey_page, id=job_id, status=ExportJob.STATUS_COMPLETE)
+
+    response = StreamingHttpResponse(iter_export_job_file(job), content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = 'attachment;filename=%s' % job.get_file_name()
+    return response
+
+
 def list_submissions(request, page_id):
+    survey_page = get_object_or_404(Page, id=page_id)
+    if not user_can_access_submissions(request.user, survey_page):
+        raise PermissionDenied
+
     # We can't create backwards relation to Page in AbstractFormSubmission,
     # this is why we need to get specific object
-    survey_page = get_object_or_404(Page, id=page_id).specific
+    survey_page = survey_page.specific
     SubmissionClass = survey_page.get_submission_class()
 
-    if not get_surveys_for_user(request.user).filter(id=page_id).exists():
-        raise PermissionDenied
-
-    data_fields = survey_page.get_data_fields()
-
     submissions = SubmissionClass.objects.filter(page=survey_page)
-    data_headings = [label for name, label in data_fields]
+    archived = ArchivedSubmissions(survey_page)
 
     select_date_form = SelectDateForm(request.GET)
     if select_date_form.is_valid():
         date_from = select_date_form.cleaned_data.get('date_from')
         date_to = select_date_form.cleaned_data.get('date_to')
-        # careful: date_to should be increased by 1 day since the created_at
-        # is a time so it will always be greater
-        if date_to:
-            date_to += datetime.timedelta(days=1)
-        if date_from and date_to:
-            submissions = submissions.filter(created_at__range=[date_from, date_to])
-        elif date_from and not date_to:
-            submissions = submissions.filter(created_at__gte=date_from)
-        elif not date_from and date_to:
-            submissions = submissions.filter(created_at__lte=date_to)
+        submissions = filter_submissions(submissions, date_from=date_from, date_to=date_to)
+        archived = ArchivedSubmissions(survey_page, date_from=date_from, date_to=date_to)
 
+    exporters = get_exporters()
+    export_format = request.GET.get('export')
     if request.GET.get('action') == 'CSV':
-        # return a CSV instead
-        response = HttpResponse(content_type='text/csv; charset=utf-8')
-        response['Content-Disposition'] = 'attachment;filename=export.csv'
+        export_format = 'csv'
 
-        # Prevents UnicodeEncodeError for questions with non-ansi symbols
-        data_headings = [smart_str(label) for label in data_headings]
+    if export_format:
+        # return an exported file instead
+        if export_format not in exporters:
+            raise Http404
+        return exporters[export_format](survey_page, archived=archived).get_response(
+            submissions, compress=request.GET.get('compress') == 'gzip'
+        )
+
+    data_fields, renames = survey_page.get_versioned_data_fields()
+    data_headings = [label for name, label in data_fields]
 
-        writer = csv.writer(response)
-        writer.writerow(data_headings)
-        for s in submissions:
-            data_row = []
-            form_data = s.get_data()
-            for name, label in data_fields:
-                data_row.append(smart_str(form_data.get(name)))
-            writer.writerow(data_row)
-        return response
+    submissions = paginate_by_cursor(request, submissions, load=load_submissions)
 
-    paginator, submissions = paginate(request, submissions)
+    # Keep filters in links to the previous and the next pages
+    pagination_query = request.GET.copy()
+    pagination_query.pop('after', None)
+    pagination_query.pop('before', None)
 
+    names = [name for name, label in data_fields]
     data_rows = []
-    for s in submissions:
-        form_data = s.get_data()
-        data_row = [form_data.get(name) for name, label in data_fields]
+    for s, data_row in zip(submissions, iter_rows(submissions, names, renames)):
         data_rows.append({
             "model_id": s.id,
             "fields": data_row
@@ -113,6 +321,8 @@ def list_submissions(request, page_id):
         'survey_page': survey_page,
         'select_date_form': select_date_form,
         'submissions': submissions,
+        'pagination_query': pagination_query,
+        'exporters': [exporter for name, exporter in exporters.items() if name != 'csv'],
         'data_headings': data_headings,
         'data_rows': data_rows
     })
@@ -10,7 +10,7 @@ except ImportError:  # fallback for Wagtail <2.0
     from wagtail.wagtailadmin.menu import MenuItem
 
 from wagtailsurveys import admin_urls
-from wagtailsurveys.models import get_surveys_for_user
+from wagtailsurveys.permissions import get_survey_ids_for_request
 
 
 @hooks.register('register_admin_urls')
@@ -23,7 +23,7 @@ def register_admin_urls():
 class SurveysMenuItem(MenuItem):
     def is_shown(self, request):
         # show this only if the user has permission to retrieve submissions for at least one form
-        return get_surveys_for_user(request.user).exists()
+        return bool(get_survey_ids_for_request(request))
 
 
 @hooks.register('register_admin_menu_item')
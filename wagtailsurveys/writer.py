@@ -0,0 +1,404 @@
+from __future__ import absolute_import, unicode_literals
+
+import atexit
+import io
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+from django.apps import apps
+from django.conf import settings
+from django.core import serializers
+from django.db import close_old_connections
+from django.utils.crypto import get_random_string
+from django.utils.six.moves import queue
+
+from wagtailsurveys import codec
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+
+logger = logging.getLogger('wagtailsurveys')
+
+
+DEFAULT_OPTIONS = {
+    # Maximum number of submissions saved with one query
+    'BATCH_SIZE': 100,
+    # Maximum number of seconds a submission waits in the queue
+    'FLUSH_INTERVAL': 1.0,
+    # Submissions are saved synchronously when the queue is full
+    'MAX_QUEUE_SIZE': 10000,
+    # Directory of spool files, a subdirectory of the temporary directory by default
+    'SPOOL_DIR': None,
+}
+
+
+class SpoolFile(object):
+    """
+    An append-only file of submissions queued by a process, with a JSON record per line:
+    a queued submission, or ids of queued submissions which were saved.
+
+    The file is locked while its process runs, so other processes can tell a file left by a process
+    which stopped, and replay its submissions which weren't saved. It's emptied whenever all of them are saved.
+    """
+
+    extension = '.spool'
+
+    def __init__(self, path, spool_file):
+        self.path = path
+        self.file = spool_file
+        self.unsaved = set()
+        self.last_id = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def create(cls, directory):
+        try:
+            os.makedirs(directory)
+        except OSError:
+            # Created by another process
+            if not os.path.isdir(directory):
+                raise
+
+        path = os.path.join(directory, '%d-%s%s' % (os.getpid(), get_random_string(8), cls.extension))
+        spool = cls(path, io.open(path, 'a+b'))
+        spool.lock()
+        return spool
+
+    @classmethod
+    def open(cls, path):
+        """
+        Opens a spool file left by another process, or returns None if its process still runs
+        or another process replays it.
+        """
+
+        try:
+            spool = cls(path, io.open(path, 'r+b'))
+        except IOError:
+            # Deleted by another process since the directory was listed
+            return None
+
+        if not spool.lock():
+            spool.file.close()
+            return None
+
+        return spool
+
+    def lock(self):
+        if fcntl is None:
+            return False
+
+        try:
+            fcntl.flock(self.file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except (IOError, OSError):
+            return False
+        return True
+
+    def write(self, record):
+        self.file.seek(0, os.SEEK_END)
+        self.file.write(codec.dumps(record).encode('utf-8') + b'\n')
+        # Flushed to the operating system, so the record outlives the process
+        self.file.flush()
+
+    def add(self, page, submission, data):
+        """
+        Appends an unsaved submission of a survey page with its cleaned form data and returns its id.
+        """
+
+        record = {
+            'page': page.pk,
+            'submission': serializers.serialize('json', [submission]),
+            'data': codec.dumps(data),
+        }
+
+        with self._lock:
+            self.last_id += 1
+            record['id'] = self.last_id
+            self.write(record)
+            self.unsaved.add(self.last_id)
+
+        return record['id']
+
+    def mark_saved(self, ids):
+        with self._lock:
+            self.unsaved.difference_update(ids)
+            if self.unsaved:
+                self.write({'saved': list(ids)})
+            else:
+                # Nothing is left to replay
+                self.file.seek(0)
+                self.file.truncate()
+
+    def read_unsaved(self):
+        """
+        Returns records of submissions in the file which weren't saved, and marks them as unsaved.
+        """
+
+        self.file.seek(0)
+        records = OrderedDict()
+        saved = set()
+        for line in self.file:
+            if not line.strip():
+                continue
+            try:
+                record = codec.loads(line.decode('utf-8'))
+            except ValueError:
+                # The last line may be cut short if the process stopped while writing it
+                continue
+
+            if 'saved' in record:
+                saved.update(record['saved'])
+            else:
+                records[record['id']] = record
+
+        unsaved = [record for record_id, record in records.items() if record_id not in saved]
+        with self._lock:
+            self.unsaved = {record['id'] for record in unsaved}
+        return unsaved
+
+    def close(self):
+        """
+        Closes the file, deleting it if all its submissions were saved.
+        """
+
+        with self._lock:
+            if not self.unsaved:
+                # Deleted before it's unlocked, so no other process replays it in between
+                try:
+                    os.remove(self.path)
+                except OSError:
+                    # Deleted by another process which replayed it
+                    pass
+            self.file.close()
+
+
+class SubmissionWriter(object):
+    """
+    Saves survey submissions in batches from a background thread ("write-behind"),
+    so responses to survey pages don't wait for database inserts.
+
+    Enabled by `WAGTAILSURVEYS_WRITE_BEHIND` setting, a dict which may override `DEFAULT_OPTIONS`.
+    Submissions are saved synchronously when the queue is full, and the queue is flushed on interpreter exit.
+
+    Each queued submission is also appended to a local `SpoolFile` of the process, so responses
+    don't wait for the database. Submissions left in spool files of processes which stopped
+    before saving them are replayed when the writer starts, or by `replay_survey_submissions` management command.
+    """
+
+    def __init__(self):
+        self._queue = None
+        self._thread = None
+        self._spool = None
+        self._lock = threading.Lock()
+
+    def get_options(self):
+        options = dict(DEFAULT_OPTIONS)
+        options.update(getattr(settings, 'WAGTAILSURVEYS_WRITE_BEHIND', None) or {})
+        return options
+
+    def get_spool_dir(self):
+        return self.get_options()['SPOOL_DIR'] or os.path.join(tempfile.gettempdir(), 'wagtailsurveys-spool')
+
+    def is_enabled(self):
+        return bool(getattr(settings, 'WAGTAILSURVEYS_WRITE_BEHIND', None))
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+
+            if self._queue is None:
+                self._queue = queue.Queue(maxsize=self.get_options()['MAX_QUEUE_SIZE'])
+                self._spool = SpoolFile.create(self.get_spool_dir())
+                atexit.register(self.stop)
+
+            self._thread = threading.Thread(target=self.run, name='wagtailsurveys-writer')
+            self._thread.daemon = True
+            self._thread.start()
+
+    def stop(self):
+        """
+        Saves queued submissions and closes the spool file, which is kept for a replay
+        if some of the submissions couldn't be saved.
+        """
+
+        self.flush()
+        if self._spool is not None:
+            self._spool.close()
+
+    def enqueue(self, page, submission, data):
+        """
+        Queues an unsaved submission of a survey page with its cleaned form data.
+        """
+
+        self.start()
+
+        # Spooled before it's queued, so the thread never saves a submission which isn't in the file
+        item = (page, submission, data, self._spool.add(page, submission, data))
+
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            logger.warning("Survey submissions queue is full, saving submission synchronously")
+            self.write([item])
+
+    def get_batch(self, block=True):
+        """
+        Takes up to `BATCH_SIZE` submissions from the queue.
+
+        When `block` is True, waits for the first submission and then
+        for more of them until `FLUSH_INTERVAL` seconds pass.
+        """
+
+        options = self.get_options()
+        batch = []
+
+        if block:
+            batch.append(self._queue.get())
+            deadline = time.time() + options['FLUSH_INTERVAL']
+
+        while len(batch) < options['BATCH_SIZE']:
+            try:
+                if block:
+                    timeout = deadline - time.time()
+                    if timeout <= 0:
+                        break
+                    batch.append(self._queue.get(timeout=timeout))
+                else:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+
+        return batch
+
+    def run(self):
+        try:
+            self.replay()
+        except Exception:
+            logger.exception("Failed to replay spooled survey submissions")
+
+        while True:
+            self.write(self.get_batch())
+
+    def replay(self):
+        """
+        Saves submissions left in spool files of processes which stopped before saving them.
+        Returns the number of saved submissions.
+
+        Spool files of running processes are locked and skipped. Locks need `fcntl`,
+        so nothing is replayed on platforms which don't have it.
+        """
+
+        directory = self.get_spool_dir()
+        if fcntl is None or not os.path.isdir(directory):
+            return 0
+
+        replayed = 0
+        for name in sorted(os.listdir(directory)):
+            path = os.path.join(directory, name)
+            if not name.endswith(SpoolFile.extension) or (self._spool is not None and path == self._spool.path):
+                continue
+
+            spool = SpoolFile.open(path)
+            if spool is None:
+                continue
+
+            try:
+                replayed += self.replay_spool(spool)
+            finally:
+                spool.close()
+
+        return replayed
+
+    def replay_spool(self, spool):
+        Page = apps.get_model('wagtailcore', 'Page')
+        batch_size = self.get_options()['BATCH_SIZE']
+        records = spool.read_unsaved()
+        pages = {}
+        replayed = 0
+
+        for index in range(0, len(records), batch_size):
+            batch = []
+            for record in records[index:index + batch_size]:
+                if record['page'] not in pages:
+                    page = Page.objects.filter(pk=record['page']).first()
+                    pages[record['page']] = page.specific if page is not None else None
+
+                if pages[record['page']] is None:
+                    # Submissions of deleted pages are dropped along with the page
+                    spool.mark_saved([record['id']])
+                    continue
+
+                submission = next(serializers.deserialize('json', record['submission'])).object
+                batch.append((pages[record['page']], submission, codec.loads(record['data']), record['id']))
+
+            replayed += self.write(batch, spool)
+
+        return replayed
+
+    def flush(self):
+        """
+        Saves all queued submissions in the current thread.
+        """
+
+        if self._queue is None:
+            return
+
+        while True:
+            batch = self.get_batch(block=False)
+            if not batch:
+                break
+            self.write(batch)
+
+    def write(self, batch, spool=None):
+        """
+        Saves a list of queued (page, submission, data, spooled submission id) items,
+        and marks them as saved in the spool file. Returns the number of saved submissions.
+        """
+
+        if spool is None:
+            spool = self._spool
+
+        # Drop database connections which are broken or past CONN_MAX_AGE,
+        # as request_finished signal never fires in this thread
+        close_old_connections()
+
+        pages = {}
+        items = {}
+        for item in batch:
+            pages.setdefault(item[0].pk, item[0])
+            items.setdefault(item[0].pk, []).append(item[1:])
+
+        saved = 0
+        for page_id, page_items in items.items():
+            page = pages[page_id]
+            try:
+                saved += self.save(page, page_items, spool)
+            except Exception:
+                logger.exception("Failed to save a batch of survey submissions, saving them one by one")
+                for item in page_items:
+                    saved += self.write_one(page, item, spool)
+
+        return saved
+
+    def write_one(self, page, item, spool):
+        try:
+            return self.save(page, [item], spool)
+        except Exception:
+            # Only identifiers are logged, the data stays in the spool file for a replay
+            logger.exception("Failed to save spooled submission %d of survey page %d", item[2], page.pk)
+            return 0
+
+    def save(self, page, items, spool):
+        page.save_submissions([(submission, data) for submission, data, spooled_id in items])
+        spool.mark_saved([spooled_id for submission, data, spooled_id in items])
+        return len(items)
+
+
+submission_writer = SubmissionWriter()